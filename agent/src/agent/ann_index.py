@@ -0,0 +1,192 @@
+"""
+Approximate nearest neighbour index for large RAG corpora (IVF-flat)
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from src.agent.rag_modules import SimpleVectorStore
+from src.config import get_settings
+
+
+def kmeans(data: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means over unit rows, returns k unit centroids"""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=k, replace=False)].copy()
+
+    for _ in range(iterations):
+        assign = nearest_centroid(data, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+
+        # Re-seed empty clusters with random points
+        empty = np.flatnonzero(np.bincount(assign, minlength=k) == 0)
+        if len(empty):
+            sums[empty] = data[rng.choice(len(data), size=len(empty), replace=False)]
+
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = (sums / norms).astype(np.float32)
+
+    return centroids
+
+
+def nearest_centroid(data: np.ndarray, centroids: np.ndarray, batch: int = 16384) -> np.ndarray:
+    """Index of the most similar centroid for every row (batched to bound memory)"""
+    assign = np.empty(len(data), dtype=np.int32)
+    for start in range(0, len(data), batch):
+        assign[start:start + batch] = np.argmax(data[start:start + batch] @ centroids.T, axis=1)
+    return assign
+
+
+class IVFVectorStore(SimpleVectorStore):
+    """Inverted-file (IVF-flat) vector store
+
+    Rows are partitioned by k-means into `nlist` cells. A query scores the `nprobe`
+    closest centroids, then only the rows in those cells, so latency grows with
+    n / nlist * nprobe instead of n. Raising nprobe trades latency for recall;
+    nprobe == nlist is exact search. Corpora smaller than `min_train_size` are
+    searched brute force.
+    """
+
+    # Retrain once the store has grown this much since the last training
+    RETRAIN_GROWTH = 4
+    # k-means training sample per centroid
+    TRAIN_POINTS_PER_LIST = 64
+
+    def __init__(
+        self,
+        initial_capacity: int = 256,
+        nlist: Optional[int] = None,
+        nprobe: Optional[int] = None,
+        min_train_size: int = 20000,
+        precision: Optional[str] = None,
+        rescore_factor: Optional[int] = None,
+    ):
+        super().__init__(initial_capacity, precision, rescore_factor)
+        settings = get_settings()
+        self.nlist = nlist if nlist is not None else settings.rag_ivf_nlist  # 0 = 4 * sqrt(n)
+        self.nprobe = nprobe if nprobe is not None else settings.rag_ivf_nprobe
+        self.min_train_size = min_train_size
+        self._centroids: Optional[np.ndarray] = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._trained_size = 0
+        # CSR inverted lists (rows sorted by cell, cell start offsets), built lazily
+        self._postings: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    @property
+    def is_trained(self) -> bool:
+        return self._centroids is not None
+
+    def train(self):
+        """(Re)build the coarse quantizer over the current rows"""
+        if self._size == 0:
+            return
+        nlist = self.nlist or int(4 * np.sqrt(self._size))
+        nlist = max(1, min(nlist, self._size))
+
+        data = self.vectors
+        sample_size = min(self._size, nlist * self.TRAIN_POINTS_PER_LIST)
+        if sample_size < self._size:
+            sample = np.random.default_rng(0).choice(self._size, size=sample_size, replace=False)
+            data = data[np.sort(sample)]
+
+        self._centroids = kmeans(np.asarray(data, dtype=np.float32), nlist)
+        self._assign = nearest_centroid(self.vectors, self._centroids)
+        self._trained_size = self._size
+        self._postings = None
+
+    def add_documents(self, documents: List[Dict[str, Any]], embeddings: List[List[float]]):
+        start = self._size
+        super().add_documents(documents, embeddings)
+        if self._size == start:
+            return
+
+        if not self.is_trained or self._size >= self.RETRAIN_GROWTH * self._trained_size:
+            if self._size >= self.min_train_size:
+                self.train()
+            return
+
+        new_assign = nearest_centroid(self.vectors[start:], self._centroids)
+        self._assign = np.concatenate([self._assign, new_assign])
+        self._postings = None
+
+    def compact(self):
+        keep = self.live_rows()
+        dropped = self._deleted_count
+        super().compact()
+        if dropped and self.is_trained:
+            self._assign = self._assign[keep]
+            self._postings = None
+
+    def clone(self) -> "IVFVectorStore":
+        other = super().clone()
+        other._assign = self._assign.copy()
+        return other
+
+    def save(self, path: str | Path, metadata: Optional[Dict[str, Any]] = None):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        if self.is_trained:
+            np.save(path / "ivf_centroids.npy", self._centroids)
+            np.save(path / "ivf_assign.npy", self._assign[self.live_rows()])
+        super().save(path, metadata)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "IVFVectorStore":
+        store = super().load(path)
+        path = Path(path)
+        if store._size and (path / "ivf_centroids.npy").exists():
+            store._centroids = np.load(path / "ivf_centroids.npy")
+            store._assign = np.load(path / "ivf_assign.npy", mmap_mode="r")
+            store._trained_size = store._size
+        elif store._size >= store.min_train_size:
+            # Index written by the flat backend
+            store.train()
+        return store
+
+    def _score(self, query_vec: np.ndarray, mask: Optional[np.ndarray] = None) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        if not self.is_trained:
+            return super()._score(query_vec, mask)
+
+        return self._probe(query_vec, self._top_k(self._centroids @ query_vec, self.nprobe), mask)
+
+    def search_batch(self, query_matrix, k: int = 3, mask: Optional[np.ndarray] = None) -> List[List[Dict[str, Any]]]:
+        """Batched search: centroid scoring is one matmul, cells are then scanned per query"""
+        if not self.is_trained:
+            return super().search_batch(query_matrix, k, mask)
+
+        queries = self._normalize(np.atleast_2d(np.asarray(query_matrix, dtype=np.float32)))
+        probes = self._top_k_rows(queries @ self._centroids.T, self.nprobe)
+        results = []
+        for query_vec, probe in zip(queries, probes):
+            if not query_vec.any():
+                results.append([])
+                continue
+            rows, similarities = self._probe(query_vec, probe, mask)
+            top = self._top_k(similarities, self._candidates(k))
+            results.append(self._results(rows, similarities, top, query_vec, k))
+        return results
+
+    def _probe(
+        self, query_vec: np.ndarray, probe: np.ndarray, mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Similarities of the rows in the probed cells (masked rows only, if a mask is given)"""
+        order, offsets = self._inverted_lists()
+        rows = np.concatenate([order[offsets[cell]:offsets[cell + 1]] for cell in probe])
+        if mask is not None:
+            rows = rows[mask[rows]]
+
+        similarities = self._similarities(query_vec, rows)
+        if self._deleted_count:
+            similarities[self._tombstones[rows]] = -np.inf
+        return rows, similarities
+
+    def _inverted_lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows grouped by cell (CSR layout)"""
+        postings = self._postings
+        if postings is None:
+            order = np.argsort(self._assign, kind="stable")
+            counts = np.bincount(self._assign, minlength=len(self._centroids))
+            offsets = np.concatenate([[0], np.cumsum(counts)])
+            postings = self._postings = (order, offsets)
+        return postings
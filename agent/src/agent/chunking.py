@@ -0,0 +1,228 @@
+"""
+Token-budgeted markdown chunking for RAG
+"""
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Rough BPE granularity: short Latin pieces, digit groups, single Hangul syllables, punctuation
+_TOKEN_RE = re.compile(r"[A-Za-z]{1,6}|\d{1,3}|[가-힣]|[^\s\w]|\w")
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+# Where a trailing overlap may start: after a sentence end or at a line break
+_SENTENCE_BREAK_RE = re.compile(r"(?<=[.!?。])\s+|\n")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate LLM token count (no tokenizer dependency, errs on the high side for Korean)"""
+    return len(_TOKEN_RE.findall(text))
+
+
+class MarkdownChunker:
+    """Splits markdown into chunks between min_tokens and max_tokens
+
+    - Sections start at header lines ("#" outside code fences)
+    - Oversized sections are split at paragraph / code-fence boundaries (then at
+      lines); each continuation repeats the header line and the last
+      `overlap_tokens` of the previous piece (whole blocks, or the trailing
+      sentences of a last block that is longer than that)
+    - Undersized sections are merged into the following sibling or child section
+      when the result still fits max_tokens
+
+    Input is consumed line by line and chunks are yielded as soon as they are
+    final, so a file never has to be held as one string.
+    """
+
+    def __init__(self, min_tokens: int = 64, max_tokens: int = 512, overlap_tokens: int = 48):
+        if not 0 <= min_tokens <= max_tokens:
+            raise ValueError(f"Invalid chunk budget: min_tokens={min_tokens}, max_tokens={max_tokens}")
+        self.min_tokens = min_tokens
+        self.max_tokens = max_tokens
+        self.overlap_tokens = min(overlap_tokens, max_tokens // 2)
+
+    def chunk(self, lines: Iterable[str], source: str) -> Iterator[Dict[str, Any]]:
+        """Chunks of one markdown file given as an iterable of lines"""
+        pending: Optional[Tuple[int, str, str]] = None  # (level, header, text) of a small section
+        held: Optional[Tuple[str, str]] = None  # last section that fits one chunk, kept for a small tail
+        for level, header, text in self._sections(lines):
+            if pending is not None:
+                pending_level, pending_header, pending_text = pending
+                merged = f"{pending_text}\n\n{text}"
+                # Only merge into a sibling or child, never across a parent boundary
+                if level >= pending_level and estimate_tokens(merged) <= self.max_tokens:
+                    level, header, text = pending_level, pending_header, merged
+                else:
+                    if held is not None:
+                        yield self._chunk(held[0], held[1], source)
+                    held = (pending_header, pending_text)
+                pending = None
+
+            if estimate_tokens(text) < self.min_tokens:
+                pending = (level, header, text)
+                continue
+            if held is not None:
+                yield self._chunk(held[0], held[1], source)
+                held = None
+            if estimate_tokens(text) <= self.max_tokens:
+                held = (header, text)
+            else:
+                yield from self.split(header, text, source)
+
+        if pending is not None:
+            # A small last section goes back into the previous one when it fits
+            if held is not None and estimate_tokens(f"{held[1]}\n\n{pending[2]}") <= self.max_tokens:
+                held = (held[0], f"{held[1]}\n\n{pending[2]}")
+            else:
+                if held is not None:
+                    yield self._chunk(held[0], held[1], source)
+                held = (pending[1], pending[2])
+        if held is not None:
+            yield self._chunk(held[0], held[1], source)
+
+    def _sections(self, lines: Iterable[str]) -> Iterator[Tuple[int, str, str]]:
+        """(header level, header, text) per section; header lines inside code fences are content"""
+        level, header, current = 0, "Intro", []
+        in_fence = False
+        for line in lines:
+            line = line.rstrip("\r\n")
+            if _FENCE_RE.match(line):
+                in_fence = not in_fence
+            elif not in_fence and line.startswith("#"):
+                text = "\n".join(current).strip()
+                if text:
+                    yield level, header, text
+                level = len(line) - len(line.lstrip("#"))
+                header = line.strip().lstrip("#").strip()
+                current = [line]  # Include header in content
+                continue
+            current.append(line)
+
+        text = "\n".join(current).strip()
+        if text:
+            yield level, header, text
+
+    def split(self, header: str, text: str, source: str) -> Iterator[Dict[str, Any]]:
+        """One chunk, or several max_tokens pieces of an oversized section (also used for code units)"""
+        if estimate_tokens(text) <= self.max_tokens:
+            yield self._chunk(header, text, source)
+            return
+
+        lines = text.split("\n")
+        header_line = lines[0] if lines[0].startswith("#") else ""
+        body = lines[1:] if header_line else lines
+        prefix_tokens = estimate_tokens(header_line)
+        budget = max(1, self.max_tokens - prefix_tokens)
+
+        piece: List[Tuple[str, int]] = []
+        piece_tokens = 0
+        for block in self._blocks(body, budget):
+            tokens = estimate_tokens(block)
+            if piece and piece_tokens + tokens > budget:
+                yield self._piece(header, header_line, piece, source)
+                piece = self._overlap(piece, budget - tokens)
+                piece_tokens = sum(t for _, t in piece)
+            piece.append((block, tokens))
+            piece_tokens += tokens
+
+        if piece:
+            yield self._piece(header, header_line, piece, source)
+
+    def _blocks(self, lines: List[str], budget: int) -> Iterator[str]:
+        """Paragraphs and whole code fences; anything over budget is cut at lines, then characters"""
+        for block in self._paragraphs(lines):
+            if estimate_tokens(block) <= budget:
+                yield block
+                continue
+            current: List[str] = []
+            current_tokens = 0
+            for line in block.split("\n"):
+                for part in self._cut_line(line, budget):
+                    tokens = estimate_tokens(part)
+                    if current and current_tokens + tokens > budget:
+                        yield "\n".join(current)
+                        current, current_tokens = [], 0
+                    current.append(part)
+                    current_tokens += tokens
+            if current:
+                yield "\n".join(current)
+
+    @staticmethod
+    def _paragraphs(lines: List[str]) -> Iterator[str]:
+        """Blank-line separated paragraphs; a code fence is one block even if it has blank lines"""
+        current: List[str] = []
+        in_fence = False
+        for line in lines:
+            if _FENCE_RE.match(line):
+                if not in_fence and current:
+                    yield "\n".join(current)
+                    current = []
+                current.append(line)
+                in_fence = not in_fence
+                if not in_fence:
+                    yield "\n".join(current)
+                    current = []
+            elif not in_fence and not line.strip():
+                if current:
+                    yield "\n".join(current)
+                    current = []
+            else:
+                current.append(line)
+        if current:
+            yield "\n".join(current)
+
+    @staticmethod
+    def _cut_line(line: str, budget: int) -> Iterator[str]:
+        """A single line longer than the budget, cut into budget-sized pieces"""
+        if estimate_tokens(line) <= budget:
+            yield line
+            return
+        matches = list(_TOKEN_RE.finditer(line))
+        for start in range(0, len(matches), budget):
+            group = matches[start:start + budget]
+            end = matches[start + budget].start() if start + budget < len(matches) else len(line)
+            yield line[group[0].start():end]
+
+    def _overlap(self, piece: List[Tuple[str, int]], room: int) -> List[Tuple[str, int]]:
+        """Trailing blocks of a finished piece to repeat at the start of the next one
+
+        When even the last block is too long, its trailing sentences are carried
+        instead (code fences are never carried in part).
+        """
+        limit = min(self.overlap_tokens, room)
+        carried: List[Tuple[str, int]] = []
+        total = 0
+        for block, tokens in reversed(piece):
+            if total + tokens > limit:
+                if not carried and not _FENCE_RE.match(block):
+                    tail = self._tail(block, limit)
+                    if tail:
+                        carried = [(tail, estimate_tokens(tail))]
+                break
+            carried.insert(0, (block, tokens))
+            total += tokens
+        return carried
+
+    @staticmethod
+    def _tail(block: str, limit: int) -> str:
+        """Last sentences (or lines) of a block within limit tokens; its last limit tokens if one sentence is longer"""
+        if limit <= 0:
+            return ""
+        tail = ""
+        for match in reversed(list(_SENTENCE_BREAK_RE.finditer(block))):
+            candidate = block[match.end():].strip()
+            if estimate_tokens(candidate) > limit:
+                break
+            tail = candidate
+        if not tail:
+            matches = list(_TOKEN_RE.finditer(block))
+            tail = block[matches[-limit].start():].strip() if len(matches) > limit else block.strip()
+        return tail
+
+    @classmethod
+    def _piece(cls, header: str, header_line: str, blocks: List[Tuple[str, int]], source: str) -> Dict[str, Any]:
+        content = "\n\n".join(block for block, _ in blocks)
+        if header_line:
+            content = f"{header_line}\n\n{content}"
+        return cls._chunk(header, content, source)
+
+    @staticmethod
+    def _chunk(header: str, content: str, source: str) -> Dict[str, Any]:
+        return {"source": source, "header": header, "content": content}
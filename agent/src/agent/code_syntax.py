@@ -0,0 +1,40 @@
+"""
+Java declaration patterns and comment/string stripping shared by the code
+chunker (corpus) and the symbol index
+"""
+import re
+from typing import Tuple
+
+_STRING_RE = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+ANNOTATION_PREFIX_RE = re.compile(r"^(?:@[\w.]+(?:\([^)]*\))?\s*)+")
+JAVA_TYPE_RE = re.compile(r"\b(class|interface|enum|record)\s+([A-Za-z_]\w*)")
+JAVA_METHOD_RE = re.compile(
+    r"^(?:(?:public|protected|private|static|final|abstract|synchronized|default|native|strictfp)\s+)*"
+    r"(?:<[^>]*>\s*)?(?:[\w.$]+(?:<.*>)?(?:\[\])*\s+)?([A-Za-z_]\w*)\s*\("
+)
+JAVA_NOT_METHODS = {"if", "for", "while", "switch", "catch", "return", "new", "else", "do", "try", "synchronized"}
+
+
+def strip_code(line: str, in_comment: bool) -> Tuple[str, bool]:
+    """The line without string literals and comments (for brace counting)"""
+    line = _STRING_RE.sub('""', line)
+    out = []
+    i = 0
+    while i < len(line):
+        if in_comment:
+            end = line.find("*/", i)
+            if end < 0:
+                return "".join(out), True
+            i, in_comment = end + 2, False
+            continue
+        block = line.find("/*", i)
+        comment = line.find("//", i)
+        if comment >= 0 and (block < 0 or comment < block):
+            out.append(line[i:comment])
+            return "".join(out), False
+        if block < 0:
+            out.append(line[i:])
+            break
+        out.append(line[i:block])
+        i, in_comment = block + 2, True
+    return "".join(out), in_comment
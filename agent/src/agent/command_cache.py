@@ -0,0 +1,274 @@
+"""
+Result cache for read-only shell commands, keyed by the state of the paths they read
+"""
+import hashlib
+import os
+import shlex
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from src.config import get_settings
+
+READ_ONLY_COMMANDS = {"ls", "cat", "grep", "find", "pwd"}
+# find actions that write, delete or run other programs
+_FIND_UNSAFE = {"-exec", "-execdir", "-ok", "-okdir", "-delete", "-fprint", "-fprint0", "-fprintf", "-fls"}
+# find tests against the current time or another file's timestamps (-newer, -newermt, ...)
+_FIND_TIME_DEPENDENT = {"-mmin", "-mtime", "-amin", "-atime", "-cmin", "-ctime", "-anewer", "-cnewer"}
+# grep short options taking a value as the next word
+_GREP_VALUE_OPTIONS = set("efmABCdD")
+_GLOB_CHARS = set("*?[")
+
+
+def read_only_argv(command: str) -> Optional[Tuple[str, ...]]:
+    """Normalized argv of a command that only reads the tree, None if it may write or needs the shell
+
+    Pipes, redirections, command lists, substitutions, variables, unquoted
+    globs and ~ make the command uncacheable: what they touch is not visible
+    in argv. So do find's time tests, whose result changes without the tree.
+    """
+    if "$" in command or "`" in command:
+        return None
+    try:
+        lexer = shlex.shlex(command, posix=False, punctuation_chars=True)
+        lexer.whitespace_split = True
+        raw = list(lexer)
+        argv = tuple(shlex.split(command))
+    except ValueError:
+        return None
+    if not argv or argv[0] not in READ_ONLY_COMMANDS or len(raw) != len(argv):
+        return None
+    for token in raw:
+        if token[0] in "\"'":
+            continue
+        if set(token) <= set("();<>|&") or _GLOB_CHARS & set(token):
+            return None
+        if token.startswith("~") or "=~" in token:
+            return None  # home directory expansion
+    if argv[0] == "find" and (
+        (_FIND_UNSAFE | _FIND_TIME_DEPENDENT) & set(argv) or any(arg.startswith("-newer") for arg in argv)
+    ):
+        return None
+    if argv[0] == "cat" and len(argv) == 1:
+        return None  # reads stdin
+    return argv
+
+
+def touched_paths(argv: Tuple[str, ...]) -> Optional[Tuple[List[str], bool]]:
+    """(paths the command reads, whether directories are read recursively), None if it reads stdin"""
+    name, args = argv[0], list(argv[1:])
+    if name == "pwd":
+        return [], False
+    if name == "find":
+        paths = []
+        for arg in args:
+            if arg.startswith(("-", "(", "!")):
+                break
+            paths.append(arg)
+        return paths or ["."], True
+
+    options = [arg for arg in args if arg.startswith("-") and arg != "-"]
+    operands = [arg for arg in args if not arg.startswith("-") or arg == "-"]
+    if name == "ls":
+        recursive = any(arg == "--recursive" or (not arg.startswith("--") and "R" in arg) for arg in options)
+        return operands or ["."], recursive
+    if name == "cat":
+        return None if "-" in operands else (operands, False)
+
+    # grep: skip option values and the pattern, keep -f pattern files
+    paths: List[str] = []
+    pattern_given = False
+    recursive = False
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--":
+            rest = args[i + 1:]
+            paths.extend(rest if pattern_given else rest[1:])
+            break
+        if arg.startswith("--"):
+            option, _, value = arg.partition("=")
+            recursive |= option in ("--recursive", "--dereference-recursive")
+            if option in ("--regexp", "--file"):
+                pattern_given = True
+                if not value and i + 1 < len(args):
+                    i += 1
+                    value = args[i]
+                if option == "--file":
+                    paths.append(value)
+        elif arg.startswith("-") and arg != "-":
+            flags = arg[1:]
+            for position, flag in enumerate(flags):
+                recursive |= flag in "rR"
+                if flag in _GREP_VALUE_OPTIONS:
+                    value = flags[position + 1:]
+                    if not value and i + 1 < len(args):
+                        i += 1
+                        value = args[i]
+                    pattern_given |= flag in "ef"
+                    if flag == "f":
+                        paths.append(value)
+                    break
+        elif not pattern_given:
+            pattern_given = True
+        else:
+            paths.append(arg)
+        i += 1
+    if "-" in paths:
+        return None
+    if not paths:
+        return (["."], True) if recursive else None
+    return paths, recursive
+
+
+class CommandCache:
+    """LRU of read-only command results, valid while the paths they read are unchanged
+
+    The key is the normalized argv and working directory; each entry keeps a
+    fingerprint of what the command reads (mtime/ctime/size of the named files,
+    directory listings, and the whole subtree for find, grep -r and ls -R).
+    A hit replays the stored output without forking a shell. Trees larger
+    than MAX_FINGERPRINT_ENTRIES are not cached (fingerprinting them would cost
+    about as much as running the command). FileManagementTool writes and any
+    command that is not read-only invalidate entries.
+    """
+
+    MAX_FINGERPRINT_ENTRIES = 20000
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        settings = get_settings()
+        self.max_entries = max_entries or settings.command_cache_max_entries
+        self.max_bytes = max_bytes or int(settings.command_cache_max_mb * 1024 * 1024)
+        self._entries: "OrderedDict[Tuple[str, Tuple[str, ...]], Tuple[str, List[Path], Dict[str, Any], int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+        self.invalidations = 0
+
+    def key(self, command: str, cwd: str | Path) -> Optional[Tuple[str, Tuple[str, ...]]]:
+        argv = read_only_argv(command)
+        if argv is None:
+            with self._lock:
+                self.uncacheable += 1
+            return None
+        return str(Path(cwd).resolve()), argv
+
+    def fingerprint(self, key: Tuple[str, Tuple[str, ...]]) -> Optional[Tuple[str, List[Path]]]:
+        """(digest of the read paths' state, the resolved paths), None if it cannot be taken cheaply"""
+        cwd, argv = key
+        touched = touched_paths(argv)
+        if touched is None:
+            return None
+        paths, recursive = touched
+        roots = [Path(cwd, path).resolve() for path in paths]
+        digest = hashlib.blake2b(digest_size=16)
+        budget = [self.MAX_FINGERPRINT_ENTRIES]
+        for root in roots:
+            digest.update(os.fsencode(str(root)) + b"\0")
+            if not self._stat_into(digest, root, recursive, budget, top=True):
+                return None
+        return digest.hexdigest(), roots
+
+    def _stat_into(self, digest, path: Path, recursive: bool, budget: List[int], top: bool = False) -> bool:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            digest.update(b"missing\0")
+            return True
+        digest.update(f"{stat.st_mtime_ns}:{stat.st_ctime_ns}:{stat.st_size}:{stat.st_ino}\0".encode())
+        if not os.path.isdir(path) or not (recursive or top):
+            return True
+        try:
+            entries = sorted(os.scandir(path), key=lambda entry: entry.name)
+        except OSError:
+            return True
+        budget[0] -= len(entries)
+        if budget[0] < 0:
+            return False
+        for entry in entries:
+            digest.update(os.fsencode(entry.name) + b"\0")
+            if recursive and entry.is_dir(follow_symlinks=False):
+                if not self._stat_into(digest, Path(entry.path), recursive, budget):
+                    return False
+                continue
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            digest.update(f"{stat.st_mtime_ns}:{stat.st_ctime_ns}:{stat.st_size}\0".encode())
+        return True
+
+    def get(self, key, fingerprint: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != fingerprint:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, fingerprint: str, roots: List[Path], result: Dict[str, Any]):
+        size = len(result["stdout"]) + len(result["stderr"])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[3]
+            self._entries[key] = (fingerprint, roots, result, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[3]
+
+    def invalidate(self, path: Optional[str | Path] = None):
+        """Drop entries that read path (or its directory); everything when path is None"""
+        with self._lock:
+            if path is None:
+                dropped = list(self._entries)
+            else:
+                path = Path(path).resolve()
+                dropped = [
+                    key for key, (_, roots, _, _) in self._entries.items()
+                    if any(root == path or root in path.parents for root in roots)
+                ]
+            for key in dropped:
+                self._bytes -= self._entries.pop(key)[3]
+            self.invalidations += len(dropped)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "forks_avoided": self.hits,
+                "uncacheable": self.uncacheable,
+                "invalidations": self.invalidations,
+            }
+
+
+_cache: Optional[CommandCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_command_cache() -> Optional[CommandCache]:
+    """Shared cache, None unless COMMAND_CACHE_ENABLED"""
+    global _cache
+    if not get_settings().command_cache_enabled:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = CommandCache()
+        return _cache
+
+
+def invalidate_command_cache(path: Optional[str | Path] = None):
+    with _cache_lock:
+        cache = _cache
+    if cache is not None:
+        cache.invalidate(path)
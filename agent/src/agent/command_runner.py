@@ -0,0 +1,290 @@
+"""
+Asynchronous, streaming shell command execution for CommandExecutor
+"""
+import asyncio
+import codecs
+import os
+import signal
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set, Tuple
+from src.config import get_settings
+
+_READ_BYTES = 1 << 16
+
+
+class _Slots:
+    """Counting semaphore usable from any event loop (commands come from the API loop and worker threads)"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.in_use = 0
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_use < self.size and not self._waiters:
+                self.in_use += 1
+                return
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._waiters.remove((loop, waiter))
+                    granted = False
+                except ValueError:
+                    granted = True  # released to us while being cancelled
+            if granted:
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            # Hand the slot over directly so a newcomer cannot overtake the queue
+            while self._waiters:
+                loop, waiter = self._waiters.popleft()
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(_grant, waiter)
+                    return
+            self.in_use -= 1
+
+
+def _grant(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class CommandRunner:
+    """Runs shell commands as asyncio subprocesses through a bounded pool
+
+    Output is streamed in chunks as it arrives; each stream keeps at most
+    max_output_bytes and the rest is drained and counted (so a chatty build
+    never blocks on a full pipe or grows memory). Every command runs in its
+    own session, so a timeout, a cancelled caller or shutdown kills the whole
+    process group (npm and its node children, javac forks, ...), SIGTERM first
+    and SIGKILL after KILL_GRACE_SECONDS. At most max_concurrency commands run
+    at once; the others wait in FIFO order and their wait is recorded.
+    """
+
+    KILL_GRACE_SECONDS = 2.0
+
+    def __init__(self, max_concurrency: Optional[int] = None, timeout: Optional[float] = None,
+                 max_output_bytes: Optional[int] = None):
+        settings = get_settings()
+        self.max_concurrency = max(1, max_concurrency or settings.command_max_concurrency)
+        self.timeout = timeout or settings.command_timeout
+        self.max_output_bytes = max_output_bytes or int(settings.command_max_output_kb * 1024)
+        self._slots = _Slots(self.max_concurrency)
+        self._running: Set[asyncio.subprocess.Process] = set()
+        self._lock = threading.Lock()
+        self.started = 0
+        self.completed = 0
+        self.timed_out = 0
+        self.killed = 0
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+
+    async def stream(self, command: str, cwd: str | Path,
+                     timeout: Optional[float] = None) -> AsyncIterator[Tuple[str, str]]:
+        """(kind, text) events: "stdout"/"stderr" chunks, then one "exit" (return code) or "timeout"
+
+        Closing or cancelling the iteration kills the command.
+        """
+        timeout = timeout or self.timeout
+        queued_at = time.monotonic()
+        await self._slots.acquire()
+        try:
+            waited = time.monotonic() - queued_at
+            with self._lock:
+                self.started += 1
+                self.total_queue_wait += waited
+                self.max_queue_wait = max(self.max_queue_wait, waited)
+            process = await asyncio.create_subprocess_shell(
+                command,
+                cwd=str(cwd),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=os.name == "posix",
+            )
+            with self._lock:
+                self._running.add(process)
+            try:
+                async for event in self._events(process, timeout):
+                    yield event
+            finally:
+                with self._lock:
+                    self._running.discard(process)
+                if process.returncode is None:
+                    # Timed out, or the caller stopped listening
+                    with self._lock:
+                        self.killed += 1
+                    await self._kill(process)
+        finally:
+            self._slots.release()
+
+    async def run(self, command: str, cwd: str | Path, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Collected output of a command: stdout, stderr, returncode (None on timeout), timed_out"""
+        output = {"stdout": [], "stderr": []}
+        returncode = None
+        timed_out = False
+        async for kind, text in self.stream(command, cwd, timeout):
+            if kind == "exit":
+                returncode = int(text)
+            elif kind == "timeout":
+                timed_out = True
+            else:
+                output[kind].append(text)
+        return {
+            "stdout": "".join(output["stdout"]),
+            "stderr": "".join(output["stderr"]),
+            "returncode": returncode,
+            "timed_out": timed_out,
+        }
+
+    async def _events(self, process: asyncio.subprocess.Process, timeout: float) -> AsyncIterator[Tuple[str, str]]:
+        queue: asyncio.Queue = asyncio.Queue()
+        readers = [
+            asyncio.create_task(self._pump("stdout", process.stdout, queue)),
+            asyncio.create_task(self._pump("stderr", process.stderr, queue)),
+        ]
+        deadline = time.monotonic() + timeout
+        open_streams = len(readers)
+        try:
+            while open_streams:
+                remaining = deadline - time.monotonic()
+                try:
+                    kind, text = await asyncio.wait_for(queue.get(), max(0.0, remaining))
+                except asyncio.TimeoutError:
+                    with self._lock:
+                        self.timed_out += 1
+                    yield "timeout", f"Command timed out after {timeout:g}s"
+                    return
+                if text is None:
+                    open_streams -= 1
+                else:
+                    yield kind, text
+            try:
+                returncode = await asyncio.wait_for(process.wait(), max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                # Output closed but the process lives on (daemonized child holding no pipes)
+                with self._lock:
+                    self.timed_out += 1
+                yield "timeout", f"Command timed out after {timeout:g}s"
+                return
+            with self._lock:
+                self.completed += 1
+            yield "exit", str(returncode)
+        finally:
+            for reader in readers:
+                reader.cancel()
+
+    async def _pump(self, kind: str, reader: asyncio.StreamReader, queue: asyncio.Queue):
+        """Forward a pipe in decoded chunks up to the byte cap, then drain and count the rest"""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        kept = 0
+        dropped = 0
+        while True:
+            chunk = await reader.read(_READ_BYTES)
+            if not chunk:
+                break
+            room = self.max_output_bytes - kept
+            if room <= 0:
+                dropped += len(chunk)
+                continue
+            if len(chunk) > room:
+                dropped += len(chunk) - room
+                chunk = chunk[:room]
+            kept += len(chunk)
+            text = decoder.decode(chunk)
+            if text:
+                await queue.put((kind, text))
+        tail = decoder.decode(b"", final=True)
+        if dropped:
+            tail += f"\n… [{dropped} bytes truncated]\n"
+        if tail:
+            await queue.put((kind, tail))
+        await queue.put((kind, None))
+
+    async def _kill(self, process: asyncio.subprocess.Process):
+        self._signal(process, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(asyncio.shield(process.wait()), self.KILL_GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            self._signal(process, signal.SIGKILL)
+            await process.wait()
+        else:
+            # The shell may exit on SIGTERM while children that ignore it keep running
+            self._signal(process, signal.SIGKILL)
+        # Read the pipes to EOF so the transport closes with the process
+        for reader in (process.stdout, process.stderr):
+            try:
+                await asyncio.wait_for(self._discard(reader), self.KILL_GRACE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    @staticmethod
+    async def _discard(reader: asyncio.StreamReader):
+        while await reader.read(_READ_BYTES):
+            pass
+
+    @staticmethod
+    def _signal(process: asyncio.subprocess.Process, sig: int):
+        try:
+            if os.name == "posix":
+                os.killpg(process.pid, sig)
+            elif process.returncode is None:
+                process.kill()
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def terminate_all(self):
+        """Kill the process group of every running command (server shutdown)"""
+        with self._lock:
+            processes = list(self._running)
+        for process in processes:
+            self._signal(process, signal.SIGKILL)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "running": self._slots.in_use,
+                "queued": self._slots.queued,
+                "started": self.started,
+                "completed": self.completed,
+                "timed_out": self.timed_out,
+                "killed": self.killed,
+                "avg_queue_wait_ms": round(self.total_queue_wait / self.started * 1000, 1) if self.started else 0.0,
+                "max_queue_wait_ms": round(self.max_queue_wait * 1000, 1),
+            }
+
+
+_runner: Optional[CommandRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_command_runner() -> CommandRunner:
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = CommandRunner()
+        return _runner
+
+
+def terminate_commands():
+    with _runner_lock:
+        runner = _runner
+    if runner is not None:
+        runner.terminate_all()
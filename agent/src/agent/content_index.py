@@ -0,0 +1,413 @@
+"""
+Trigram full-text index over project files (Zoekt / Google Code Search style)
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import numpy as np
+from src.agent.file_catalog import FileCatalog, get_file_catalog
+from src.config import get_settings
+
+CONTENT_INDEX_FORMAT_VERSION = 1
+_BINARY_SNIFF_BYTES = 8192
+_SNIPPET_CHARS = 200
+
+
+def required_literals(pattern: str) -> List[str]:
+    """Literal substrings every match of a regex must contain (conservative)
+
+    Anything that is not plainly required (alternations, groups, classes,
+    optional or repeated characters) ends the current literal, so the result
+    may miss literals but never contains one a match can lack.
+    """
+    if re.search(r"(?<!\\)\|", pattern):
+        return []
+    literals: List[str] = []
+    current: List[str] = []
+
+    def flush():
+        if current:
+            literals.append("".join(current))
+            current.clear()
+
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            escaped = pattern[i + 1:i + 2]
+            if escaped and not escaped.isalnum():
+                current.append(escaped)
+            else:
+                flush()
+            i += 2
+        elif c in "*?{":
+            # The previous character is optional
+            if current:
+                current.pop()
+            flush()
+            if c == "{":
+                end = pattern.find("}", i)
+                i = end + 1 if end > 0 else i + 1
+            else:
+                i += 1
+        elif c == "(":
+            flush()
+            depth = 0
+            while i < len(pattern):
+                if pattern[i] == "\\":
+                    i += 2
+                    continue
+                depth += {"(": 1, ")": -1}.get(pattern[i], 0)
+                i += 1
+                if depth == 0:
+                    break
+            # A quantifier after the group applies to the group, which was skipped already
+            if i < len(pattern) and pattern[i] in "*?+{":
+                i += 1
+        elif c == "[":
+            flush()
+            i += 1
+            if i < len(pattern) and pattern[i] in "^]":
+                i += 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+        elif c in ".^$+)":
+            flush()
+            i += 1
+        else:
+            current.append(c)
+            i += 1
+    flush()
+    return literals
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """Trigram posting lists of the text files in a FileCatalog
+
+    Each lowercase trigram maps to an array of document ids. A query is reduced
+    to the trigrams of its required literals, the posting lists are intersected
+    and only the surviving files are read and verified with the regex, so a
+    search touches a handful of files instead of the whole tree.
+
+    Memory is bounded by FILE_SEARCH_CONTENT_BUDGET_MB of indexed text; files
+    past the budget are kept as scan-only candidates (always verified, never
+    indexed) so results stay complete. Files over FILE_SEARCH_CONTENT_MAX_FILE_KB
+    and binary files are skipped. Document content is never kept in memory.
+    """
+
+    def __init__(self, catalog: FileCatalog, max_file_bytes: Optional[int] = None,
+                 budget_bytes: Optional[int] = None):
+        settings = get_settings()
+        self.catalog = catalog
+        self.root = catalog.root
+        self.max_file_bytes = (
+            max_file_bytes if max_file_bytes is not None else int(settings.file_search_content_max_file_kb * 1024)
+        )
+        self.budget_bytes = (
+            budget_bytes if budget_bytes is not None else int(settings.file_search_content_budget_mb * 1024 * 1024)
+        )
+        self._lock = threading.RLock()
+        self._postings: Dict[str, array] = {}
+        self._docs: List[Optional[str]] = []  # document id -> relative path (None = deleted)
+        self._doc_ids: Dict[str, int] = {}
+        self._states: Dict[str, Tuple[int, int]] = {}  # relative path -> (mtime_ns, size)
+        self._scan_only: Set[str] = set()
+        self._deleted = 0
+        self.indexed_bytes = 0
+        self.build_seconds = 0.0
+        catalog.listeners.append(self._on_file_changed)
+
+    @property
+    def file_count(self) -> int:
+        return len(self._doc_ids) + len(self._scan_only)
+
+    def build(self):
+        """Index every text file of the catalog"""
+        started = time.perf_counter()
+        with self._lock:
+            self._reset()
+            for relative in self.catalog.paths():
+                self.update_file(relative)
+        self.build_seconds = time.perf_counter() - started
+
+    def _reset(self):
+        self._postings = {}
+        self._docs = []
+        self._doc_ids = {}
+        self._states = {}
+        self._scan_only = set()
+        self._deleted = 0
+        self.indexed_bytes = 0
+
+    def update_file(self, relative: str) -> bool:
+        """(Re)index one file; a missing, binary or oversized file is dropped. Returns True if indexed"""
+        path = self.root / relative
+        try:
+            stat = path.stat()
+            if stat.st_size > self.max_file_bytes:
+                text = None
+            else:
+                with open(path, "rb") as f:
+                    data = f.read()
+                text = None if b"\0" in data[:_BINARY_SNIFF_BYTES] else data.decode("utf-8", errors="replace")
+        except OSError:
+            text = None
+
+        with self._lock:
+            self.remove_file(relative)
+            if text is None:
+                return False
+            self._states[relative] = (stat.st_mtime_ns, stat.st_size)
+            if self.indexed_bytes + stat.st_size > self.budget_bytes:
+                self._scan_only.add(relative)
+                return False
+            self._add_document(relative, _trigrams(text.lower()))
+            self.indexed_bytes += stat.st_size
+            return True
+
+    def _on_file_changed(self, relative: str, exists: bool):
+        if exists:
+            self.update_file(relative)
+        else:
+            self.remove_file(relative)
+
+    def _add_document(self, relative: str, trigrams: Iterable[str]):
+        doc_id = len(self._docs)
+        self._docs.append(relative)
+        self._doc_ids[relative] = doc_id
+        postings = self._postings
+        for trigram in trigrams:
+            posting = postings.get(trigram)
+            if posting is None:
+                posting = postings[trigram] = array("I")
+            posting.append(doc_id)
+
+    def remove_file(self, relative: str):
+        """Drop a file; its postings are tombstoned and compacted in bulk"""
+        with self._lock:
+            state = self._states.pop(relative, None)
+            self._scan_only.discard(relative)
+            doc_id = self._doc_ids.pop(relative, None)
+            if doc_id is None:
+                return
+            self._docs[doc_id] = None
+            self._deleted += 1
+            if state is not None:
+                self.indexed_bytes -= state[1]
+            if self._deleted > max(1024, len(self._doc_ids) // 4):
+                self._compact()
+
+    def _compact(self):
+        """Rewrite posting lists without deleted documents"""
+        docs = self._docs
+        postings = {}
+        for trigram, posting in self._postings.items():
+            live = array("I", (doc_id for doc_id in posting if docs[doc_id] is not None))
+            if live:
+                postings[trigram] = live
+        self._postings = postings
+        self._deleted = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "indexed_files": len(self._doc_ids),
+            "scan_only_files": len(self._scan_only),
+            "trigrams": len(self._postings),
+            "indexed_mb": round(self.indexed_bytes / 2**20, 2),
+        }
+
+    def is_stale(self, relative: str) -> bool:
+        """Whether the file changed on disk since it was indexed"""
+        try:
+            stat = (self.root / relative).stat()
+        except OSError:
+            return relative in self._states
+        return self._states.get(relative) != (stat.st_mtime_ns, stat.st_size)
+
+    def candidates(self, literals: Sequence[str]) -> List[str]:
+        """Files that may contain every literal (posting-list intersection plus scan-only files)"""
+        trigrams = set()
+        for literal in literals:
+            trigrams |= _trigrams(literal.lower())
+        with self._lock:
+            if trigrams:
+                postings = [self._postings.get(trigram) for trigram in trigrams]
+                if any(posting is None for posting in postings):
+                    doc_ids: Set[int] = set()
+                else:
+                    postings.sort(key=len)
+                    doc_ids = set(postings[0])
+                    for posting in postings[1:]:
+                        if not doc_ids:
+                            break
+                        doc_ids.intersection_update(posting)
+                paths = [self._docs[doc_id] for doc_id in doc_ids]
+            else:
+                paths = list(self._doc_ids)
+            paths = [path for path in paths if path is not None]
+            paths.extend(self._scan_only)
+        return sorted(paths)
+
+    def search(self, query: str, regex: bool = False, case_sensitive: bool = False,
+               extensions: Optional[Sequence[str]] = None, limit: int = 20,
+               max_per_file: int = 5) -> List[Dict[str, Any]]:
+        """Matching lines as {path, line, snippet}; raises re.error for an invalid regex"""
+        pattern = query if regex else re.escape(query)
+        compiled = re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
+        literals = required_literals(query) if regex else [query]
+        suffixes = tuple(ext.lower() for ext in extensions) if extensions else None
+
+        results: List[Dict[str, Any]] = []
+        for relative in self.candidates(literals):
+            if suffixes is not None and not relative.lower().endswith(suffixes):
+                continue
+            hits = 0
+            try:
+                with open(self.root / relative, "r", encoding="utf-8", errors="replace") as f:
+                    for line_number, line in enumerate(f, 1):
+                        if compiled.search(line):
+                            results.append({
+                                "path": relative,
+                                "line": line_number,
+                                "snippet": line.strip()[:_SNIPPET_CHARS],
+                            })
+                            hits += 1
+                            if hits >= max_per_file or len(results) >= limit:
+                                break
+            except OSError:
+                continue
+            if len(results) >= limit:
+                break
+        return results
+
+    def save(self, path: str | Path):
+        """Write the index to a directory (documents renumbered without deleted ones)
+
+        Layout: manifest.json (paths and their mtime/size, trigram keys),
+        postings.npy (uint32 document ids of every trigram, concatenated) and
+        offsets.npy (start of each trigram's postings).
+        """
+        path = Path(path)
+        with self._lock:
+            renumber = {}
+            documents = []
+            for doc_id, relative in enumerate(self._docs):
+                if relative is not None:
+                    renumber[doc_id] = len(documents)
+                    documents.append([relative, *self._states[relative]])
+            trigrams = []
+            offsets = [0]
+            flat = array("I")
+            for trigram, posting in self._postings.items():
+                live = [renumber[doc_id] for doc_id in posting if doc_id in renumber]
+                if live:
+                    trigrams.append(trigram)
+                    flat.extend(live)
+                    offsets.append(len(flat))
+            manifest = {
+                "format": CONTENT_INDEX_FORMAT_VERSION,
+                "root": str(self.root),
+                "documents": documents,
+                "scan_only": [[relative, *self._states[relative]] for relative in sorted(self._scan_only)],
+                "trigrams": trigrams,
+            }
+
+        tmp_path = path.with_name(f".tmp-{path.name}-{os.getpid()}")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        tmp_path.mkdir(parents=True)
+        np.save(tmp_path / "postings.npy", np.frombuffer(flat, dtype=np.uint32) if flat else np.zeros(0, np.uint32))
+        np.save(tmp_path / "offsets.npy", np.asarray(offsets, dtype=np.int64))
+        with open(tmp_path / "manifest.json", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str | Path) -> bool:
+        """Load a saved index and re-index only files that changed since; False if unusable"""
+        path = Path(path)
+        try:
+            with open(path / "manifest.json", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("format") != CONTENT_INDEX_FORMAT_VERSION or manifest.get("root") != str(self.root):
+                return False
+            flat = np.load(path / "postings.npy")
+            offsets = np.load(path / "offsets.npy")
+        except (OSError, ValueError, json.JSONDecodeError):
+            return False
+
+        started = time.perf_counter()
+        with self._lock:
+            self._reset()
+            for relative, mtime_ns, size in manifest["documents"]:
+                self._doc_ids[relative] = len(self._docs)
+                self._docs.append(relative)
+                self._states[relative] = (mtime_ns, size)
+                self.indexed_bytes += size
+            for relative, mtime_ns, size in manifest["scan_only"]:
+                self._scan_only.add(relative)
+                self._states[relative] = (mtime_ns, size)
+            for i, trigram in enumerate(manifest["trigrams"]):
+                self._postings[trigram] = array("I", flat[offsets[i]:offsets[i + 1]].tobytes())
+
+            # Reconcile with the current tree: drop vanished files, re-index changed or new ones
+            current = set(self.catalog.paths())
+            for relative in [relative for relative in self._states if relative not in current]:
+                self.remove_file(relative)
+            changed = [relative for relative in current if relative not in self._states or self.is_stale(relative)]
+            for relative in changed:
+                self.update_file(relative)
+        self.build_seconds = time.perf_counter() - started
+        print(f"Content index loaded from {path} ({len(changed)} changed files re-indexed)")
+        return True
+
+
+_indexes: Dict[Path, TrigramIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def content_index_dir(root: Path) -> Path:
+    """Persisted index location of a project root (under RAG_CACHE_DIR)"""
+    key = hashlib.sha256(str(root).encode("utf-8")).hexdigest()[:16]
+    return Path(get_settings().rag_cache_dir) / "content_index" / key
+
+
+def existing_content_index(root: Path) -> Optional[TrigramIndex]:
+    """Content index of a catalog root if it was already built"""
+    with _indexes_lock:
+        return _indexes.get(root)
+
+
+def get_content_index(root: str | Path) -> TrigramIndex:
+    """Shared content index of a project root, loaded or built on first use"""
+    catalog = get_file_catalog(root)
+    persist = get_settings().file_search_content_persist
+    with _indexes_lock:
+        index = _indexes.get(catalog.root)
+        if index is None:
+            index = TrigramIndex(catalog)
+            index_dir = content_index_dir(catalog.root)
+            if not (persist and index.load(index_dir)):
+                index.build()
+                print(
+                    f"Content index built: {len(index._doc_ids)} files, {len(index._postings)} trigrams, "
+                    f"{index.indexed_bytes / 1024 / 1024:.1f}MB text in {index.build_seconds * 1000:.0f}ms"
+                )
+            if persist:
+                try:
+                    index.save(index_dir)
+                except OSError as e:
+                    print(f"Failed to save content index: {e}")
+            _indexes[catalog.root] = index
+    return index
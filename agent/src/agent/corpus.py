@@ -0,0 +1,289 @@
+"""
+Corpus sources for RAG: which files are indexed, how each file type is chunked,
+and row masks for filtered search
+"""
+import ast
+import re
+import threading
+from collections import OrderedDict
+from pathlib import PurePosixPath
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import numpy as np
+from src.agent.chunking import MarkdownChunker, estimate_tokens
+from src.agent.code_syntax import ANNOTATION_PREFIX_RE, JAVA_METHOD_RE, JAVA_NOT_METHODS, JAVA_TYPE_RE, strip_code
+
+# File suffix -> language (selects the chunker)
+LANGUAGES = {
+    ".md": "markdown",
+    ".java": "java",
+    ".py": "python",
+    ".jsx": "jsx",
+    ".tsx": "jsx",
+    ".js": "jsx",
+}
+
+_JSX_COMPONENT_RE = re.compile(
+    r"^(?:export\s+(?:default\s+)?)?(?:"
+    r"(?:async\s+)?function\s+([A-Z]\w*)"
+    r"|(?:const|let)\s+([A-Z]\w*)\s*(?::[^=]+)?=\s*(?:React\.)?(?:memo\(|forwardRef\(|async\s|\(|function\b|[a-z_]\w*\s*=>)"
+    r"|class\s+([A-Z]\w*)\s+extends\s+(?:React\.)?(?:Pure)?Component\b"
+    r")"
+)
+_JSX_TOP_LEVEL_RE = re.compile(r"^(?:export|import|function|async|const|let|var|class|type|interface)\b")
+
+
+class CorpusSource:
+    """A named group of files under the project root, e.g. design -> docs/design/*.md
+
+    The name is stored on every chunk as "source_type" and can be used as a
+    search filter.
+    """
+
+    def __init__(self, name: str, patterns: List[str]):
+        self.name = name
+        self.patterns = patterns
+
+    def __repr__(self) -> str:
+        return f"CorpusSource({self.name}={'|'.join(self.patterns)})"
+
+
+def parse_sources(spec: str) -> List[CorpusSource]:
+    """Parse RAG_SOURCES: comma separated name=glob entries, several globs joined with '|'"""
+    sources = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, sep, patterns = entry.partition("=")
+        if not sep or not name.strip() or not patterns.strip():
+            raise ValueError(f"Invalid RAG_SOURCES entry (expected name=glob): {entry!r}")
+        sources.append(CorpusSource(name.strip(), [p.strip() for p in patterns.split("|") if p.strip()]))
+    return sources
+
+
+def language_of(path: str) -> Optional[str]:
+    """Language of a corpus file by suffix (None = not indexable)"""
+    return LANGUAGES.get(PurePosixPath(path).suffix.lower())
+
+
+class CodeChunker:
+    """Splits source files along code structure
+
+    - Java: one chunk per method (with its annotations and javadoc), plus one for
+      the class declaration, fields and imports
+    - Python: one chunk per function and method, plus one for module/class level code
+    - JSX: one chunk per top-level component, plus one for imports and helpers
+
+    Small neighbouring units are merged and oversized ones split with the budget
+    of the markdown chunker. Chunks carry start_line/end_line (1-based).
+    """
+
+    def __init__(self, chunker: MarkdownChunker):
+        self.chunker = chunker
+
+    def chunk(self, lines: Iterable[str], source: str, language: str) -> Iterator[Dict[str, Any]]:
+        lines = [line.rstrip("\r\n") for line in lines]
+        stem = PurePosixPath(source).stem
+        if language == "java":
+            units, type_name = self._java_units(lines)
+            module_header = type_name or stem
+        elif language == "python":
+            units, module_header = self._python_units(lines), stem
+        else:
+            units, module_header = self._jsx_units(lines), stem
+        units.sort(key=lambda unit: unit[1])
+
+        # Imports, declarations and fields: every non-blank line outside the units
+        covered = np.zeros(len(lines), dtype=bool)
+        for _, start, end in units:
+            covered[start:end + 1] = True
+        rest = [int(i) for i in np.flatnonzero(~covered) if lines[i].strip()]
+        if rest:
+            text = "\n".join(lines[i] for i in rest)
+            yield from self._pieces(module_header, text, source, rest[0], rest[-1], contiguous=False)
+
+        for header, start, end in self._merge_small(units, lines):
+            yield from self._pieces(header, "\n".join(lines[start:end + 1]), source, start, end)
+
+    def _pieces(
+        self, header: str, text: str, source: str, start: int, end: int, contiguous: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """Budget-sized pieces of a unit with the line range each piece covers
+
+        Pieces of non-contiguous text (module level lines) get the whole range.
+        """
+        text = text.strip("\n")
+        cursor = 0
+        for piece in self.chunker.split(header, text, source):
+            blocks = piece["content"].split("\n\n")
+            first = text.find(blocks[0], cursor)
+            last = text.find(blocks[-1], max(first, 0))
+            if not contiguous or first < 0 or last < 0:
+                piece.update(start_line=start + 1, end_line=end + 1)
+            else:
+                first_line = start + text.count("\n", 0, first)
+                last_line = start + text.count("\n", 0, last) + blocks[-1].count("\n")
+                piece.update(start_line=first_line + 1, end_line=min(last_line, end) + 1)
+                cursor = first + 1
+            yield piece
+
+    def _merge_small(self, units: List[Tuple[str, int, int]], lines: List[str]) -> List[Tuple[str, int, int]]:
+        """Adjacent units merged while one of them is below min_tokens and the result fits max_tokens"""
+        merged: List[Tuple[str, int, int]] = []
+        merged_tokens = 0
+        for header, start, end in units:
+            tokens = estimate_tokens("\n".join(lines[start:end + 1]))
+            if merged and start > merged[-1][2]:
+                last_header, last_start, _ = merged[-1]
+                small = min(merged_tokens, tokens) < self.chunker.min_tokens
+                if small and merged_tokens + tokens <= self.chunker.max_tokens:
+                    merged[-1] = (f"{last_header}, {header.rsplit('.', 1)[-1]}", last_start, end)
+                    merged_tokens += tokens
+                    continue
+            merged.append((header, start, end))
+            merged_tokens = tokens
+        return merged
+
+    def _java_units(self, lines: List[str]) -> Tuple[List[Tuple[str, int, int]], Optional[str]]:
+        """(Class.method, first line, last line) per method; brace depth tracks the enclosing types"""
+        units = []
+        types: List[Tuple[str, int]] = []  # (type name, depth of its body)
+        first_type = None
+        depth = 0
+        in_comment = False
+        prefix_start: Optional[int] = None  # first javadoc/annotation line before a declaration
+        method: Optional[Tuple[str, int, int]] = None  # (header, start, depth)
+        opened = False
+
+        for i, line in enumerate(lines):
+            code, in_comment_after = strip_code(line, in_comment)
+            stripped = line.strip()
+            if method is None:
+                declaration = ANNOTATION_PREFIX_RE.sub("", code.strip())
+                type_match = JAVA_TYPE_RE.search(declaration) if declaration else None
+                method_match = JAVA_METHOD_RE.match(declaration) if declaration else None
+                if not stripped:
+                    prefix_start = None
+                elif in_comment or (stripped.startswith(("/*", "*", "//", "@")) and not declaration):
+                    if prefix_start is None:
+                        prefix_start = i
+                elif type_match and (not method_match or declaration.find("(") > type_match.start()):
+                    types.append((type_match.group(2), depth + 1))
+                    first_type = first_type or type_match.group(2)
+                    prefix_start = None
+                elif (
+                    types and depth == types[-1][1] and method_match
+                    and method_match.group(1) not in JAVA_NOT_METHODS
+                ):
+                    start = prefix_start if prefix_start is not None else i
+                    method = (f"{types[-1][0]}.{method_match.group(1)}", start, depth)
+                    opened = False
+                else:
+                    prefix_start = None
+
+            depth += code.count("{") - code.count("}")
+            in_comment = in_comment_after
+            if method is not None:
+                header, start, method_depth = method
+                opened = opened or depth > method_depth
+                if (opened and depth <= method_depth) or (not opened and code.rstrip().endswith(";")):
+                    units.append((header, start, i))
+                    method = None
+                    prefix_start = None
+            while types and depth < types[-1][1]:
+                types.pop()
+
+        if method is not None:
+            units.append((method[0], method[1], len(lines) - 1))
+        return units, first_type
+
+    def _python_units(self, lines: List[str]) -> List[Tuple[str, int, int]]:
+        """(name or Class.method, first line, last line) per function, decorators included"""
+        try:
+            tree = ast.parse("\n".join(lines))
+        except SyntaxError:
+            return []
+
+        units = []
+
+        def visit(body, prefix: str):
+            for node in body:
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    start = min([node.lineno] + [d.lineno for d in node.decorator_list]) - 1
+                    units.append((f"{prefix}{node.name}", start, node.end_lineno - 1))
+                elif isinstance(node, ast.ClassDef):
+                    visit(node.body, f"{prefix}{node.name}.")
+
+        visit(tree.body, "")
+        return units
+
+    def _jsx_units(self, lines: List[str]) -> List[Tuple[str, int, int]]:
+        """(component, first line, last line) per top-level component
+
+        Top-level declarations start at column 0 in formatted code, so a component
+        runs until the next column-0 declaration (no brace counting through JSX text).
+        """
+        units = []
+        current: Optional[Tuple[str, int]] = None
+        last_code = 0
+        for i, line in enumerate(lines):
+            if line[:1].strip() and _JSX_TOP_LEVEL_RE.match(line):
+                if current is not None:
+                    units.append((current[0], current[1], last_code))
+                    current = None
+                match = _JSX_COMPONENT_RE.match(line)
+                if match:
+                    current = (next(name for name in match.groups() if name), i)
+            if line.strip():
+                last_code = i
+        if current is not None:
+            units.append((current[0], current[1], last_code))
+        return units
+
+
+class CorpusFilter:
+    """Boolean row masks for search filters over one store's documents
+
+    The source_type/source columns are decoded once (on the first filtered
+    search) and each distinct filter's mask is cached, so a filtered search is
+    the normal vectorized scoring pass over the masked rows.
+    """
+
+    MAX_CACHED_MASKS = 64
+
+    def __init__(self, documents: Sequence[Dict[str, Any]]):
+        self._documents = documents
+        self._types: Optional[np.ndarray] = None
+        self._paths: Optional[np.ndarray] = None
+        self._masks: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mask(self, source_type=None, path_prefix: Optional[str] = None) -> Optional[np.ndarray]:
+        """Rows matching every given filter (None when there is nothing to filter)
+
+        source_type is a source name or a list of names; path_prefix matches the
+        start of the chunk's source path (relative to the project root).
+        """
+        if not source_type and not path_prefix:
+            return None
+        types = (source_type,) if isinstance(source_type, str) else tuple(source_type or ())
+        key = (tuple(sorted(types)), path_prefix or "")
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                return mask
+
+            if self._types is None:
+                self._types = np.array([doc.get("source_type", "") for doc in self._documents], dtype=object)
+                self._paths = np.array([doc["source"] for doc in self._documents], dtype=str)
+            mask = np.ones(len(self._types), dtype=bool)
+            if types:
+                mask &= np.isin(self._types, types)
+            if path_prefix:
+                mask &= np.char.startswith(self._paths, path_prefix.removeprefix("./"))
+
+            self._masks[key] = mask
+            if len(self._masks) > self.MAX_CACHED_MASKS:
+                self._masks.popitem(last=False)
+            return mask
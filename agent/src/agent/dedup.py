@@ -0,0 +1,126 @@
+"""
+Near-duplicate detection for RAG chunks (MinHash + LSH banding)
+"""
+import re
+import zlib
+from typing import Any, Collection, Dict, List, Optional
+import numpy as np
+
+# Multiply-shift hashing: the high 32 bits of (a * x + b) mod 2^64 over 32-bit shingle hashes
+_SHIFT = np.uint64(32)
+
+
+class MinHashDeduplicator:
+    """Collapses near-duplicate chunks into one canonical chunk
+
+    Each chunk is reduced to a MinHash signature over character shingles. LSH
+    banding proposes candidates among the canonical chunks seen so far; a chunk
+    joins the first one whose estimated Jaccard similarity reaches `threshold`,
+    so every member is a near-duplicate of its canonical chunk itself (A~B and
+    B~C do not pull C into A's group). The canonical chunk is the first of its
+    group (input order) and gets a "locations" list with the source/header of
+    every member.
+
+    Only chunks whose "language" is in `languages` are considered (None = all):
+    similar code is usually intentional (DTOs, tests, overloads) and must not
+    disappear from the index.
+
+    Signatures are cached by chunk_id, so re-running on a mostly unchanged corpus
+    only hashes the new chunks.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, bands: int = 16, shingle_size: int = 5,
+                 languages: Optional[Collection[str]] = None):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.threshold = threshold
+        self.languages = frozenset(languages) if languages is not None else None
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(1)
+        self._a = rng.randint(1, 1 << 63, size=num_perm, dtype=np.uint64) | np.uint64(1)  # odd multipliers
+        self._b = rng.randint(0, 1 << 63, size=num_perm, dtype=np.uint64)
+        self._signatures: Dict[str, np.ndarray] = {}
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature (uint32[num_perm]) of the text's character shingles"""
+        normalized = re.sub(r"\s+", " ", text.lower()).strip()
+        size = self.shingle_size
+        if len(normalized) <= size:
+            shingles = {normalized}
+        else:
+            shingles = {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        # In place: one (shingles x num_perm) buffer; uint64 overflow wraps around by design
+        permuted = np.outer(hashes, self._a)
+        permuted += self._b
+        permuted >>= _SHIFT
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def deduplicate(self, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Canonical chunks in input order (chunks need a "chunk_id")
+
+        Chunks without duplicates are returned as is; canonical chunks of a group
+        are copies with a "locations" list.
+        """
+        signatures = [
+            self._cached_signature(chunk)
+            if self.languages is None or chunk.get("language") in self.languages else None
+            for chunk in chunks
+        ]
+        # Forget signatures of chunks that are gone
+        live = {chunk["chunk_id"] for chunk, signature in zip(chunks, signatures) if signature is not None}
+        for key in [key for key in self._signatures if key not in live]:
+            del self._signatures[key]
+
+        rows = self.num_perm // self.bands
+        # Band key -> canonical chunks in that bucket; members are never added, so
+        # a chunk is only ever compared with (and merged into) a canonical chunk
+        buckets: Dict[tuple, List[int]] = {}
+        groups: Dict[int, List[int]] = {}
+        for i, signature in enumerate(signatures):
+            if signature is None:
+                groups[i] = [i]
+                continue
+            keys = [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(self.bands)]
+            canonical = None
+            compared = set()
+            for key in keys:
+                for j in buckets.get(key, ()):
+                    if j in compared:
+                        continue
+                    compared.add(j)
+                    if np.mean(signature == signatures[j]) >= self.threshold:
+                        canonical = j
+                        break
+                if canonical is not None:
+                    break
+            if canonical is None:
+                groups[i] = [i]
+                for key in keys:
+                    buckets.setdefault(key, []).append(i)
+            else:
+                groups[canonical].append(i)
+
+        results = []
+        for i, chunk in enumerate(chunks):
+            members = groups.get(i)
+            if members is None:
+                continue  # merged into an earlier chunk
+            if len(members) == 1:
+                results.append(chunk)
+                continue
+            locations = [{"source": chunks[j]["source"], "header": chunks[j]["header"]} for j in members]
+            results.append(dict(chunk, locations=locations))
+        return results
+
+    def _cached_signature(self, chunk: Dict[str, Any]) -> np.ndarray:
+        signature = self._signatures.get(chunk["chunk_id"])
+        if signature is None:
+            signature = self._signatures[chunk["chunk_id"]] = self.signature(chunk["content"])
+        return signature
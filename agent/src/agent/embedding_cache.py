@@ -0,0 +1,203 @@
+"""
+Embedding cache for RAG indexing
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+
+def content_hash(text: str) -> str:
+    """sha256 hex digest of chunk content"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Content-addressed on-disk cache of chunk embeddings
+
+    Entries are namespaced by (embedding provider, model name) and keyed by the
+    sha256 of the chunk content, so unchanged chunks are never re-embedded.
+    The whole namespace lives in a single .npz file that is replaced atomically.
+    """
+
+    def __init__(self, cache_dir: str | Path, provider: str, model: str, max_entries: int = 50000):
+        namespace = re.sub(r"[^A-Za-z0-9._-]", "_", f"{provider}-{model}")
+        self.path = Path(cache_dir) / "embeddings" / f"{namespace}.npz"
+        self.provider = provider
+        self.model = model
+        self.max_entries = max_entries
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._last_used: Dict[str, float] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._vectors
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Return the cached embedding for a content hash, or None"""
+        vector = self._vectors.get(key)
+        if vector is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._last_used[key] = time.time()
+        return vector.tolist()
+
+    def get_many(self, keys: Iterable[str]) -> List[Optional[List[float]]]:
+        """Look up several content hashes at once (None for misses)"""
+        return [self.get(key) for key in keys]
+
+    def put(self, key: str, embedding: List[float]) -> None:
+        """Store an embedding under a content hash"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        if self._vectors:
+            dim = next(iter(self._vectors.values())).shape[0]
+            if vector.shape[0] != dim:
+                # Same provider/model name but a different dimension: old entries are unusable
+                print(f"Embedding dimension changed ({dim} -> {vector.shape[0]}), clearing cache")
+                self._vectors.clear()
+                self._last_used.clear()
+        self._vectors[key] = vector
+        self._last_used[key] = time.time()
+        self._dirty = True
+
+    def prune(self, referenced: Iterable[str]) -> int:
+        """Evict entries no longer referenced by any chunk, then enforce max_entries"""
+        keep = set(referenced)
+        stale = [key for key in self._vectors if key not in keep]
+        for key in stale:
+            del self._vectors[key]
+            del self._last_used[key]
+
+        overflow = len(self._vectors) - self.max_entries
+        if overflow > 0:
+            # Least recently used entries go first
+            oldest = sorted(self._last_used, key=self._last_used.get)[:overflow]
+            for key in oldest:
+                del self._vectors[key]
+                del self._last_used[key]
+            stale.extend(oldest)
+
+        if stale:
+            self._dirty = True
+        return len(stale)
+
+    def save(self) -> None:
+        """Persist the cache if it changed (atomic replace)"""
+        if not self._dirty:
+            return
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        keys = list(self._vectors)
+        if keys:
+            vectors = np.stack([self._vectors[key] for key in keys])
+        else:
+            vectors = np.zeros((0, 0), dtype=np.float32)
+
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                keys=np.array(keys, dtype=str),
+                vectors=vectors,
+                last_used=np.array([self._last_used[key] for key in keys], dtype=np.float64),
+            )
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def _load(self) -> None:
+        """Load the namespace file if present (a corrupt file is ignored)"""
+        if not self.path.exists():
+            return
+
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                keys = data["keys"].tolist()
+                vectors = data["vectors"]
+                last_used = data["last_used"].tolist()
+        except Exception as e:
+            print(f"Ignoring unreadable embedding cache {self.path}: {e}")
+            return
+
+        for i, key in enumerate(keys):
+            self._vectors[key] = vectors[i]
+            self._last_used[key] = last_used[i]
+
+
+def normalize_query(text: str) -> str:
+    """Canonical form of a query for cache lookups (collapsed whitespace only)
+
+    Case and Unicode form are kept: the embedding models see them, so queries
+    differing in either may embed differently.
+    """
+    return " ".join(text.split())
+
+
+class QueryEmbeddingCache:
+    """Bounded, thread-safe LRU cache with TTL for query embeddings
+
+    Keyed by (embedding provider, model, normalized query). Searches run in worker
+    threads (asyncio.to_thread), so every access is guarded by a lock. Entries
+    are stored as tuples and handed out as fresh lists, so a caller mutating its
+    embedding cannot change what later lookups get.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, Tuple[float, ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, provider: str, model: str, query: str) -> Optional[List[float]]:
+        key = (provider, model, normalize_query(query))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+
+    def put(self, provider: str, model: str, query: str, embedding: List[float]) -> None:
+        key = (provider, model, normalize_query(query))
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, tuple(embedding))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters; every hit is one embedding round-trip saved"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
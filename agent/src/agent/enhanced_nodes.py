@@ -72,7 +72,7 @@ JSON 형식으로 응답:
         state["relevance_score"] = 0.5
     
     if settings.enable_step_logging:
-    print(f"[Evaluate] relevance={state['relevance_score']:.2f}, relevant={state['is_relevant']}")
+        print(f"[Evaluate] relevance={state['relevance_score']:.2f}, relevant={state['is_relevant']}")
     
     return state
 
@@ -97,7 +97,7 @@ async def parallel_search_node(state: AgentState) -> AgentState:
     """
     RAG + 파일검색을 병렬로 실행하는 노드
     """
-    from src.agent.tools import RuleSearchTool, FileSearchTool
+    from src.agent.tools import RuleSearchTool, FileSearchTool, code_identifiers
     
     settings = get_graph_settings()
     message = state.get("message", "")
@@ -107,13 +107,21 @@ async def parallel_search_node(state: AgentState) -> AgentState:
     state["search_attempts"] = state.get("search_attempts", 0) + 1
     
     def search_rag():
-        tool = RuleSearchTool()
-        result = tool.search(search_query)
+        tool = RuleSearchTool(state.get("project"))
+        # After a Self-RAG rewrite, the original question is searched in the same batch
+        result = tool.search(search_query, expansions=[message])
         return {"source": "rag", "content": result}
     
     def search_files():
         tool = FileSearchTool()
         results = tool.search_files(search_query)
+        if not results:
+            # 파일명에 없으면 질문에 나온 식별자로 심볼(정의 위치), 그다음 본문 검색 (예: "GoalRepository는 어디서 쓰여?")
+            identifiers = code_identifiers(search_query)
+            for identifier in identifiers:
+                results.extend(tool.search_symbols(identifier, limit=5))
+            for identifier in identifiers:
+                results.extend(tool.search_content(identifier, limit=10))
         return {"source": "file", "results": results}
     
     # 병렬 실행
@@ -130,7 +138,7 @@ async def parallel_search_node(state: AgentState) -> AgentState:
     state["file_results"] = file_result.get("results", [])
     
     if settings.enable_step_logging:
-    print(f"[Search] RAG={len(state['rag_results'])}, Files={len(state['file_results'])}")
+        print(f"[Search] RAG={len(state['rag_results'])}, Files={len(state['file_results'])}")
     
     return state
 
@@ -156,7 +164,8 @@ async def synthesize_node(state: AgentState) -> AgentState:
     file_context = ""
     if file_results:
         file_context = "관련 파일:\n" + "\n".join([
-            f"- {f.get('name', '')} ({f.get('path', '')})" 
+            f"- {f.get('name', '')} ({f.get('path', '')}:{f['line']}): {f.get('snippet', '')}"
+            if "line" in f else f"- {f.get('name', '')} ({f.get('path', '')})"
             for f in file_results[:5]
         ])
     
@@ -184,7 +193,7 @@ async def synthesize_node(state: AgentState) -> AgentState:
     state["combined_context"] = rag_context + "\n" + file_context
     
     if settings.enable_step_logging:
-    print(f"[Synthesize] Generated response ({len(content)} chars)")
+        print(f"[Synthesize] Generated response ({len(content)} chars)")
     
     return state
 
@@ -300,7 +309,7 @@ async def refine_answer_node(state: AgentState) -> AgentState:
     state["final_response"] = content
     
     if settings.enable_step_logging:
-    print(f"[Refine] Attempt {state['refine_attempts']}")
+        print(f"[Refine] Attempt {state['refine_attempts']}")
     
     return state
 
@@ -0,0 +1,434 @@
+"""
+In-memory catalog of project files for FileSearchTool
+"""
+import heapq
+import os
+import re
+import threading
+import time
+from bisect import bisect_right
+from itertools import accumulate
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+from src.config import get_settings
+
+# Fuzzy match scoring (fzf v1 constants)
+_SCORE_MATCH = 16
+_SCORE_GAP_START = -3
+_SCORE_GAP_EXTENSION = -1
+_BONUS_SEGMENT = 9  # first character of a path segment / file name
+_BONUS_BOUNDARY = 8  # after _ - . or space
+_BONUS_CAMEL = 7  # camelCase hump or letter-digit transition
+_BONUS_CONSECUTIVE = 4
+_BONUS_FIRST_CHAR_MULTIPLIER = 2
+# Group 1: after a delimiter (or at the start); otherwise a camelCase / digit boundary
+_BOUNDARY_RE = re.compile(r"(?:(?<![A-Za-z0-9])([A-Za-z0-9]))|(?<=[a-z])[A-Z0-9]|(?<=[0-9])[A-Za-z]")
+
+
+class GitIgnore:
+    """Rules of the .gitignore files of one tree (root and nested directories)
+
+    Supports the usual syntax: blank lines and comments, negation (!), trailing
+    slash for directories, anchoring by a slash, *, ?, [...] and **. As in git,
+    a later matching rule wins and deeper files override their parents.
+    """
+
+    def __init__(self):
+        # directory (relative, "" = root) -> [(regex, negate, dir_only)]
+        self._rules: Dict[str, List[Tuple[re.Pattern, bool, bool]]] = {}
+
+    def load(self, directory: str, gitignore_path: Path):
+        try:
+            lines = gitignore_path.read_text(encoding="utf-8", errors="replace").splitlines()
+        except OSError:
+            return
+        rules = [rule for rule in map(self._compile, lines) if rule is not None]
+        if rules:
+            self._rules[directory] = rules
+
+    def ignored(self, path: str, is_dir: bool) -> bool:
+        """True if the relative path is ignored (its parent directories are assumed not to be)"""
+        if not self._rules:
+            return False
+        parts = path.split("/")
+        ignored = False
+        for depth in range(len(parts)):
+            rules = self._rules.get("/".join(parts[:depth]))
+            if not rules:
+                continue
+            subpath = "/".join(parts[depth:])
+            for regex, negate, dir_only in rules:
+                if dir_only and not is_dir:
+                    continue
+                if regex.match(subpath):
+                    ignored = not negate
+        return ignored
+
+    @staticmethod
+    def _compile(line: str) -> Optional[Tuple[re.Pattern, bool, bool]]:
+        pattern = line.rstrip()
+        if not pattern or pattern.startswith("#"):
+            return None
+        negate = pattern.startswith("!")
+        if negate:
+            pattern = pattern[1:]
+        dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        # A slash anywhere but at the end anchors the pattern to the .gitignore directory
+        anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+        if not pattern:
+            return None
+
+        regex = []
+        i = 0
+        while i < len(pattern):
+            if pattern.startswith("**/", i):
+                regex.append("(?:.*/)?")
+                i += 3
+            elif pattern.startswith("**", i):
+                regex.append(".*")
+                i += 2
+            elif pattern[i] == "*":
+                regex.append("[^/]*")
+                i += 1
+            elif pattern[i] == "?":
+                regex.append("[^/]")
+                i += 1
+            elif pattern[i] == "[" and pattern.find("]", i + 1) > 0:
+                end = pattern.find("]", i + 1)
+                chars = pattern[i + 1:end]
+                if chars.startswith("!"):
+                    chars = "^" + chars[1:]
+                regex.append(f"[{chars}]")
+                i = end + 1
+            elif pattern[i] == "\\" and i + 1 < len(pattern):
+                regex.append(re.escape(pattern[i + 1]))
+                i += 2
+            else:
+                regex.append(re.escape(pattern[i]))
+                i += 1
+        prefix = "" if anchored else "(?:.*/)?"
+        return re.compile(prefix + "".join(regex) + "$"), negate, dir_only
+
+
+class FileCatalog:
+    """Relative paths of every project file, built with one os.scandir walk
+
+    Hidden entries, FILE_SEARCH_IGNORED_DIRS and .gitignore matches are pruned
+    during the walk, so ignored trees (node_modules, target, .git) are never
+    listed. Filename search runs str.find over one "\\n"-joined string of the
+    lowercase names and stops as soon as `limit` matches are found.
+    """
+
+    def __init__(self, root: str | Path, ignored_dirs: Optional[Sequence[str]] = None):
+        self.root = Path(root)
+        if ignored_dirs is None:
+            ignored_dirs = [name.strip() for name in get_settings().file_search_ignored_dirs.split(",")]
+        self.ignored_dirs = {name for name in ignored_dirs if name}
+        self.gitignore = GitIgnore()
+        self._paths: Dict[str, None] = {}  # relative path -> None (insertion-ordered set)
+        self.directories: Set[str] = set()  # walked directories ("" = root)
+        # Called with (relative path, exists) for every file added, modified or removed after the build
+        self.listeners: List[Callable[[str, bool], None]] = []
+        self._lock = threading.RLock()
+        # (lowercase names joined by "\n", start offset of each name, paths, the same for
+        # lowercase paths), rebuilt after changes
+        self._snapshot: Optional[Tuple[str, List[int], List[str], str, List[int]]] = None
+        self._features: Dict[str, Tuple[int, int]] = {}  # name or path -> boundary bitmasks
+        self.build_seconds = 0.0
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def build(self):
+        """Walk the tree once (depth first, pruning ignored directories)
+
+        On a rebuild, listeners are told about files that appeared or vanished.
+        """
+        started = time.perf_counter()
+        gitignore = GitIgnore()
+        paths: Dict[str, None] = {}
+        directories: Set[str] = set()
+        self._walk("", gitignore, paths, directories)
+
+        with self._lock:
+            previous = self._paths
+            self.gitignore = gitignore
+            self._paths = paths
+            self.directories = directories
+            self._snapshot = None
+            self._features = {}
+        self.build_seconds = time.perf_counter() - started
+        if previous:
+            for relative in previous.keys() - paths.keys():
+                self._notify(relative, False)
+            for relative in paths.keys() - previous.keys():
+                self._notify(relative, True)
+
+    def _walk(self, start: str, gitignore: GitIgnore, paths: Dict[str, None], directories: Set[str]):
+        stack = [start]
+        while stack:
+            directory = stack.pop()
+            directories.add(directory)
+            absolute = self.root / directory
+            if (absolute / ".gitignore").is_file():
+                gitignore.load(directory, absolute / ".gitignore")
+            try:
+                entries = sorted(os.scandir(absolute), key=lambda entry: entry.name)
+            except OSError:
+                continue
+            subdirectories = []
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                relative = f"{directory}/{entry.name}" if directory else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in self.ignored_dirs and not gitignore.ignored(relative, True):
+                            subdirectories.append(relative)
+                    elif entry.is_file() and not gitignore.ignored(relative, False):
+                        paths[relative] = None
+                except OSError:
+                    continue
+            # Reversed so the stack pops directories in name order
+            stack.extend(reversed(subdirectories))
+
+    def update(self, relative: str) -> List[str]:
+        """Apply a change of one path (file or directory) and notify listeners
+
+        A new directory is walked, a vanished one drops every file under it and
+        a changed .gitignore triggers a rebuild. Returns the files that changed.
+        """
+        relative = relative.strip("/")
+        if relative.rsplit("/", 1)[-1] == ".gitignore":
+            self.build()
+            return []
+        # A file in new directories (e.g. created with mkdir -p) is picked up by walking the top new one
+        parts = relative.split("/")
+        for depth in range(1, len(parts)):
+            ancestor = "/".join(parts[:depth])
+            if ancestor not in self.directories:
+                if (self.root / ancestor).is_dir():
+                    return self.update(ancestor)
+                break
+        path = self.root / relative
+        changed: List[str] = []
+        with self._lock:
+            if path.is_dir() and relative not in self.directories:
+                if self.is_indexable(relative, is_dir=True) and relative.rpartition("/")[0] in self.directories:
+                    added: Dict[str, None] = {}
+                    self._walk(relative, self.gitignore, added, self.directories)
+                    self._paths.update(added)
+                    self._snapshot = None
+                    changed = list(added)
+            elif path.is_file():
+                if relative in self._paths:
+                    changed = [relative]
+                elif relative.rpartition("/")[0] in self.directories and self.is_indexable(relative):
+                    self._paths[relative] = None
+                    self._snapshot = None
+                    changed = [relative]
+            elif not path.exists():
+                prefix = relative + "/"
+                changed = [p for p in self._paths if p == relative or p.startswith(prefix)]
+                for removed in changed:
+                    del self._paths[removed]
+                self.directories = {d for d in self.directories if d != relative and not d.startswith(prefix)}
+                if changed:
+                    self._snapshot = None
+        exists = path.exists()
+        for changed_path in changed:
+            self._notify(changed_path, exists)
+        return changed
+
+    def _notify(self, relative: str, exists: bool):
+        for listener in self.listeners:
+            try:
+                listener(relative, exists)
+            except Exception as e:
+                print(f"File index update failed for {relative}: {e}")
+
+    def is_indexable(self, relative: str, is_dir: bool = False) -> bool:
+        """Whether a path would be in the catalog (not hidden, ignored or gitignored)"""
+        parts = relative.split("/")
+        if any(part.startswith(".") for part in parts):
+            return False
+        if any(part in self.ignored_dirs for part in parts[:-1 if not is_dir else None]):
+            return False
+        return not self.gitignore.ignored(relative, is_dir)
+
+    def paths(self) -> List[str]:
+        return list(self._paths)
+
+    def search(self, query: str, extensions: Optional[Sequence[str]] = None, limit: int = 10) -> List[str]:
+        """Relative paths whose file name contains query (case-insensitive), at most limit"""
+        blob, offsets, paths, _, _ = self._current_snapshot()
+        needle = query.lower()
+        suffixes = tuple(ext.lower() for ext in extensions) if extensions else None
+        results: List[str] = []
+        position = 0
+        while len(results) < limit:
+            position = blob.find(needle, position)
+            if position < 0:
+                break
+            i = bisect_right(offsets, position) - 1
+            path = paths[i]
+            if suffixes is None or path.lower().endswith(suffixes):
+                results.append(path)
+            # Continue with the next name (one hit per file)
+            position = offsets[i + 1] if i + 1 < len(offsets) else len(blob)
+        return results
+
+    def fuzzy_search(self, query: str, extensions: Optional[Sequence[str]] = None,
+                     limit: int = 10) -> List[Tuple[str, int]]:
+        """(relative path, score) of the best fuzzy matches, best first
+
+        fzf-style: the query characters must appear in order. Matches at the
+        start of the name, at path segments, after _-. and at camelCase humps
+        score more, consecutive runs score more and gaps cost. A subsequence
+        regex over the joined lowercase names selects candidates at C speed,
+        a heap keeps the top `limit`, and paths matching only through their
+        directories are ranked below every file-name match (only considered
+        when file names give fewer than `limit` results).
+        """
+        needle = "".join(query.lower().split())
+        if not needle:
+            return [(path, 0) for path in self.search("", extensions, limit)]
+        blob, offsets, paths, path_blob, path_offsets = self._current_snapshot()
+        suffixes = tuple(ext.lower() for ext in extensions) if extensions else None
+        # Each gap skips up to the next query character: a linear scan, no backtracking
+        pattern = re.compile(re.escape(needle[0]) + "".join(
+            f"[^\\n{re.escape(char)}]*+{re.escape(char)}" for char in needle[1:]
+        ))
+
+        heap: List[Tuple[Tuple[int, int, int, int], str]] = []
+        for tier, text_blob, starts in ((1, blob, offsets), (0, path_blob, path_offsets)):
+            if tier == 0 and len(heap) >= limit:
+                break
+            position = 0
+            while True:
+                match = pattern.search(text_blob, position)
+                if match is None:
+                    break
+                i = bisect_right(starts, match.start()) - 1
+                position = starts[i + 1] if i + 1 < len(starts) else len(text_blob)
+                path = paths[i]
+                if suffixes is not None and not path.lower().endswith(suffixes):
+                    continue
+                if tier == 0 and pattern.search(blob, offsets[i], offsets[i + 1] if i + 1 < len(offsets) else len(blob)):
+                    continue  # already ranked as a file-name match
+                text = text_blob[starts[i]:position - 1] if i + 1 < len(starts) else text_blob[starts[i]:]
+                original = path.rsplit("/", 1)[-1] if tier else path
+                score = self._fuzzy_score(needle, text, self._boundaries(original))
+                key = (tier, score, -len(text), -i)
+                if len(heap) < limit:
+                    heapq.heappush(heap, (key, path))
+                elif key > heap[0][0]:
+                    heapq.heapreplace(heap, (key, path))
+        return [(path, key[1]) for key, path in sorted(heap, reverse=True)]
+
+    def _boundaries(self, text: str) -> Tuple[int, int]:
+        """(delimiter-boundary bitmask, camelCase/digit-boundary bitmask) of a name or path, cached
+
+        Boundaries are found on the original case but the bits are offsets into
+        text.lower(), which is what gets matched (lowering can change the length,
+        e.g. 'İ' becomes two characters).
+        """
+        features = self._features.get(text)
+        if features is None:
+            positions = None if text.isascii() else list(accumulate((len(c.lower()) for c in text), initial=0))
+            delimiter = camel = 0
+            for match in _BOUNDARY_RE.finditer(text):
+                bit = 1 << (positions[match.start()] if positions else match.start())
+                if match.group(1) is not None:
+                    delimiter |= bit
+                else:
+                    camel |= bit
+            features = self._features[text] = (delimiter, camel)
+        return features
+
+    @staticmethod
+    def _fuzzy_score(needle: str, text: str, boundaries: Tuple[int, int]) -> int:
+        """fzf v1 score: shortest span ending at the first full match, scored on matched positions"""
+        end = -1
+        for char in needle:
+            end = text.find(char, end + 1)
+        start = end + 1
+        for char in reversed(needle):
+            start = text.rfind(char, 0, start)
+
+        delimiter, camel = boundaries
+        score = 0
+        previous = -2
+        run_bonus = 0
+        position = start - 1
+        for n, char in enumerate(needle):
+            position = text.find(char, position + 1)
+            if (delimiter >> position) & 1:
+                bonus = _BONUS_SEGMENT if position == 0 or text[position - 1] == "/" else _BONUS_BOUNDARY
+            elif (camel >> position) & 1:
+                bonus = _BONUS_CAMEL
+            else:
+                bonus = 0
+            if position == previous + 1:
+                bonus = max(bonus, run_bonus, _BONUS_CONSECUTIVE)
+            else:
+                run_bonus = bonus
+                if n:
+                    gap = position - previous - 1
+                    score += _SCORE_GAP_START + _SCORE_GAP_EXTENSION * (gap - 1)
+            score += _SCORE_MATCH + (bonus * _BONUS_FIRST_CHAR_MULTIPLIER if n == 0 else bonus)
+            previous = position
+        return score
+
+    def _current_snapshot(self) -> Tuple[str, List[int], List[str], str, List[int]]:
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None:
+                    paths = list(self._paths)
+                    names = [path.rsplit("/", 1)[-1].lower() for path in paths]
+                    lowered = [path.lower() for path in paths]
+                    snapshot = self._snapshot = (
+                        "\n".join(names),
+                        list(accumulate((len(name) + 1 for name in names), initial=0))[:-1] if names else [],
+                        paths,
+                        "\n".join(lowered),
+                        list(accumulate((len(path) + 1 for path in lowered), initial=0))[:-1] if lowered else [],
+                    )
+        return snapshot
+
+
+_catalogs: Dict[Path, FileCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def built_catalogs() -> List[FileCatalog]:
+    with _catalogs_lock:
+        return list(_catalogs.values())
+
+
+def notify_file_changed(path: str | Path):
+    """Apply a file write or delete to every built catalog containing it (and their indexes)"""
+    path = Path(path).resolve()
+    for catalog in built_catalogs():
+        try:
+            relative = path.relative_to(catalog.root)
+        except ValueError:
+            continue
+        catalog.update(relative.as_posix())
+
+
+def get_file_catalog(root: str | Path) -> FileCatalog:
+    """Shared catalog of a project root, built on first use"""
+    root = Path(root).resolve()
+    with _catalogs_lock:
+        catalog = _catalogs.get(root)
+        if catalog is None:
+            catalog = FileCatalog(root)
+            catalog.build()
+            print(f"File catalog built: {len(catalog)} files in {catalog.build_seconds * 1000:.0f}ms ({root})")
+            _catalogs[root] = catalog
+    return catalog
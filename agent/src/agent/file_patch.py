@@ -0,0 +1,297 @@
+"""
+Applying unified diffs and search/replace blocks for FileManagementTool.edit_file
+"""
+import os
+import re
+import tempfile
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+_HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_SEARCH_RE = re.compile(r"^<{5,9} ?SEARCH\s*$")
+_DIVIDER_RE = re.compile(r"^={5,9}\s*$")
+_REPLACE_RE = re.compile(r"^>{5,9} ?REPLACE\s*$")
+_NEWLINE_RE = re.compile(r"\r?\n")
+_LINE_BREAK_RE = re.compile(r"(\r?\n)")
+# Context lines that may be dropped from each end of a diff hunk (GNU patch's default fuzz)
+MAX_FUZZ = 2
+
+
+class PatchError(ValueError):
+    """A patch that cannot be parsed or applied; the message says which hunk and why"""
+
+
+class Hunk:
+    """Lines to find (old) and their replacement (new); line is the 1-based position hint of a diff hunk"""
+
+    def __init__(self, old: List[str], new: List[str], line: Optional[int] = None,
+                 leading_context: int = 0, trailing_context: int = 0):
+        self.old = old
+        self.new = new
+        self.line = line
+        self.leading_context = leading_context
+        self.trailing_context = trailing_context
+
+
+def parse_patch(patch: str) -> List[Hunk]:
+    """Hunks of a unified diff (one file) or of SEARCH/REPLACE blocks"""
+    lines = _split_lines(patch)
+    if any(_SEARCH_RE.match(line) for line in lines):
+        return _parse_search_replace(lines)
+    if any(_HUNK_HEADER_RE.match(line) for line in lines):
+        return _parse_unified(lines)
+    raise PatchError("Patch is neither a unified diff (@@ hunks) nor SEARCH/REPLACE blocks")
+
+
+def _split_lines(text: str) -> List[str]:
+    """Lines split on LF and CRLF only (str.splitlines also breaks on form feeds, U+2028, ...)"""
+    if not text:
+        return []
+    if text.endswith("\n"):
+        text = text[:-2] if text.endswith("\r\n") else text[:-1]
+    return _NEWLINE_RE.split(text)
+
+
+def _split_endings(text: str) -> Tuple[List[str], List[str]]:
+    """Lines and the line break ending each one (LF or CRLF, "" for a last line without one)"""
+    if not text:
+        return [], []
+    parts = _LINE_BREAK_RE.split(text)
+    lines, endings = parts[0::2], parts[1::2] + [""]
+    if len(lines) > 1 and lines[-1] == "":
+        lines.pop()
+        endings.pop()
+    return lines, endings
+
+
+def _parse_unified(lines: List[str]) -> List[Hunk]:
+    hunks = []
+    i = 0
+    while i < len(lines):
+        header = _HUNK_HEADER_RE.match(lines[i])
+        i += 1
+        if header is None:
+            if hunks and _is_next_file(lines, i - 1):
+                raise PatchError("Patch changes more than one file; send one patch per file")
+            continue
+        old_count = int(header.group(2)) if header.group(2) is not None else 1
+        new_count = int(header.group(4)) if header.group(4) is not None else 1
+        old: List[str] = []
+        new: List[str] = []
+        kinds = []
+        while i < len(lines) and (len(old) < old_count or len(new) < new_count):
+            line = lines[i]
+            if line.startswith("\\"):  # "\ No newline at end of file"
+                i += 1
+                continue
+            kind, text = (line[0], line[1:]) if line else (" ", "")
+            if kind == " ":
+                old.append(text)
+                new.append(text)
+            elif kind == "-":
+                old.append(text)
+            elif kind == "+":
+                new.append(text)
+            else:
+                break
+            kinds.append(kind)
+            i += 1
+        if len(old) != old_count or len(new) != new_count:
+            raise PatchError(
+                f"Hunk {len(hunks) + 1} ({header.group(0)}) has {len(old)} old / {len(new)} new lines, "
+                f"header says {old_count} / {new_count}"
+            )
+        leading = next((n for n, kind in enumerate(kinds) if kind != " "), len(kinds))
+        trailing = next((n for n, kind in enumerate(reversed(kinds)) if kind != " "), len(kinds))
+        # A zero-length old range is an insertion after line N
+        line = int(header.group(1)) + (1 if old_count == 0 else 0)
+        hunks.append(Hunk(old, new, line, leading, trailing))
+    return hunks
+
+
+def _is_next_file(lines: List[str], i: int) -> bool:
+    return lines[i].startswith("diff ") or (lines[i].startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ "))
+
+
+def _parse_search_replace(lines: List[str]) -> List[Hunk]:
+    hunks = []
+    i = 0
+    while i < len(lines):
+        if not _SEARCH_RE.match(lines[i]):
+            i += 1
+            continue
+        number = len(hunks) + 1
+        old: List[str] = []
+        i += 1
+        while i < len(lines) and not _DIVIDER_RE.match(lines[i]):
+            old.append(lines[i])
+            i += 1
+        if i == len(lines):
+            raise PatchError(f"Block {number}: missing ======= after SEARCH")
+        new: List[str] = []
+        i += 1
+        while i < len(lines) and not _REPLACE_RE.match(lines[i]):
+            new.append(lines[i])
+            i += 1
+        if i == len(lines):
+            raise PatchError(f"Block {number}: missing >>>>>>> REPLACE")
+        if not any(line.strip() for line in old):
+            raise PatchError(f"Block {number}: SEARCH is empty; include the lines to replace")
+        hunks.append(Hunk(old, new))
+        i += 1
+    return hunks
+
+
+def apply_patch(text: str, patch: str) -> Tuple[str, List[str]]:
+    """(patched text, notes on hunks that needed fuzzy matching); raises PatchError, all or nothing
+    
+    Every line keeps its own LF or CRLF ending, so mixed files stay mixed: a
+    replacement line takes the ending of the line it replaces, an added line
+    that of its neighbours. The file keeps or lacks its final line break.
+    """
+    lines, endings = _split_endings(text)
+    final_newline = text.endswith("\n") or not text
+    newline = next((ending for ending in endings if ending), "\n")
+    notes = []
+    offset = 0
+    hunks = parse_patch(patch)
+    if not hunks:
+        raise PatchError("Patch has no hunks")
+    for number, hunk in enumerate(hunks, 1):
+        label = f"Hunk {number}" if hunk.line is not None else f"Block {number}"
+        start, length, new, trimmed, note = _locate(lines, hunk, offset, label)
+        replaced = endings[start:start + length]
+        nearby = next((ending for ending in replaced + endings[max(0, start - 1):start] if ending), None)
+        default = nearby or newline
+        lines[start:start + length] = new
+        endings[start:start + length] = [
+            replaced[i] if i < len(replaced) and replaced[i] else default for i in range(len(new))
+        ]
+        if hunk.line is not None:
+            # Drift of this hunk plus its net line change, carried to the next hint
+            offset = start - trimmed + len(hunk.new) - (hunk.line - 1 + len(hunk.old))
+        if note:
+            notes.append(note)
+    if endings:
+        # Only the last line may lack a line break
+        endings = [ending or newline for ending in endings[:-1]] + [endings[-1]]
+        if final_newline:
+            endings[-1] = endings[-1] or newline
+        else:
+            endings[-1] = ""
+    return "".join(line + ending for line, ending in zip(lines, endings)), notes
+
+
+def _locate(lines: List[str], hunk: Hunk, offset: int, label: str) -> Tuple[int, int, List[str], int, Optional[str]]:
+    """(start, lines replaced, replacement, leading context lines dropped, fuzzy note) of a hunk"""
+    hint = None if hunk.line is None else max(0, hunk.line - 1 + offset)
+    if not hunk.old:
+        if hint is None or hint > len(lines):
+            raise PatchError(f"{label}: inserts at line {hunk.line}, past the end of the file ({len(lines)} lines)")
+        return hint, 0, hunk.new, 0, None
+
+    for strict in (True, False):
+        starts = _find(lines, hunk.old, strict)
+        if starts:
+            start = _pick(starts, hint, label, strict)
+            note = None if strict else f"{label}: matched at line {start + 1} ignoring whitespace"
+            if hint is not None and start != hint:
+                note = note or f"{label}: applied at line {start + 1} (offset {start - hint:+d})"
+            return start, len(hunk.old), hunk.new, 0, note
+
+    # Fuzz: drop up to MAX_FUZZ unchanged context lines from each end and retry
+    for fuzz in range(1, MAX_FUZZ + 1):
+        top = min(fuzz, hunk.leading_context)
+        bottom = min(fuzz, hunk.trailing_context)
+        if not top and not bottom:
+            break
+        old = hunk.old[top:len(hunk.old) - bottom]
+        if not any(line.strip() for line in old):
+            break
+        starts = _find(lines, old, strict=False)
+        if starts:
+            start = _pick(starts, None if hint is None else hint + top, label, False)
+            return (start, len(old), hunk.new[top:len(hunk.new) - bottom], top,
+                    f"{label}: applied at line {start + 1} with fuzz {fuzz} (context differs)")
+
+    raise PatchError(_conflict(lines, hunk.old, hint, label))
+
+
+def _find(lines: List[str], old: List[str], strict: bool) -> List[int]:
+    if strict:
+        wanted = old
+        first = wanted[0]
+        return [
+            i for i in range(len(lines) - len(old) + 1)
+            if lines[i] == first and lines[i:i + len(old)] == wanted
+        ]
+    wanted = [" ".join(line.split()) for line in old]
+    normalized = [" ".join(line.split()) for line in lines]
+    return [
+        i for i in range(len(lines) - len(old) + 1)
+        if normalized[i] == wanted[0] and normalized[i:i + len(old)] == wanted
+    ]
+
+
+def _pick(starts: List[int], hint: Optional[int], label: str, strict: bool) -> int:
+    if len(starts) == 1:
+        return starts[0]
+    if hint is None:
+        where = ", ".join(str(start + 1) for start in starts[:10])
+        raise PatchError(
+            f"{label}: SEARCH text matches {len(starts)} places (lines {where}); "
+            "add surrounding lines to make it unique"
+        )
+    return min(starts, key=lambda start: abs(start - hint))
+
+
+def _conflict(lines: List[str], old: List[str], hint: Optional[int], label: str) -> str:
+    """Where the hunk comes closest to matching and the first line that differs there"""
+    window = len(old)
+    anchors = {line.strip() for line in old if line.strip()}
+    candidates = {max(0, min(i - j, len(lines) - window))
+                  for i, line in enumerate(lines) if line.strip() in anchors
+                  for j in range(window)}
+    if hint is not None:
+        candidates.add(max(0, min(hint, len(lines) - window)))
+    best = None
+    expected = "\n".join(old)
+    for start in sorted(candidates):
+        ratio = SequenceMatcher(None, expected, "\n".join(lines[start:start + window]), autojunk=False).ratio()
+        if best is None or ratio > best[0]:
+            best = (ratio, start)
+    if best is None or best[0] < 0.5:
+        return f"{label}: lines to replace not found in the file (starting with {old[0].strip()!r})"
+    ratio, start = best
+    for k, line in enumerate(old):
+        actual = lines[start + k] if start + k < len(lines) else None
+        if actual is None or " ".join(line.split()) != " ".join(actual.split()):
+            return (
+                f"{label}: lines to replace not found; closest match at line {start + 1} "
+                f"({ratio:.0%} similar) differs at line {start + k + 1}: "
+                f"expected {line.strip()!r}, file has {actual.strip() if actual is not None else '<end of file>'!r}"
+            )
+    return f"{label}: lines to replace not found; closest match at line {start + 1}"
+
+
+def atomic_write(path: Path, text: str):
+    """Write through a temporary file in the same directory and rename it over path"""
+    path = Path(path)
+    fd, temp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.chmod(temp, path.stat().st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.unlink(temp)
+        except FileNotFoundError:
+            pass
+        raise
@@ -0,0 +1,204 @@
+"""
+Streaming, range-based file reading for FileSearchTool.read_file
+"""
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from itertools import islice
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+import numpy as np
+
+_BINARY_SNIFF_BYTES = 8192
+_COUNT_BLOCK_BYTES = 1 << 20
+_INDEX_BLOCK_BYTES = 16 << 20
+
+
+def looks_binary(head: bytes) -> bool:
+    """NUL bytes in the first block mean binary (same heuristic as git and grep)"""
+    return b"\0" in head[:_BINARY_SNIFF_BYTES]
+
+
+def _capped_lines(f: BinaryIO, max_line_bytes: int) -> Iterator[Tuple[bytes, int]]:
+    """(line without newline, bytes cut from it) per line; a huge line is skipped in bounded reads"""
+    while True:
+        line = f.readline(max_line_bytes + 1)
+        if not line:
+            return
+        if line.endswith(b"\n") or len(line) <= max_line_bytes:
+            yield line.rstrip(b"\r\n"), 0
+            continue
+        dropped = len(line) - max_line_bytes
+        previous = line
+        while True:
+            rest = f.readline(_COUNT_BLOCK_BYTES)
+            if not rest or rest.endswith(b"\n"):
+                # The line ending is not content, even when its \r was read with the previous block
+                ending = (previous[-1:] + rest)[-2:]
+                dropped += len(rest) - (len(ending) - len(ending.rstrip(b"\r\n")))
+                break
+            dropped += len(rest)
+            previous = rest
+        yield line[:max_line_bytes], dropped
+
+
+def _count_lines(f: BinaryIO) -> int:
+    """Lines from the current position to the end, counted in fixed-size blocks"""
+    count = 0
+    last = b"\n"
+    while True:
+        block = f.read(_COUNT_BLOCK_BYTES)
+        if not block:
+            break
+        count += block.count(b"\n")
+        last = block[-1:]
+    return count + (last != b"\n")
+
+
+class LineIndex:
+    """Byte offset of every newline of a file, computed over an mmap with numpy
+
+    Line n (1-based) spans [starts(n), newline(n)), so any window is one slice
+    of the mapping: O(window) after the one vectorized pass that builds the index.
+    """
+
+    def __init__(self, path: Path, size: int):
+        self.size = size
+        dtype = np.uint32 if size < 2**32 else np.int64
+        parts = []
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data = np.frombuffer(mm, dtype=np.uint8)
+            for start in range(0, size, _INDEX_BLOCK_BYTES):
+                block = data[start:start + _INDEX_BLOCK_BYTES]
+                parts.append((np.flatnonzero(block == 10) + start).astype(dtype))
+            del data, block  # release the buffer before the mapping is closed
+        self.newlines = np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+        trailing = size > 0 and (not len(self.newlines) or int(self.newlines[-1]) != size - 1)
+        self.total_lines = len(self.newlines) + trailing
+
+    @property
+    def nbytes(self) -> int:
+        return self.newlines.nbytes
+
+    def span(self, first: int, last: int) -> Tuple[int, int]:
+        """Byte range of lines first..last (1-based, inclusive), without the final newline"""
+        start = int(self.newlines[first - 2]) + 1 if first > 1 else 0
+        end = int(self.newlines[last - 1]) if last <= len(self.newlines) else self.size
+        return start, end
+
+
+class FileReader:
+    """Reads a line window of a text file without loading the whole file
+
+    Files under INDEX_MIN_BYTES are streamed: lines before the window are
+    skipped with bounded reads, the window is taken with islice and the rest
+    is only counted. Larger files get a LineIndex (kept in a small LRU keyed by
+    path, mtime and size) so a window deep into a log is one mmap slice.
+    """
+
+    INDEX_MIN_BYTES = 4 << 20
+    MAX_CACHED_INDEXES = 16
+    MAX_CACHED_INDEX_BYTES = 256 << 20
+
+    def __init__(self):
+        self._indexes: "OrderedDict[Tuple[str, int, int], LineIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def read(self, path: str | Path, start_line: int = 1, end_line: Optional[int] = None,
+             max_lines: int = 100, max_line_bytes: int = 2000) -> Dict[str, Any]:
+        """Lines start_line..end_line (1-based, inclusive, at most max_lines) of a text file
+
+        Raises OSError for unreadable files and ValueError for binary files.
+        """
+        path = Path(path)
+        start_line = max(1, start_line)
+        last_line = start_line + max(0, max_lines) - 1
+        if end_line is not None:
+            last_line = min(last_line, end_line)
+
+        stat = path.stat()
+        with open(path, "rb") as f:
+            if looks_binary(f.read(_BINARY_SNIFF_BYTES)):
+                raise ValueError(f"Binary file ({stat.st_size} bytes)")
+            f.seek(0)
+            if stat.st_size >= self.INDEX_MIN_BYTES:
+                index = self._line_index(path, stat)
+                lines, cut_lines, total_lines = self._read_indexed(f, index, start_line, last_line, max_line_bytes)
+            else:
+                lines, cut_lines, total_lines = self._read_streamed(f, start_line, last_line, max_line_bytes)
+
+        returned_end = start_line + len(lines) - 1 if lines else min(start_line - 1, total_lines)
+        return {
+            "path": str(path),
+            "name": path.name,
+            "content": "\n".join(lines) + ("\n" if lines else ""),
+            "start_line": start_line,
+            "end_line": returned_end,
+            "total_lines": total_lines,
+            "truncated": start_line > 1 or returned_end < total_lines or cut_lines > 0,
+            "long_lines_truncated": cut_lines,
+        }
+
+    @staticmethod
+    def _decode(line: bytes, dropped: int) -> str:
+        text = line.decode("utf-8", errors="replace")
+        return f"{text} … [{dropped} bytes truncated]" if dropped else text
+
+    def _read_streamed(self, f: BinaryIO, first: int, last: int, max_line_bytes: int):
+        lines = []
+        cut = 0
+        seen = 0
+        for line, dropped in islice(_capped_lines(f, max_line_bytes), first - 1, max(first - 1, last)):
+            lines.append(self._decode(line, dropped))
+            cut += dropped > 0
+            seen += 1
+        if seen:
+            total = first - 1 + seen + _count_lines(f)
+        else:
+            # Window past the end: everything was skipped, count from the start
+            f.seek(0)
+            total = _count_lines(f)
+        return lines, cut, total
+
+    def _read_indexed(self, f: BinaryIO, index: LineIndex, first: int, last: int, max_line_bytes: int):
+        last = min(last, index.total_lines)
+        lines = []
+        cut = 0
+        if first <= last:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for number in range(first, last + 1):
+                    start, end = index.span(number, number)
+                    if end > start and mm[end - 1:end] == b"\r":
+                        end -= 1
+                    dropped = max(0, end - start - max_line_bytes)
+                    lines.append(self._decode(mm[start:end - dropped], dropped))
+                    cut += dropped > 0
+        return lines, cut, index.total_lines
+
+    def _line_index(self, path: Path, stat: os.stat_result) -> LineIndex:
+        key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+        index = LineIndex(path, stat.st_size)
+        with self._lock:
+            # A newer version of the same file replaces the old index
+            for old in [k for k in self._indexes if k[0] == key[0]]:
+                del self._indexes[old]
+            self._indexes[key] = index
+            while len(self._indexes) > self.MAX_CACHED_INDEXES or (
+                len(self._indexes) > 1
+                and sum(i.nbytes for i in self._indexes.values()) > self.MAX_CACHED_INDEX_BYTES
+            ):
+                self._indexes.popitem(last=False)
+        return index
+
+
+_reader = FileReader()
+
+
+def get_file_reader() -> FileReader:
+    return _reader
@@ -0,0 +1,353 @@
+"""
+Filesystem change tracking for the file catalog and the indexes built on it
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from src.agent.file_catalog import FileCatalog
+from src.config import get_settings
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MODIFY | IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_ONLYDIR
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class _Inotify:
+    """Minimal inotify binding through libc (Linux only, no extra dependency)"""
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "libc has no inotify support")
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+
+    def add_watch(self, path: Path) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(str(path)), _WATCH_MASK)
+        if wd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, f"{os.strerror(code)}: {path}")
+        return wd
+
+    def remove_watch(self, wd: int):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout: float) -> List[Tuple[int, int, str]]:
+        """(wd, mask, name) events, waiting at most timeout seconds"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """Keeps a FileCatalog, and every index listening to it, in sync with the tree
+
+    Changes are detected with inotify on every catalog directory where
+    available (FILE_WATCH_MODE=auto|inotify), otherwise by polling file
+    mtime/size and directory mtimes every FILE_WATCH_POLL_INTERVAL seconds.
+    Each changed path is applied with FileCatalog.update, which adds, re-indexes
+    or removes just that file in the catalog and its listeners (content index).
+
+    Freshness: lag is the time from a change (event arrival, or file mtime when
+    polling) until it was applied; sync_age is the time since the watcher last
+    confirmed the indexes were caught up.
+    """
+
+    DEBOUNCE_SECONDS = 0.05
+    MAX_BATCH_SECONDS = 0.5
+
+    def __init__(self, catalog: FileCatalog, mode: Optional[str] = None, poll_interval: Optional[float] = None):
+        settings = get_settings()
+        self.catalog = catalog
+        self.mode = mode or settings.file_watch_mode
+        self.poll_interval = poll_interval if poll_interval is not None else settings.file_watch_poll_interval
+        self.backend: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify: Optional[_Inotify] = None
+        self._watches: Dict[int, str] = {}  # wd -> relative directory
+        self._watched_dirs: Dict[str, int] = {}
+        # Polling state: relative path -> (mtime_ns, size); directory -> mtime_ns
+        self._file_states: Dict[str, Tuple[int, int]] = {}
+        self._dir_states: Dict[str, int] = {}
+        self.pending = 0
+        self.changes_applied = 0
+        self.last_applied_at: Optional[float] = None
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.synced_at: Optional[float] = None
+
+    def start(self):
+        if self._thread is not None or self.mode == "off":
+            return
+        if self.mode in ("auto", "inotify"):
+            try:
+                self._start_inotify()
+            except OSError as e:
+                if self._inotify is not None:
+                    self._inotify.close()
+                    self._inotify = None
+                self._watches.clear()
+                self._watched_dirs.clear()
+                if self.mode == "inotify":
+                    raise
+                print(f"inotify unavailable ({e}), polling for file changes every {self.poll_interval}s")
+        if self._inotify is None:
+            self.backend = "poll"
+            self._snapshot_states()
+            target = self._run_polling
+        else:
+            self.backend = "inotify"
+            target = self._run_inotify
+        self.synced_at = time.time()
+        self._thread = threading.Thread(target=target, name="file-watcher", daemon=True)
+        self._thread.start()
+        print(f"File watcher started ({self.backend}, {len(self.catalog.directories)} directories)")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(1.0, self.poll_interval + 1))
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        return {
+            "backend": self.backend,
+            "watched_directories": len(self._watched_dirs) if self.backend == "inotify" else len(self._dir_states),
+            "pending": self.pending,
+            "changes_applied": self.changes_applied,
+            "last_lag_ms": round(self.last_lag * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+            "sync_age_seconds": round(now - self.synced_at, 3) if self.synced_at else None,
+        }
+
+    def _apply(self, changes: Dict[str, float]):
+        """Apply changed paths (relative path -> time the change happened)"""
+        self.pending = len(changes)
+        for relative in changes:
+            self.catalog.update(relative)
+            self.pending -= 1
+        now = time.time()
+        lag = max(0.0, now - min(changes.values()))
+        self.changes_applied += len(changes)
+        self.last_applied_at = now
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+
+    # inotify backend
+
+    def _start_inotify(self):
+        self._inotify = _Inotify()
+        self._sync_watches()
+
+    def _sync_watches(self):
+        """Watch every catalog directory, drop watches of directories no longer in it"""
+        directories = set(self.catalog.directories)
+        for directory in [d for d in self._watched_dirs if d not in directories]:
+            self._inotify.remove_watch(self._watched_dirs.pop(directory))
+        for directory in directories - self._watched_dirs.keys():
+            try:
+                wd = self._inotify.add_watch(self.catalog.root / directory)
+            except OSError as e:
+                if e.errno == errno.ENOENT:
+                    continue
+                raise
+            self._watches[wd] = directory
+            self._watched_dirs[directory] = wd
+
+    def _run_inotify(self):
+        while not self._stop.is_set():
+            try:
+                events = self._inotify.read(timeout=1.0)
+            except OSError as e:
+                print(f"File watcher stopped: {e}")
+                return
+            if not events:
+                self.synced_at = time.time()
+                continue
+
+            changes: Dict[str, float] = {}
+            rebuild = False
+            started = time.time()
+            # Collect a burst of events (editors and git write several files at once)
+            while events:
+                for wd, mask, name in events:
+                    if mask & IN_Q_OVERFLOW:
+                        rebuild = True
+                        continue
+                    if mask & IN_IGNORED:
+                        directory = self._watches.pop(wd, None)
+                        if directory is not None and self._watched_dirs.get(directory) == wd:
+                            del self._watched_dirs[directory]
+                        continue
+                    directory = self._watches.get(wd)
+                    if directory is None or not name:
+                        continue
+                    relative = f"{directory}/{name}" if directory else name
+                    changes.setdefault(relative, time.time())
+                if time.time() - started > self.MAX_BATCH_SECONDS:
+                    break
+                events = self._inotify.read(timeout=self.DEBOUNCE_SECONDS)
+
+            try:
+                if rebuild:
+                    print("inotify queue overflowed, rebuilding the file catalog")
+                    self.catalog.build()
+                if changes:
+                    self._apply(changes)
+                self._sync_watches()
+            except OSError as e:
+                print(f"File watcher error: {e}")
+            except Exception as e:
+                print(f"File index update failed: {e}")
+            self.synced_at = time.time()
+
+    # Polling backend
+
+    def _snapshot_states(self):
+        self._file_states = {}
+        self._dir_states = {}
+        root = self.catalog.root
+        for directory in list(self.catalog.directories):
+            try:
+                self._dir_states[directory] = (root / directory).stat().st_mtime_ns
+            except OSError:
+                continue
+            self._record_file(f"{directory}/.gitignore" if directory else ".gitignore")
+        for relative in self.catalog.paths():
+            self._record_file(relative)
+
+    def _record_file(self, relative: str):
+        try:
+            stat = (self.catalog.root / relative).stat()
+        except OSError:
+            self._file_states.pop(relative, None)
+            return
+        self._file_states[relative] = (stat.st_mtime_ns, stat.st_size)
+
+    def _run_polling(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                changes = self._poll()
+                if changes:
+                    self._apply(changes)
+                    # New directories, removed files and rebuilds change what is tracked
+                    self._snapshot_states()
+            except Exception as e:
+                print(f"File index update failed: {e}")
+            self.synced_at = time.time()
+
+    def _poll(self) -> Dict[str, float]:
+        """Changed paths since the last poll (relative path -> mtime or detection time)"""
+        root = self.catalog.root
+        now = time.time()
+        changes: Dict[str, float] = {}
+        for relative, state in list(self._file_states.items()):
+            try:
+                stat = (root / relative).stat()
+            except OSError:
+                changes[relative] = now
+                continue
+            if (stat.st_mtime_ns, stat.st_size) != state:
+                changes[relative] = min(now, stat.st_mtime_ns / 1e9)
+
+        # Created files and directories only show up as a directory mtime change
+        for directory, mtime_ns in list(self._dir_states.items()):
+            try:
+                stat = (root / directory).stat()
+            except OSError:
+                changes[directory] = now
+                continue
+            if stat.st_mtime_ns == mtime_ns:
+                continue
+            try:
+                entries = list(os.scandir(root / directory))
+            except OSError:
+                continue
+            for entry in entries:
+                relative = f"{directory}/{entry.name}" if directory else entry.name
+                if entry.name == ".gitignore" and relative not in self._file_states:
+                    changes[relative] = now
+                elif entry.name.startswith("."):
+                    continue
+                elif entry.is_dir(follow_symlinks=False):
+                    if relative not in self._dir_states:
+                        changes[relative] = now
+                elif relative not in self._file_states:
+                    changes[relative] = now
+        return changes
+
+
+_watchers: Dict[Path, FileWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def start_file_watcher(catalog: FileCatalog) -> FileWatcher:
+    """Start (once) the watcher of a catalog"""
+    with _watchers_lock:
+        watcher = _watchers.get(catalog.root)
+        if watcher is None:
+            watcher = FileWatcher(catalog)
+            watcher.start()
+            _watchers[catalog.root] = watcher
+    return watcher
+
+
+def file_watcher(root: Path) -> Optional[FileWatcher]:
+    with _watchers_lock:
+        return _watchers.get(root)
+
+
+def stop_file_watchers():
+    with _watchers_lock:
+        watchers = list(_watchers.values())
+        _watchers.clear()
+    for watcher in watchers:
+        watcher.stop()
@@ -0,0 +1,98 @@
+"""
+Lexical (BM25) index for hybrid RAG retrieval
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+# Code identifiers (optionally @annotations / dotted paths), numbers, Hangul runs (eojeol)
+_TOKEN_RE = re.compile(r"@?[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*|\d+|[가-힣]+")
+# camelCase / PascalCase / ACRONYMCase parts
+_CAMEL_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokens for BM25 that work for Korean prose and code identifiers
+
+    - Hangul runs: the whole eojeol plus character bigrams, so "규칙이" still
+      matches a query for "규칙" without a morphological analyzer
+    - Identifiers: the lowercased identifier ("@getmapping", "usercontroller")
+      plus its camelCase / snake_case / dotted parts ("user", "controller")
+    """
+    tokens = []
+    for match in _TOKEN_RE.finditer(text):
+        word = match.group()
+        if "가" <= word[0] <= "힣":
+            tokens.append(word)
+            if len(word) > 2:
+                tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+            continue
+
+        tokens.append(word.lower())
+        if word.startswith("@"):
+            word = word[1:]
+            tokens.append(word.lower())
+        parts = [part.lower() for piece in re.split(r"[._]", word) for part in _CAMEL_RE.findall(piece)]
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of documents
+
+    Postings are numpy arrays per term, so a query is a few scatter-adds into one
+    score vector. `rows` maps document positions back to vector store rows.
+    """
+
+    def __init__(self, texts: Sequence[str], rows: Optional[Sequence[int]] = None, k1: float = 1.2, b: float = 0.75):
+        self.rows = np.asarray(rows if rows is not None else range(len(texts)), dtype=np.intp)
+        self.k1 = k1
+
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths[doc_id] = sum(counts.values())
+            for term, tf in counts.items():
+                ids, tfs = postings.setdefault(term, ([], []))
+                ids.append(doc_id)
+                tfs.append(tf)
+
+        n = len(texts)
+        avg_length = float(lengths.mean()) if n and lengths.mean() > 0 else 1.0
+        # Per-document length normalization, precomputed once
+        self._norm = k1 * (1 - b + b * lengths / avg_length)
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray, float]] = {}
+        for term, (ids, tfs) in postings.items():
+            idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            self._postings[term] = (np.asarray(ids, dtype=np.int32), np.asarray(tfs, dtype=np.float32), idf)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def search(self, query: str, k: int = 10, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Top-k (row, score) pairs; documents sharing no term with the query are skipped
+
+        mask is a boolean array over store rows; rows where it is False are skipped.
+        """
+        if not len(self.rows):
+            return []
+
+        scores = np.zeros(len(self.rows), dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            ids, tfs, idf = posting
+            scores[ids] += idf * tfs * (self.k1 + 1) / (tfs + self._norm[ids])
+
+        if mask is not None:
+            scores[~mask[self.rows]] = 0
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(scores[hits], -k)[-k:]]
+        hits = hits[np.argsort(scores[hits])[::-1]]
+        return [(int(self.rows[i]), float(scores[i])) for i in hits]
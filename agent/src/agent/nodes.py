@@ -6,7 +6,9 @@ from typing import Literal
 
 NextNode = Literal["search", "verify", "code_review", "autonomous", "complete"]
 from src.llm import get_llm_client
+from pathlib import Path
 import json
+import re
 
 
 async def router_node(state: AgentState) -> AgentState:
@@ -20,6 +22,14 @@ async def router_node(state: AgentState) -> AgentState:
         state["next_node"] = "complete"
         return state
     
+    # Location questions for a known symbol are answered from the symbol index (no LLM call);
+    # until main.py's file-index thread has built it, the question takes the normal route
+    symbol_answer = _symbol_answer(state.get("message", ""))
+    if symbol_answer:
+        state["final_response"] = symbol_answer
+        state["next_node"] = "complete"
+        return state
+    
     llm = get_llm_client()
     
     prompt = f"""사용자 입력을 분석하여 의도를 파악하세요.
@@ -64,9 +74,63 @@ JSON 형식으로 응답: {{"intent": "SEARCH" | "VERIFY" | "CODE_REVIEW" | "AUT
     return state
 
 
+# English words need ASCII boundaries: "find" must not match findAll, and Hangul counts as \w
+_LOCATE_RE = re.compile(
+    r"찾|어디|위치|정의|파일|(?<![A-Za-z])(?:where|find|defined|locate|files?)(?![A-Za-z])", re.IGNORECASE
+)
+# Requests to do something with the code belong to the intent router, not the location fast path
+_ACTION_RE = re.compile(
+    r"리뷰|수정|추가|삭제|변경|고쳐|고치|만들|생성|작성|구현|리팩|검증|검토|설명|개선|테스트|"
+    r"(?<![A-Za-z])(?:review|fix|add|change|modify|create|write|implement|refactor|delete|remove|"
+    r"explain|verify|update|improve|tests?)(?![A-Za-z])",
+    re.IGNORECASE,
+)
+_ANNOTATION_TERM_RE = re.compile(r"@[A-Za-z_][A-Za-z0-9_]*")
+_ROUTE_TERM_RE = re.compile(r"(?<![A-Za-z0-9_/])/[A-Za-z][A-Za-z0-9_/{}.-]*")
+
+
+def _is_location_question(message: str) -> bool:
+    """Asks where something is, and nothing else (no review, fix, add, ... request)"""
+    return bool(_LOCATE_RE.search(message)) and not _ACTION_RE.search(message)
+
+
+def _symbol_answer(message: str) -> str | None:
+    """File:line answer when a location question names symbols the built index knows exactly
+    
+    Runs on the event loop, so it only reads an existing symbol index and never builds one.
+    """
+    from src.agent.tools import FileSearchTool, code_identifiers
+    from src.graph_settings import get_graph_settings
+    
+    if not get_graph_settings().enable_symbol_fast_path:
+        return None
+    if not _is_location_question(message):
+        return None
+    
+    terms = _ANNOTATION_TERM_RE.findall(message) + _ROUTE_TERM_RE.findall(message)
+    terms += [term for term in code_identifiers(message) if f"@{term}" not in terms]
+    if not terms:
+        return None
+    
+    tool = FileSearchTool()
+    hits = []
+    for term in terms:
+        hits.extend(tool.find_symbol(term, build=False))
+    if not hits:
+        return None
+    
+    lines = []
+    for hit in hits[:10]:
+        owner = f" ({hit['container']})" if hit["container"] and hit["kind"] != "route" else ""
+        location = f"{Path(hit['path']).relative_to(tool.project_root).as_posix()}:{hit['line']}"
+        lines.append(f"- `{hit['symbol']}`{owner} [{hit['kind']}] {location}\n  `{hit['snippet']}`")
+    more = f"\n\n외 {len(hits) - 10}건이 더 있습니다." if len(hits) > 10 else ""
+    return "다음 위치에서 찾았습니다:\n\n" + "\n".join(lines) + more
+
+
 def search_rules_node(state: AgentState) -> AgentState:
     """Search rules using RAG or search for files"""
-    from src.agent.tools import FileSearchTool
+    from src.agent.tools import FileSearchTool, code_identifiers
     llm = get_llm_client()
     
     message = state.get("message", "")
@@ -82,9 +146,17 @@ def search_rules_node(state: AgentState) -> AgentState:
             search_term = search_term.replace(word, "").strip()
         
         results = file_tool.search_files(search_term)
+        if not results:
+            # No filename hit: look for identifiers of the question in file contents
+            for identifier in code_identifiers(message):
+                results.extend(file_tool.search_content(identifier, limit=10))
         
         if results:
-            file_list = "\n".join([f"- {r['name']} ({r['path']})" for r in results])
+            file_list = "\n".join([
+                f"- {r['name']} ({r['path']}:{r['line']}): {r['snippet']}" if "line" in r
+                else f"- {r['name']} ({r['path']})"
+                for r in results
+            ])
             state["final_response"] = f"다음 파일을 찾았습니다:\n\n{file_list}\n\n더 자세히 보려면 파일명을 말씀해주세요."
             state["next_node"] = "complete"
             return state
@@ -92,7 +164,7 @@ def search_rules_node(state: AgentState) -> AgentState:
     # Fall back to LLM-based search
     # Use RAG-based Rule Search
     from src.agent.tools import RuleSearchTool
-    rule_tool = RuleSearchTool()
+    rule_tool = RuleSearchTool(state.get("project"))
     rag_result = rule_tool.search(message)
     
     if rag_result.startswith("NO_RULES:"):
@@ -234,6 +306,7 @@ def code_review_node(state: AgentState) -> AgentState:
 
 def think_node(state: AgentState) -> AgentState:
     """Autonomous agent - Think step"""
+    from src.agent.tools import CommandExecutor
     llm = get_llm_client()
     
     prompt = f"""현재 태스크를 분석하고 다음 행동을 생각하세요.
@@ -242,7 +315,8 @@ def think_node(state: AgentState) -> AgentState:
 [완료된 단계] {state.get("steps_completed", 0)}
 [이전 관찰] {state.get("last_observation", "없음")}
 
-다음에 무엇을 해야 하는지 생각하세요."""
+다음에 무엇을 해야 하는지 생각하세요.
+셸 명령 실행이 필요하면 `COMMAND: <명령>` 형식의 한 줄로 적으세요 (허용: {", ".join(CommandExecutor.ALLOWED_COMMANDS)})."""
 
     response = llm.chat([
         {"role": "system", "content": "You are an autonomous agent. Think step by step."},
@@ -259,8 +333,25 @@ def think_node(state: AgentState) -> AgentState:
     return state
 
 
-def act_node(state: AgentState) -> AgentState:
-    """Autonomous agent - Act step"""
+# A thought asks for a shell command on a line of its own: "COMMAND: npm test"
+_COMMAND_LINE_RE = re.compile(r"^\s*`?COMMAND:\s*(.+?)`?\s*$", re.MULTILINE)
+_MAX_OBSERVATION_CHARS = 4000
+
+
+async def act_node(state: AgentState) -> AgentState:
+    """Autonomous agent - Act step: runs the command the thought asked for, else asks the LLM"""
+    from src.agent.tools import CommandExecutor
+    
+    command = _COMMAND_LINE_RE.search(state.get("current_thought", ""))
+    if command:
+        # Awaited on the event loop: a long npm/javac run holds no worker thread
+        output = await CommandExecutor().run_command_async(command.group(1))
+        content = f"$ {command.group(1)}\n{output[:_MAX_OBSERVATION_CHARS]}"
+        state["action_result"] = content
+        state["last_observation"] = content
+        state["steps_completed"] = state.get("steps_completed", 0) + 1
+        return state
+    
     llm = get_llm_client()
     
     prompt = f"""생각을 바탕으로 행동을 실행하세요.
@@ -2,214 +2,1503 @@
 RAG Modules for Project Rules
 """
 import os
+import copy
 import glob
+import json
+import mmap
+import shutil
+import hashlib
+import threading
+import time
+import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Sequence, Tuple
 import numpy as np
 from src.llm.client import get_llm_client, get_embedding_client
+from src.config import get_settings
+from src.agent.embedding_cache import EmbeddingCache, QueryEmbeddingCache, content_hash
+from src.agent.lexical_index import BM25Index
+from src.agent.dedup import MinHashDeduplicator
+from src.agent.chunking import MarkdownChunker
+from src.agent.corpus import CodeChunker, CorpusFilter, CorpusSource, language_of, parse_sources
 
-class RuleLoader:
-    """Loads and chunks markdown files from rules directory"""
+class CorpusLoader:
+    """Loads and chunks the files of every configured corpus source (RAG_SOURCES)
     
-    def __init__(self, rules_dir: str = "/Users/chaehuijae/Desktop/가이드/rules"):
-        self.rules_dir = Path(rules_dir)
+    Files are keyed by their path relative to the project root. Markdown is
+    chunked by headers, Java/Python by class and method, JSX by component; every
+    chunk records its source_type (the source name) and language.
+    """
+    
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        sources: Optional[List[CorpusSource]] = None,
+        chunker: Optional[MarkdownChunker] = None,
+    ):
+        settings = get_settings()
+        self.root = Path(root or settings.rag_project_root)
+        self.sources = sources if sources is not None else parse_sources(settings.rag_sources)
+        if chunker is None:
+            chunker = MarkdownChunker(
+                settings.rag_chunk_min_tokens,
+                settings.rag_chunk_max_tokens,
+                settings.rag_chunk_overlap_tokens,
+            )
+        self.chunker = chunker
+        self.code_chunker = CodeChunker(chunker)
+        # relative path -> {"mtime_ns", "size", "sha256"} as of the last scan/load
+        self._file_states: Dict[str, Dict[str, Any]] = {}
+        # relative path -> source name as of the last files()
+        self._file_sources: Dict[str, str] = {}
+        
+    def files(self) -> Dict[str, str]:
+        """Relative path -> source name of every indexable file (the first matching source wins)"""
+        if not self.root.exists():
+            print(f"Warning: Corpus root not found: {self.root}")
+            return {}
+        
+        files: Dict[str, str] = {}
+        for source in self.sources:
+            for pattern in source.patterns:
+                for file_path in self.root.glob(pattern):
+                    relative = file_path.relative_to(self.root).as_posix()
+                    if file_path.is_file() and language_of(relative):
+                        files.setdefault(relative, source.name)
+        self._file_sources = files
+        return files
+            
+    def load_all(self) -> List[Dict[str, Any]]:
+        """Load every corpus file and split into chunks"""
+        return list(self.iter_chunks())
         
-    def load_rules(self) -> List[Dict[str, Any]]:
-        """Load all markdown files and split into chunks"""
-        chunks = []
+    def iter_chunks(self) -> Iterator[Dict[str, Any]]:
+        """Chunks of every corpus file, one file at a time"""
+        for relative, source_type in sorted(self.files().items()):
+            yield from self.load_file(relative, source_type)
         
-        if not self.rules_dir.exists():
-            print(f"Warning: Rules directory not found: {self.rules_dir}")
+    def load_file(self, relative: str, source_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Load and chunk a single corpus file (records its state)
+        
+        The file is streamed line by line into the chunker and hashed on the way,
+        so it is read once and never held as a single string.
+        """
+        file_path = self.root / relative
+        language = language_of(relative)
+        if source_type is None:
+            source_type = self._file_sources.get(relative) or self.files().get(relative, "")
+        try:
+            stat = file_path.stat()
+            digest = hashlib.sha256()
+            with open(file_path, "rb") as f:
+                lines = self._decoded_lines(f, digest)
+                if language == "markdown":
+                    chunks = list(self.chunker.chunk(lines, relative))
+                else:
+                    chunks = list(self.code_chunker.chunk(lines, relative, language))
+            self._file_states[relative] = self._state(stat, digest.hexdigest())
+        except Exception as e:
+            print(f"Error loading {file_path}: {e}")
             return []
             
-        for file_path in self.rules_dir.glob("*.md"):
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    
-                # Simple chunking by headers
-                # This ensures we capture logical sections
-                file_chunks = self._chunk_by_headers(content, file_path.name)
-                chunks.extend(file_chunks)
-            except Exception as e:
-                print(f"Error loading {file_path}: {e}")
-                
+        for chunk in chunks:
+            chunk["source_type"] = source_type
+            chunk["language"] = language
         return chunks
+            
+    def scan(self) -> Tuple[List[str], List[str]]:
+        """Compare corpus files with the last known state
         
-    def _chunk_by_headers(self, content: str, filename: str) -> List[Dict[str, Any]]:
-        """Split markdown content by headers"""
-        chunks = []
-        lines = content.split('\n')
-        current_chunk = []
-        current_header = "Intro"
-        
-        for line in lines:
-            if line.startswith('#'):
-                # Save previous chunk if exists
-                if current_chunk:
-                    text = '\n'.join(current_chunk).strip()
-                    if text:
-                        chunks.append({
-                            "source": filename,
-                            "header": current_header,
-                            "content": text
-                        })
-                
-                # Start new chunk
-                current_header = line.strip().lstrip('#').strip()
-                current_chunk = [line]  # Include header in content
-            else:
-                current_chunk.append(line)
-                
-        # Save last chunk
-        if current_chunk:
-            text = '\n'.join(current_chunk).strip()
-            if text:
-                chunks.append({
-                    "source": filename,
-                    "header": current_header,
-                    "content": text
-                })
-                
-        return chunks
+        Files whose mtime/size changed are re-hashed, so a touch without a content
+        change is not reported. Returns (added or changed paths, removed paths).
+        """
+        current = {relative: self.root / relative for relative in self.files()}
+            
+        changed = []
+        for filename, file_path in current.items():
+            try:
+                stat = file_path.stat()
+                known = self._file_states.get(filename)
+                if known and (known["mtime_ns"], known["size"]) == (stat.st_mtime_ns, stat.st_size):
+                    continue
+                state = self._state(stat, self._hash_file(file_path))
+            except OSError as e:
+                print(f"Error scanning {file_path}: {e}")
+                continue
+            if not known or known["sha256"] != state["sha256"]:
+                changed.append(filename)
+            self._file_states[filename] = state
+            
+        removed = [filename for filename in self._file_states if filename not in current]
+        for filename in removed:
+            del self._file_states[filename]
+            
+        return sorted(changed), sorted(removed)
+        
+    def forget(self, filename: str):
+        """Drop the recorded state of a file so the next scan reports it as changed"""
+        self._file_states.pop(filename, None)
+        
+    def file_states(self) -> Dict[str, Dict[str, Any]]:
+        """Recorded state of every file (saved with the index)"""
+        return {filename: dict(state) for filename, state in self._file_states.items()}
+        
+    def restore(self, states: Dict[str, Dict[str, Any]]):
+        """Adopt the file states saved with an index, so the next scan only re-hashes files changed since"""
+        self._file_states = {filename: dict(state) for filename, state in states.items()}
+        
+    def fingerprint(self) -> str:
+        """Hash of every corpus file path and content as of the last scan"""
+        if not self._file_states:
+            self.scan()
+        digest = hashlib.sha256()
+        for filename in sorted(self._file_states):
+            digest.update(filename.encode("utf-8") + b"\0")
+            digest.update(self._file_states[filename]["sha256"].encode("ascii"))
+        return digest.hexdigest()
+        
+    @staticmethod
+    def _decoded_lines(f, digest) -> Iterator[str]:
+        """Lines of a binary file as text, feeding the raw bytes to digest"""
+        for raw in f:
+            digest.update(raw)
+            yield raw.decode("utf-8")
+            
+    @staticmethod
+    def _hash_file(file_path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                digest.update(block)
+        return digest.hexdigest()
+        
+    @staticmethod
+    def _state(stat: os.stat_result, sha256: str) -> Dict[str, Any]:
+        return {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": sha256,
+        }
+
+class MappedDocuments(Sequence):
+    """Read-only document list backed by a memory-mapped JSONL file and an offset index
+    
+    Documents are decoded on access, so worker processes share the file pages
+    instead of each holding its own copy of every dict.
+    """
+    
+    def __init__(self, data_path: Path, offsets_path: Path):
+        self._offsets = np.load(offsets_path, mmap_mode="r")
+        with open(data_path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+        
+    @property
+    def nbytes(self) -> int:
+        """Size of the mapped document data"""
+        return len(self._data) + self._offsets.nbytes
+        
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        start, end = int(self._offsets[idx]), int(self._offsets[idx + 1])
+        return json.loads(self._data[start:end])
+        
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for idx in range(len(self)):
+            yield self[idx]
+
 
 class SimpleVectorStore:
-    """Lightweight in-memory vector store using numpy"""
+    """Lightweight in-memory vector store using numpy
+    
+    Rows are L2-normalized once on insert and kept in a preallocated float32 matrix
+    that grows by doubling, so a query is one matrix-vector product plus argpartition.
+    Deleted rows are tombstoned (masked out of search) until compact() or save().
     
-    def __init__(self):
-        self.vectors = []
+    With precision "float16" or "int8" (per-row scale), search scans quantized
+    codes instead of the float32 rows (2x / 4x fewer bytes touched per query).
+    The float32 rows are still kept, memory-mapped from vectors.npy once the index
+    is saved and loaded, and only the top k * rescore_factor candidates are read
+    from them to rescore at full precision (rescore_factor=0 disables this).
+    """
+    
+    # Upper bound on the score matrix of one search_batch block (float32 elements, 64 MB)
+    BATCH_SCORE_ELEMENTS = 1 << 24
+    # Quantized rows are dequantized in cache-sized blocks (float32 elements, 1 MB) while scoring
+    DECODE_BLOCK_ELEMENTS = 1 << 18
+    PRECISIONS = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+    
+    def __init__(self, initial_capacity: int = 256, precision: Optional[str] = None, rescore_factor: Optional[int] = None):
+        settings = get_settings()
+        precision = precision or settings.rag_vector_precision
+        if precision not in self.PRECISIONS:
+            raise ValueError(f"Unknown vector precision: {precision} (expected one of {', '.join(self.PRECISIONS)})")
+        self.precision = precision
+        self.rescore_factor = settings.rag_rescore_factor if rescore_factor is None else rescore_factor
         self.documents = []
+        # Rows as searched: float32, or quantized codes
+        self._matrix: Optional[np.ndarray] = None
+        # Quantized stores only: per-row int8 scale and the full-precision rows
+        self._scales: Optional[np.ndarray] = None
+        self._full: Optional[np.ndarray] = None
+        self._size = 0
+        self._initial_capacity = initial_capacity
+        self._tombstones: Optional[np.ndarray] = None
+        self._deleted_count = 0
+        
+    def __len__(self) -> int:
+        """Number of live (not deleted) documents"""
+        return self._size - self._deleted_count
+        
+    @property
+    def quantized(self) -> bool:
+        return self.precision != "float32"
+        
+    @property
+    def vectors(self) -> np.ndarray:
+        """Full-precision normalized vectors of all stored rows, including tombstoned ones (view, no copy)"""
+        matrix = self._full if self.quantized else self._matrix
+        if matrix is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return matrix[:self._size]
+        
+    @property
+    def search_nbytes(self) -> int:
+        """Bytes scanned by a brute-force query (the resident working set of a mapped index)"""
+        if self._matrix is None:
+            return 0
+        scales = self._scales[:self._size].nbytes if self._scales is not None else 0
+        return self._matrix[:self._size].nbytes + scales
+        
+    @property
+    def resident_nbytes(self) -> int:
+        """search_nbytes plus float32 rows held in RAM (a quantized store before save + load)
+        
+        Once loaded from disk, the float32 rows of a quantized store are memory-mapped
+        and only the rescored rows are paged in, so they are not counted.
+        """
+        full = self._full
+        if full is None or isinstance(full, np.memmap):
+            return self.search_nbytes
+        return self.search_nbytes + full[:self._size].nbytes
+        
+    @property
+    def tombstone_ratio(self) -> float:
+        return self._deleted_count / self._size if self._size else 0.0
+        
+    def live_rows(self) -> np.ndarray:
+        """Row indices of documents that are not deleted"""
+        if not self._deleted_count:
+            return np.arange(self._size)
+        return np.flatnonzero(~self._tombstones)
+        
+    def iter_documents(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over live documents"""
+        if not self._deleted_count:
+            yield from self.documents
+            return
+        for idx in self.live_rows():
+            yield self.documents[idx]
         
     def add_documents(self, documents: List[Dict[str, Any]], embeddings: List[List[float]]):
         """Add documents and their embeddings"""
         if not documents:
             return
             
-        self.documents.extend(documents)
-        
-        # Convert to numpy array for efficiency if possible, or keep list
-        if not self.vectors:
-            self.vectors = np.array(embeddings)
+        block = np.asarray(embeddings, dtype=np.float32)
+        if block.ndim != 2 or len(block) != len(documents):
+            raise ValueError(f"Expected {len(documents)} embeddings, got array of shape {block.shape}")
+            
+        self._reserve(self._size + len(block), block.shape[1])
+        end = self._size + len(block)
+        block = self._normalize(block)
+        if self.quantized:
+            self._full[self._size:end] = block
+            self._matrix[self._size:end], scales = self._encode(block)
+            if self._scales is not None:
+                self._scales[self._size:end] = scales
         else:
-            self.vectors = np.vstack((self.vectors, np.array(embeddings)))
+            self._matrix[self._size:end] = block
+        self._size = end
+        if not isinstance(self.documents, list):
+            # Loaded from disk: materialize before mutating
+            self.documents = list(self.documents)
+        self.documents.extend(documents)
+        if self._tombstones is not None:
+            self._tombstones = np.concatenate([self._tombstones, np.zeros(len(block), dtype=bool)])
             
-    def search(self, query_embedding: List[float], k: int = 3) -> List[Dict[str, Any]]:
-        """Find top-k similar documents using cosine similarity"""
-        if len(self.vectors) == 0:
+    def delete(self, rows: List[int]):
+        """Tombstone rows so search skips them"""
+        rows = np.unique(np.asarray(rows, dtype=np.intp))
+        if not len(rows):
+            return
+        if self._tombstones is None:
+            self._tombstones = np.zeros(self._size, dtype=bool)
+        self._deleted_count += int(np.count_nonzero(~self._tombstones[rows]))
+        self._tombstones[rows] = True
+        
+    def compact(self):
+        """Drop tombstoned rows"""
+        if not self._deleted_count:
+            return
+        keep = self.live_rows()
+        for name, array in self._row_arrays():
+            compacted = np.empty((max(len(keep), self._initial_capacity),) + array.shape[1:], dtype=array.dtype)
+            compacted[:len(keep)] = array[keep]
+            setattr(self, name, compacted)
+        self.documents = [self.documents[idx] for idx in keep]
+        self._size = len(keep)
+        self._tombstones = None
+        self._deleted_count = 0
+        
+    def clone(self) -> "SimpleVectorStore":
+        """Independent in-memory copy (modify the copy while searches use the original)"""
+        other = copy.copy(self)
+        for name, array in self._row_arrays():
+            copied = np.empty((max(self._size, self._initial_capacity),) + array.shape[1:], dtype=array.dtype)
+            copied[:self._size] = array[:self._size]
+            setattr(other, name, copied)
+        other.documents = list(self.documents)
+        if self._tombstones is not None:
+            other._tombstones = self._tombstones.copy()
+        return other
+        
+    def search(self, query_embedding: List[float], k: int = 3, mask: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Find top-k similar documents using cosine similarity (only rows where mask is True, if given)"""
+        if self._size == 0:
             return []
             
-        query_vec = np.array(query_embedding)
-        
-        # Calculate cosine similarity
-        # localized norm calculation to avoid devision by zero
-        norm_vectors = np.linalg.norm(self.vectors, axis=1)
+        query_vec = np.asarray(query_embedding, dtype=np.float32)
         norm_query = np.linalg.norm(query_vec)
-        
         if norm_query == 0:
             return []
             
-        similarities = np.dot(self.vectors, query_vec) / (norm_vectors * norm_query)
+        query_vec = query_vec / norm_query
+        rows, similarities = self._score(query_vec, mask)
+        return self._results(rows, similarities, self._top_k(similarities, self._candidates(k)), query_vec, k)
         
-        # Get top k indices
-        top_k_indices = np.argsort(similarities)[-k:][::-1]
+    def search_batch(self, query_matrix, k: int = 3, mask: Optional[np.ndarray] = None) -> List[List[Dict[str, Any]]]:
+        """Top-k documents for every query row, scored with one matrix multiply per block
         
-        results = []
-        for idx in top_k_indices:
-            results.append({
-                "document": self.documents[idx],
-                "score": float(similarities[idx])
-            })
+        Equivalent to [search(q, k) for q in query_matrix] without the per-query
+        Python and BLAS call overhead. Queries are processed in blocks so the
+        (queries x rows) score matrix stays under BATCH_SCORE_ELEMENTS.
+        """
+        queries = np.atleast_2d(np.asarray(query_matrix, dtype=np.float32))
+        if self._size == 0 or queries.shape[1] == 0:
+            return [[] for _ in range(len(queries))]
             
+        queries = self._normalize(queries)
+        block = max(1, self.BATCH_SCORE_ELEMENTS // self._size)
+        results = []
+        for start in range(0, len(queries), block):
+            chunk = queries[start:start + block]
+            rows, similarities = self._score_batch(chunk, mask)
+            top = self._top_k_rows(similarities, self._candidates(k))
+            for i, q in enumerate(chunk):
+                # Zero queries normalize to zero and have no meaningful neighbours
+                if not q.any():
+                    results.append([])
+                    continue
+                results.append(self._results(rows, similarities[i], top[i], q, k))
         return results
+        
+    def _candidates(self, k: int) -> int:
+        """How many candidates to select before rescoring (k when not rescoring)"""
+        if self.quantized and self.rescore_factor > 0:
+            return k * self.rescore_factor
+        return k
+        
+    def _results(
+        self,
+        rows: Optional[np.ndarray],
+        similarities: np.ndarray,
+        top: np.ndarray,
+        query_vec: np.ndarray,
+        k: int,
+    ) -> List[Dict[str, Any]]:
+        """Result dicts for the selected candidates (best first)
+        
+        Tombstoned candidates are dropped; for quantized stores with rescoring the
+        candidates are re-ranked by their exact float32 similarity.
+        """
+        top = top[similarities[top] != -np.inf]
+        physical = top if rows is None else rows[top]
+        scores = similarities[top]
+        if self.quantized and self.rescore_factor > 0 and len(physical):
+            order = np.argsort(physical)
+            exact = np.empty(len(physical), dtype=np.float32)
+            # Sorted row order keeps reads of a mapped vectors.npy sequential
+            exact[order] = self._full[physical[order]] @ query_vec
+            best = np.argsort(-exact, kind="stable")[:k]
+            physical, scores = physical[best], exact[best]
+        
+        return [
+            {"document": self.documents[row], "score": float(score)}
+            for row, score in zip(physical[:k], scores[:k])
+        ]
+        
+    def _score(self, query_vec: np.ndarray, mask: Optional[np.ndarray] = None) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """Similarities of candidate rows to a unit query (rows=None means every row)
+        
+        Tombstoned rows score -inf. A mask restricts scoring to its rows; subclasses
+        narrow the candidate set further (ANN).
+        """
+        rows = self._masked_rows(mask)
+        similarities = self._similarities(query_vec, rows)
+        if self._deleted_count:
+            similarities[self._tombstones if rows is None else self._tombstones[rows]] = -np.inf
+        return rows, similarities
+        
+    def _score_batch(self, query_matrix: np.ndarray, mask: Optional[np.ndarray] = None) -> Tuple[Optional[np.ndarray], np.ndarray]:
+        """Batched _score: a (queries x candidates) similarity matrix"""
+        rows = self._masked_rows(mask)
+        similarities = self._similarities(query_matrix, rows)
+        if self._deleted_count:
+            similarities[:, self._tombstones if rows is None else self._tombstones[rows]] = -np.inf
+        return rows, similarities
+        
+    def _masked_rows(self, mask: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Rows selected by a boolean row mask (None = every row)"""
+        if mask is None:
+            return None
+        return np.flatnonzero(mask[:self._size])
+        
+    def _similarities(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Dot products of the searched rows (all if None) with a query, or a (queries x rows) matrix
+        
+        Rows are unit length, so the dot product is the cosine similarity. Quantized
+        codes are converted to float32 block by block so the temporary stays small.
+        """
+        codes = self._matrix[:self._size] if rows is None else self._matrix[rows]
+        if not self.quantized:
+            return codes @ queries if queries.ndim == 1 else queries @ codes.T
+        
+        scales = None
+        if self._scales is not None:
+            scales = self._scales[:self._size] if rows is None else self._scales[rows]
+        similarities = np.empty(queries.shape[:-1] + (len(codes),), dtype=np.float32)
+        block_rows = max(1, self.DECODE_BLOCK_ELEMENTS // codes.shape[1])
+        for start in range(0, len(codes), block_rows):
+            end = start + block_rows
+            block = codes[start:end].astype(np.float32)
+            block = block @ queries if queries.ndim == 1 else queries @ block.T
+            if scales is not None:
+                block *= scales[start:end]
+            similarities[..., start:end] = block
+        return similarities
+        
+    def _encode(self, rows: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Quantize normalized float32 rows: (codes, per-row scales or None)"""
+        if self.precision == "float16":
+            return rows.astype(np.float16), None
+        # Symmetric scalar int8: the largest component of each row maps to +-127
+        scales = np.abs(rows).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.rint(rows / scales[:, None]).astype(np.int8)
+        return codes, scales.astype(np.float32)
+        
+    def _row_arrays(self) -> List[Tuple[str, np.ndarray]]:
+        """(attribute, array) of every per-row array that is allocated"""
+        return [
+            (name, getattr(self, name))
+            for name in ("_matrix", "_scales", "_full")
+            if getattr(self, name) is not None
+        ]
+        
+    def save(self, path: str | Path, metadata: Optional[Dict[str, Any]] = None):
+        """Write the index to a directory
+        
+        Layout: vectors.npy (normalized float32 rows), documents.jsonl plus
+        offsets.npy (byte offset of each document) and manifest.json, written last.
+        Quantized stores also write codes.npy and, for int8, scales.npy.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        # Tombstoned rows are not written
+        live = self.live_rows() if self._deleted_count else slice(None)
+        vectors = self.vectors[live]
+        np.save(path / "vectors.npy", np.ascontiguousarray(vectors))
+        if self.quantized:
+            np.save(path / "codes.npy", np.ascontiguousarray(self._matrix[:self._size][live]))
+            if self._scales is not None:
+                np.save(path / "scales.npy", self._scales[:self._size][live])
+        
+        offsets = [0]
+        with open(path / "documents.jsonl", "wb") as f:
+            for doc in self.iter_documents():
+                line = json.dumps(doc, ensure_ascii=False).encode("utf-8") + b"\n"
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+        np.save(path / "offsets.npy", np.asarray(offsets, dtype=np.int64))
+        
+        manifest = {"format": 1, "count": len(vectors), "dim": vectors.shape[1], "precision": self.precision}
+        manifest.update(metadata or {})
+        with open(path / "manifest.json", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+            
+    @classmethod
+    def load(cls, path: str | Path) -> "SimpleVectorStore":
+        """Load an index written by save(); vectors and documents are memory-mapped
+        
+        The store keeps the configured precision: an index saved at a different
+        precision is re-quantized in memory from its float32 rows.
+        """
+        path = Path(path)
+        manifest = cls.read_manifest(path)
+        if manifest is None:
+            raise FileNotFoundError(f"No index manifest in {path}")
+            
+        store = cls()
+        if manifest["count"] == 0:
+            return store
+        vectors = np.load(path / "vectors.npy", mmap_mode="r")
+        store._size = len(vectors)
+        store.documents = MappedDocuments(path / "documents.jsonl", path / "offsets.npy")
+        if not store.quantized:
+            store._matrix = vectors
+            return store
+        
+        store._full = vectors
+        if manifest.get("precision", "float32") == store.precision:
+            store._matrix = np.load(path / "codes.npy", mmap_mode="r")
+            if store.precision == "int8":
+                store._scales = np.load(path / "scales.npy", mmap_mode="r")
+            return store
+        
+        print(f"Quantizing RAG index {path} to {store.precision} (saved as {manifest.get('precision', 'float32')})")
+        store._matrix = np.empty(vectors.shape, dtype=cls.PRECISIONS[store.precision])
+        if store.precision == "int8":
+            store._scales = np.empty(len(vectors), dtype=np.float32)
+        block_rows = max(1, cls.DECODE_BLOCK_ELEMENTS // vectors.shape[1])
+        for start in range(0, len(vectors), block_rows):
+            end = start + block_rows
+            codes, scales = store._encode(np.asarray(vectors[start:end]))
+            store._matrix[start:end] = codes
+            if scales is not None:
+                store._scales[start:end] = scales
+        return store
+        
+    @staticmethod
+    def read_manifest(path: str | Path) -> Optional[Dict[str, Any]]:
+        """Manifest of a saved index, or None if the directory holds no complete index"""
+        manifest_path = Path(path) / "manifest.json"
+        if not manifest_path.exists():
+            return None
+        try:
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        
+    def _reserve(self, needed: int, dim: int):
+        """Make room for `needed` rows, doubling capacity instead of copying per insert"""
+        if self._matrix is None:
+            capacity = max(self._initial_capacity, needed)
+            self._matrix = np.empty((capacity, dim), dtype=self.PRECISIONS[self.precision])
+            if self.quantized:
+                self._full = np.empty((capacity, dim), dtype=np.float32)
+            if self.precision == "int8":
+                self._scales = np.empty(capacity, dtype=np.float32)
+            return
+            
+        if dim != self._matrix.shape[1]:
+            raise ValueError(f"Embedding dimension mismatch: {dim} != {self._matrix.shape[1]}")
+        arrays = self._row_arrays()
+        if needed <= len(self._matrix) and all(array.flags.writeable for _, array in arrays):
+            return
+            
+        # Also reached for read-only memory-mapped arrays (copy on first write)
+        capacity = max(len(self._matrix), 1)
+        while capacity < needed:
+            capacity *= 2
+        for name, array in arrays:
+            grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:self._size] = array[:self._size]
+            setattr(self, name, grown)
+        
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        """L2-normalize rows (zero rows stay zero)"""
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+        
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the k highest scores, best first (O(n) selection + O(k log k) sort)"""
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+        if k < len(scores):
+            candidates = np.argpartition(scores, -k)[-k:]
+        else:
+            candidates = np.arange(len(scores))
+        return candidates[np.argsort(scores[candidates])[::-1]]
+        
+    @staticmethod
+    def _top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+        """Row-wise _top_k over a 2-D score matrix"""
+        k = min(k, scores.shape[1])
+        if k <= 0:
+            return np.empty((len(scores), 0), dtype=np.intp)
+        if k < scores.shape[1]:
+            candidates = np.argpartition(scores, -k, axis=1)[:, -k:]
+        else:
+            candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        order = np.argsort(np.take_along_axis(scores, candidates, axis=1), axis=1)[:, ::-1]
+        return np.take_along_axis(candidates, order, axis=1)
+
+# Bump when the chunking or on-disk index layout changes
+INDEX_FORMAT_VERSION = 4
+
+# Share of tombstoned rows above which a refreshed store is compacted
+COMPACT_TOMBSTONE_RATIO = 0.25
+
+# Project key of RAGManager() (RAG_PROJECT_ROOT)
+DEFAULT_PROJECT = "default"
+
+# Index directories are named by the first 16 hex digits of the corpus fingerprint
+_INDEX_DIR_RE = re.compile(r"[0-9a-f]{16}")
+
+# Reciprocal rank fusion constant (60 is the value from the original RRF paper)
+RRF_K = 60
+
+
+def chunk_id(chunk: Dict[str, Any]) -> str:
+    """Stable identity of a chunk (source file, header and content)"""
+    raw = "\0".join((chunk["source"], chunk["header"], chunk["content"]))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def reciprocal_rank_fusion(rankings: List[List[Tuple[Dict[str, Any], float]]], k: int) -> List[Dict[str, Any]]:
+    """Fuse ranked (document, score) lists with reciprocal rank fusion
+    
+    "score" is the fused score scaled so that 1.0 means ranked first by every
+    non-empty ranking; the original scores are kept as vector_score/lexical_score.
+    """
+    names = ["vector_score", "lexical_score"]
+    fused: Dict[str, Dict[str, Any]] = {}
+    for name, hits in zip(names, rankings):
+        for rank, (doc, score) in enumerate(hits):
+            key = doc.get("chunk_id") or f"{doc['source']}#{doc['header']}"
+            entry = fused.setdefault(key, {"document": doc, "rrf": 0.0})
+            entry["rrf"] += 1.0 / (RRF_K + rank + 1)
+            entry[name] = score
+            
+    best = sum(1 for hits in rankings if hits) / (RRF_K + 1)
+    results = []
+    for entry in sorted(fused.values(), key=lambda e: e["rrf"], reverse=True)[:k]:
+        result = {"document": entry["document"], "score": entry["rrf"] / best}
+        result.update({name: entry[name] for name in names if name in entry})
+        results.append(result)
+    return results
+
+
+def create_vector_store() -> SimpleVectorStore:
+    """Empty vector store of the configured backend (RAG_INDEX_BACKEND)"""
+    return _vector_store_class()()
+
+
+def _vector_store_class() -> type:
+    if get_settings().rag_index_backend == "ivf":
+        from src.agent.ann_index import IVFVectorStore
+        return IVFVectorStore
+    return SimpleVectorStore
+
+
+@contextmanager
+def _index_build_lock(index_root: Path):
+    """Inter-process lock so concurrent workers don't build the same index"""
+    index_root.mkdir(parents=True, exist_ok=True)
+    try:
+        import fcntl
+    except ImportError:  # Windows: no locking, workers may build concurrently
+        yield
+        return
+    with open(index_root / ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def project_roots() -> Dict[str, str]:
+    """RAG_PROJECTS as {project key: project root} (the default project is not listed)"""
+    roots = {}
+    for entry in get_settings().rag_projects.split(","):
+        key, sep, root = entry.strip().partition("=")
+        if sep and key.strip() and root.strip():
+            roots[key.strip()] = root.strip()
+    return roots
+
+
+def is_known_project(project: Optional[str]) -> bool:
+    """Whether RAGManager(project) is valid: no key, the default key or a RAG_PROJECTS key"""
+    return not project or project == DEFAULT_PROJECT or project in project_roots()
+
+
+def rag_unavailable_reason() -> Optional[str]:
+    """Why RAG cannot run with the current settings, or None if it can"""
+    settings = get_settings()
+    if settings.embedding_provider == "openai" and not settings.openai_api_key:
+        return "OpenAI API Key missing for OpenAI Embeddings"
+    if settings.embedding_provider == "local" and not Path(settings.local_embedding_model_dir).is_dir():
+        return f"Local embedding model directory not found: {settings.local_embedding_model_dir}"
+    return None
+
 
 class RAGManager:
-    """Manages RAG operations"""
+    """Manages RAG operations
     
-    _instance = None
+    There is one manager per project (tenant) key: RAGManager() serves the
+    default project (RAG_PROJECT_ROOT), RAGManager("team-a") a project listed in
+    RAG_PROJECTS. Each project has its own corpus, index directory and embedding
+    cache; the embedding client, query embedding cache and embed pool are shared.
     
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(RAGManager, cls).__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
+    Constructing a manager is cheap. On first use, the last persisted index of
+    the current settings is loaded in the caller's thread (memory-mapped, so
+    this takes milliseconds and does not read the corpus); a background refresh
+    then scans the corpus and re-indexes what changed since it was saved.
+    Without a persisted index, it is built by a background warm-up thread
+    (start_warmup(), runs once per manager). Until it is built,
+    search() answers lexical-only from the loaded rule chunks, or returns
+    nothing if they are not loaded yet. When the resident indexes exceed
+    RAG_INDEX_MEMORY_BUDGET_MB, the least recently used projects are evicted and
+    reloaded from their persisted index on next use.
     
-    def __init__(self):
+    The vector store is replaced, never mutated, once it is serving searches:
+    refreshes build a new store and swap the attribute, so search() always sees
+    a complete index and never waits for a rebuild.
+    """
+    
+    # project key -> manager, least recently used first
+    _instances: "OrderedDict[str, RAGManager]" = OrderedDict()
+    _instance_lock = threading.Lock()
+    # (embedding client, query embedding cache, query embed pool) shared by every project
+    _shared: Optional[Tuple[Any, QueryEmbeddingCache, ThreadPoolExecutor]] = None
+    
+    def __new__(cls, project: Optional[str] = None):
+        key = project or DEFAULT_PROJECT
+        with cls._instance_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                if not is_known_project(key):
+                    raise ValueError(f"Unknown RAG project: {key}")
+                instance = super(RAGManager, cls).__new__(cls)
+                instance._initialized = False
+                cls._instances[key] = instance
+            cls._instances.move_to_end(key)
+        return instance
+    
+    def __init__(self, project: Optional[str] = None):
         if self._initialized:
             return
             
-        self.llm_client = get_embedding_client() # Use dedicated embedding client
-        self.vector_store = SimpleVectorStore()
-        self.loader = RuleLoader()
-        self._initialize_knowledge_base()
-        self._initialized = True
+        with self._instance_lock:
+            if self._initialized:
+                return
+            settings = get_settings()
+            if RAGManager._shared is None:
+                RAGManager._shared = (
+                    get_embedding_client(), # Use dedicated embedding client
+                    QueryEmbeddingCache(settings.rag_query_cache_size, settings.rag_query_cache_ttl),
+                    ThreadPoolExecutor(max_workers=4, thread_name_prefix="rag-query-embed"),
+                )
+            self.llm_client, self.query_cache, self._embed_pool = RAGManager._shared
+            self.project = project or DEFAULT_PROJECT
+            self._embedding_cache: Optional[EmbeddingCache] = None
+            # (vector store, BM25 index over its live rows, filter masks), replaced together in one assignment
+            store = create_vector_store()
+            self._active: Tuple[SimpleVectorStore, Optional[BM25Index], CorpusFilter] = (
+                store, None, CorpusFilter(store.documents)
+            )
+            self.loader = CorpusLoader(root=project_roots().get(self.project))
+            # Chunks of every rule file as last loaded (before dedup), for refresh_index
+            self._source_chunks: Optional[Dict[str, List[Dict[str, Any]]]] = None
+            # (store, its markdown section headers) for get_suggested_topics
+            self._topics: Optional[Tuple[SimpleVectorStore, List[str]]] = None
+            self._deduplicator: Optional[MinHashDeduplicator] = None
+            if settings.rag_dedup_threshold > 0:
+                languages = [name.strip() for name in settings.rag_dedup_languages.split(",") if name.strip()]
+                self._deduplicator = MinHashDeduplicator(settings.rag_dedup_threshold, languages=languages)
+            self._refresh_lock = threading.Lock()
+            self._refresh_stop = threading.Event()
+            self._refresh_thread: Optional[threading.Thread] = None
+            # Warm-up state: idle -> warming -> ready | degraded (no vectors) | failed
+            self._status = "idle"
+            self._status_error: Optional[str] = None
+            self._warmup_thread: Optional[threading.Thread] = None
+            self._warmup_done = threading.Event()
+            # First searches wait on it while a persisted index is loaded synchronously
+            self._load_lock = threading.Lock()
+            # (chunks, BM25 index) serving lexical-only searches while the vector index is built
+            self._warmup_lexical: Optional[Tuple[List[Dict[str, Any]], BM25Index, CorpusFilter]] = None
+            self._initialized = True
+            
+    @classmethod
+    def existing(cls, project: Optional[str] = None) -> Optional["RAGManager"]:
+        """The initialized manager of a project, without creating or loading it"""
+        instance = cls._instances.get(project or DEFAULT_PROJECT)
+        if instance is None or not instance._initialized:
+            return None
+        return instance
+        
+    @classmethod
+    def resident(cls) -> List["RAGManager"]:
+        """Initialized managers, least recently used first"""
+        with cls._instance_lock:
+            return [instance for instance in cls._instances.values() if instance._initialized]
+            
+    def memory_nbytes(self) -> int:
+        """Approximate resident size of the index: vectors held in RAM plus documents"""
+        store = self.vector_store
+        documents = store.documents
+        if isinstance(documents, MappedDocuments):
+            document_bytes = documents.nbytes
+        else:
+            document_bytes = sum(len(doc["content"]) for doc in documents)
+        return store.resident_nbytes + document_bytes
+        
+    @classmethod
+    def _enforce_memory_budget(cls, keep: str):
+        """Evict least recently used projects until the resident indexes fit the budget"""
+        budget = get_settings().rag_index_memory_budget_mb * 2**20
+        if budget <= 0:
+            return
+        managers = cls.resident()
+        total = sum(manager.memory_nbytes() for manager in managers)
+        for manager in managers:
+            if total <= budget:
+                break
+            if manager.project == keep or manager._status in ("idle", "warming"):
+                continue
+            total -= manager.memory_nbytes()
+            manager.evict()
+            
+    def evict(self):
+        """Drop this project's index from memory; the next use reloads it from disk
+        
+        The manager leaves the registry, so RAGManager(project) creates a fresh
+        one. A caller still holding this object reaches the registry again on
+        its next search: it is re-registered (and counted by the memory budget)
+        before reloading, or forwards to the manager that replaced it.
+        """
+        with self._instance_lock:
+            if RAGManager._instances.get(self.project) is self:
+                del RAGManager._instances[self.project]
+        self.stop_auto_refresh()
+        with self._refresh_lock:
+            store = create_vector_store()
+            self._active = (store, None, CorpusFilter(store.documents))
+            self._topics = None
+            self._source_chunks = None
+            self._warmup_lexical = None
+            self._embedding_cache = None
+            self._status = "idle"
+            self._warmup_thread = None
+            self._warmup_done = threading.Event()
+        print(f"RAG index of project '{self.project}' evicted (memory budget).")
+            
+    @property
+    def is_ready(self) -> bool:
+        """True once the vector index is serving searches"""
+        return self._status == "ready"
+        
+    def start_warmup(self) -> Optional[threading.Thread]:
+        """Load or build the index in a background thread; only the first call starts it"""
+        with self._instance_lock:
+            if self._warmup_thread is None and not self._warmup_done.is_set():
+                self._status = "warming"
+                self._warmup_thread = threading.Thread(target=self._warm_up, name="rag-warmup", daemon=True)
+                self._warmup_thread.start()
+            return self._warmup_thread
+            
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Load or start the warm-up if needed and block until it finishes; True if the index is ready"""
+        manager = self._registered()
+        if manager is not self:
+            return manager.wait_until_ready(timeout)
+        self._ensure_loaded()
+        self._warmup_done.wait(timeout)
+        return self.is_ready
+        
+    def _registered(self) -> "RAGManager":
+        """The registry's manager of this project; an evicted manager re-registers itself unless replaced"""
+        with self._instance_lock:
+            manager = RAGManager._instances.setdefault(self.project, self)
+            RAGManager._instances.move_to_end(self.project)
+            return manager
+        
+    def readiness(self) -> Dict[str, Any]:
+        """Warm-up status for the readiness endpoint"""
+        warmup = self._warmup_lexical
+        return {
+            "status": self._status,
+            "chunks": len(self.vector_store),
+            "lexical_only_chunks": len(warmup[0]) if warmup is not None else 0,
+            "error": self._status_error,
+        }
+        
+    def _warm_up(self):
+        """Background initializer (run once by start_warmup)"""
+        started = time.perf_counter()
+        try:
+            # Refreshes wait until the initial index is in place
+            with self._refresh_lock:
+                self._initialize_knowledge_base()
+        except Exception as e:
+            print(f"RAG Initialization Failed: {e}")
+            self._status_error = str(e)
+            self._status = "failed"
+            self._warmup_done.set()
+            return
+            
+        self._finish_warmup(started)
+        
+    def _ensure_loaded(self):
+        """First use: load the persisted index right away, or start building it in the background"""
+        with self._load_lock:
+            if self._status == "idle" and self._warmup_thread is None and not self._warmup_done.is_set():
+                started = time.perf_counter()
+                try:
+                    with self._refresh_lock:
+                        loaded = self._load_persisted()
+                except Exception as e:
+                    print(f"RAG index load failed, building in the background: {e}")
+                    loaded = False
+                if loaded:
+                    self._finish_warmup(started)
+                    # The corpus may have changed since the index was saved
+                    threading.Thread(target=self._refresh_quietly, name="rag-refresh", daemon=True).start()
+                    return
+            self.start_warmup()
+            
+    def _load_persisted(self) -> bool:
+        """Load the newest saved index of the current settings without scanning the corpus
+        
+        The loader adopts the file states saved with the index, so a later
+        refresh_index() only re-reads files that changed since.
+        """
+        index_root = self._project_dir(get_settings().rag_index_dir)
+        config = self._config_key()
+        candidates = []
+        try:
+            for path in index_root.iterdir():
+                if not (path.is_dir() and _INDEX_DIR_RE.fullmatch(path.name)):
+                    continue
+                manifest = SimpleVectorStore.read_manifest(path)
+                if manifest and manifest.get("config") == config and "files" in manifest:
+                    candidates.append((path.stat().st_mtime, path, manifest))
+        except FileNotFoundError:
+            return False
+        if not candidates:
+            return False
+        _, index_path, manifest = max(candidates, key=lambda candidate: candidate[0])
+        self.loader.restore(manifest["files"])
+        if self._load_index(index_path, manifest["fingerprint"]):
+            return True
+        self.loader.restore({})
+        return False
+            
+    def _finish_warmup(self, started: float):
+        """Mark the index as serving (or degraded), then apply the memory budget and auto-refresh"""
+        if len(self.vector_store):
+            self._status = "ready"
+            self._warmup_lexical = None
+        else:
+            # Nothing could be embedded: keep answering from the lexical index
+            self._status = "degraded"
+        self._warmup_done.set()
+        print(f"RAG warm-up of project '{self.project}' finished in {time.perf_counter() - started:.1f}s ({self._status}).")
+        self._enforce_memory_budget(keep=self.project)
+        
+        interval = get_settings().rag_refresh_interval
+        if interval > 0:
+            self.start_auto_refresh(interval)
+            
+    @property
+    def vector_store(self) -> SimpleVectorStore:
+        """The store currently serving searches"""
+        return self._active[0]
+        
+    def _activate(self, store: SimpleVectorStore):
+        """Build the lexical index for a store, then swap it in atomically with its filter masks
+
+        The lexical pass decodes every live document anyway, so the suggested
+        topics are collected on the way.
+        """
+        lexical = None
+        if get_settings().rag_hybrid_search:
+            rows = store.live_rows()
+            docs = [store.documents[row] for row in rows]
+            lexical = BM25Index([self._lexical_text(doc) for doc in docs], rows)
+            self._topics = (store, self._topic_headers(docs))
+        self._active = (store, lexical, CorpusFilter(store.documents))
+        
+    @staticmethod
+    def _lexical_text(doc: Dict[str, Any]) -> str:
+        """Text indexed by BM25 for a chunk (the file name helps identifier queries)"""
+        return f"{doc['source']}\n{doc['content']}"
+        
+    @property
+    def embedding_cache(self) -> EmbeddingCache:
+        """Chunk embedding cache (only read from disk when the index has to be built)"""
+        if self._embedding_cache is None:
+            settings = get_settings()
+            self._embedding_cache = EmbeddingCache(
+                self._project_dir(settings.rag_cache_dir),
+                self.llm_client.embedding_provider,
+                self.llm_client.embedding_model,
+                max_entries=settings.embedding_cache_max_entries,
+            )
+        return self._embedding_cache
         
     def _initialize_knowledge_base(self):
-        """Load rules and build index"""
+        """Load the prebuilt index for the current rules, or build and persist it"""
         print("Initializing RAG Knowledge Base...")
-        chunks = self.loader.load_rules()
+        self.loader.scan()
+        index_root, index_path, fingerprint = self._index_location()
         
-        if not chunks:
-            print("No rules found to index.")
+        if self._load_index(index_path, fingerprint):
             return
             
-        print(f"Found {len(chunks)} chunks. Generating embeddings...")
-        embeddings = []
+        # One worker builds while the others wait, then they all load the same files
+        with _index_build_lock(index_root):
+            if self._load_index(index_path, fingerprint):
+                return
+            if self._build_index() and self._save_index(index_root, index_path, fingerprint):
+                # Re-open the saved files so this worker also shares the mapped pages
+                self._load_index(index_path, fingerprint)
+                
+    def _project_dir(self, base: str) -> Path:
+        """Per-project subdirectory of a cache/index directory (the default project uses it directly)"""
+        if self.project == DEFAULT_PROJECT:
+            return Path(base)
+        return Path(base) / "projects" / self.project
         
-        # Batch processing could be added here if needed
-        for chunk in chunks:
-            try:
-                # Embed content
-                embedding = self.llm_client.embed(chunk["content"])
-                embeddings.append(embedding)
-            except Exception as e:
-                print(f"Error embedding chunk {chunk['header']}: {e}")
-                # Use zero vector or skip? skipping for now to avoid dimension mismatch
-                # Actually if embed fails, we can't search.
-                # Let's clean up logic: only add successful embeddings
-                pass
+    def _index_location(self) -> Tuple[Path, Path, str]:
+        """(index root, directory of the current corpus version, corpus fingerprint)"""
+        index_root = self._project_dir(get_settings().rag_index_dir)
+        fingerprint = self._corpus_fingerprint()
+        return index_root, index_root / fingerprint[:16], fingerprint
+        
+    def _corpus_fingerprint(self) -> str:
+        """Identifies the rules corpus together with the embedding space and index format"""
+        parts = [self._config_key(), self.loader.fingerprint()]
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
         
-        # Filter chunks that correspond to successful embeddings
-        # This is a bit naive, realistically we should match index
-        # Let's redo to ensure alignment
+    def _config_key(self) -> str:
+        """Everything an index depends on except the corpus files: format, embedding space, chunking"""
+        settings = get_settings()
+        parts = [
+            str(INDEX_FORMAT_VERSION),
+            self.llm_client.embedding_provider,
+            self.llm_client.embedding_model,
+            f"dedup={settings.rag_dedup_threshold}/{settings.rag_dedup_languages}",
+            f"sources={settings.rag_sources}",
+            f"chunks={settings.rag_chunk_min_tokens}/{settings.rag_chunk_max_tokens}/{settings.rag_chunk_overlap_tokens}",
+        ]
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
         
+    def _load_index(self, index_path: Path, fingerprint: str) -> bool:
+        """Swap in a persisted index if it matches the corpus fingerprint"""
+        manifest = SimpleVectorStore.read_manifest(index_path)
+        if manifest is None or manifest.get("fingerprint") != fingerprint:
+            return False
+        try:
+            self._activate(_vector_store_class().load(index_path))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Failed to load RAG index {index_path}: {e}")
+            return False
+        print(f"RAG Knowledge Base loaded from {index_path} ({len(self.vector_store)} chunks).")
+        return True
+        
+    def _save_index(self, index_root: Path, index_path: Path, fingerprint: str) -> bool:
+        """Persist the current index and drop indexes of older corpus versions"""
+        tmp_path = index_root / f".tmp-{os.getpid()}"
+        try:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            self.vector_store.save(tmp_path, metadata={
+                "fingerprint": fingerprint,
+                "config": self._config_key(),
+                "files": self.loader.file_states(),
+            })
+            shutil.rmtree(index_path, ignore_errors=True)
+            os.replace(tmp_path, index_path)
+        except OSError as e:
+            print(f"Failed to save RAG index: {e}")
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            return False
+            
+        # Processes still mapping an old index keep their open files; other projects'
+        # indexes live under projects/ and are left alone
+        for old_path in index_root.iterdir():
+            if old_path.is_dir() and old_path != index_path and _INDEX_DIR_RE.fullmatch(old_path.name):
+                shutil.rmtree(old_path, ignore_errors=True)
+        return True
+                
+    def _build_index(self) -> bool:
+        """Load rules, embed uncached chunks and swap in a new vector store
+        
+        Returns True when every chunk was embedded (the index is safe to persist).
+        """
+        self._source_chunks = {}
+        for chunk in self.loader.iter_chunks():
+            self._source_chunks.setdefault(chunk["source"], []).append(chunk)
+        chunks = self._prepare_chunks()
+        
+        if not chunks:
+            print("No rules found to index.")
+            return False
+            
+        if not self.is_ready:
+            # Serve lexical-only results while the chunks are embedded
+            self._warmup_lexical = (
+                chunks, BM25Index([self._lexical_text(chunk) for chunk in chunks]), CorpusFilter(chunks)
+            )
+        embeddings = self._embed_chunks(chunks)
+        self._prune_embedding_cache(chunks)
+        
+        # Only add chunks that have an embedding
         valid_chunks = []
         valid_embeddings = []
-        
-        for chunk in chunks:
-            try:
-                embedding = self.llm_client.embed(chunk["content"])
+        for chunk, embedding in zip(chunks, embeddings):
+            if embedding is not None:
                 valid_chunks.append(chunk)
                 valid_embeddings.append(embedding)
-            except Exception as e:
-                print(f"Failed to embed chunk in {chunk['source']}: {e}")
+            else:
+                # Retried by the next refresh_index()
+                self.loader.forget(chunk["source"])
                 
         if valid_chunks:
-            self.vector_store.add_documents(valid_chunks, valid_embeddings)
+            store = create_vector_store()
+            store.add_documents(valid_chunks, valid_embeddings)
+            self._activate(store)
             print(f"RAG Knowledge Base initialized with {len(valid_chunks)} chunks.")
+        return len(valid_chunks) == len(chunks)
+        
+    def _prepare_chunks(self) -> List[Dict[str, Any]]:
+        """Chunks of all loaded files with chunk ids, near-duplicates collapsed"""
+        chunks = [chunk for source in sorted(self._source_chunks) for chunk in self._source_chunks[source]]
+        for chunk in chunks:
+            chunk["chunk_id"] = chunk_id(chunk)
+        if self._deduplicator is None:
+            return chunks
+            
+        canonical = self._deduplicator.deduplicate(chunks)
+        if len(canonical) < len(chunks):
+            print(f"Collapsed {len(chunks) - len(canonical)} near-duplicate chunks ({len(canonical)} remain).")
+        return canonical
+        
+    @staticmethod
+    def _doc_key(doc: Dict[str, Any]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+        """Identity of an indexed chunk: chunk id plus the locations it stands for"""
+        locations = tuple((loc["source"], loc["header"]) for loc in doc.get("locations", ()))
+        return doc.get("chunk_id", ""), locations
+        
+    def _embed_chunks(self, chunks: List[Dict[str, Any]]) -> List[Optional[List[float]]]:
+        """Embeddings aligned with chunks (None where embedding failed)
+        
+        Only chunks whose content is not in the embedding cache hit the embedding API.
+        """
+        keys = [content_hash(chunk["content"]) for chunk in chunks]
+        embeddings = dict(zip(keys, self.embedding_cache.get_many(keys)))
+        missing = {key: chunk for key, chunk in zip(keys, chunks) if embeddings[key] is None}
+        if not missing:
+            return [embeddings[key] for key in keys]
+        print(f"Embedding {len(missing)} of {len(chunks)} chunks (the rest are cached)...")
+        
+        # Embed in slices of (batch size x concurrency) so one failed request
+        # only loses its own slice, and finished slices are already cached
+        settings = get_settings()
+        missing_keys = list(missing)
+        step = settings.embedding_batch_size * settings.embedding_max_concurrency
+        for start in range(0, len(missing_keys), step):
+            slice_keys = missing_keys[start:start + step]
+            try:
+                vectors = self.llm_client.embed_many([missing[key]["content"] for key in slice_keys])
+            except Exception as e:
+                print(f"Failed to embed {len(slice_keys)} chunks: {e}")
+                continue
+            for key, embedding in zip(slice_keys, vectors):
+                embeddings[key] = embedding
+                self.embedding_cache.put(key, embedding)
+                
+        try:
+            self.embedding_cache.save()
+        except OSError as e:
+            print(f"Failed to save embedding cache: {e}")
+        return [embeddings[key] for key in keys]
+        
+    def _prune_embedding_cache(self, documents):
+        """Evict cached embeddings that no indexed chunk references"""
+        self.embedding_cache.prune(content_hash(doc["content"]) for doc in documents)
+        try:
+            self.embedding_cache.save()
+        except OSError as e:
+            print(f"Failed to save embedding cache: {e}")
             
-    def search(self, query: str, k: int = 3) -> List[Dict[str, Any]]:
-        """Search for relevant rules"""
+    def refresh_index(self) -> Dict[str, int]:
+        """Re-index only the rule files that were added, changed or removed
+        
+        Only changed files are re-read. The chunk list (after dedup) is matched
+        against the live rows by chunk_id and duplicate locations, so only new or
+        edited sections are embedded and removed ones are tombstoned. The result is
+        built on a copy of the store and swapped in with a single assignment.
+        """
+        with self._refresh_lock:
+            if self._status == "idle":
+                # Evicted while this refresh waited; the next load reads the saved index
+                return {"files_changed": 0, "files_removed": 0, "chunks_added": 0, "chunks_removed": 0}
+            changed, removed = self.loader.scan()
+            stats = {"files_changed": len(changed), "files_removed": len(removed),
+                     "chunks_added": 0, "chunks_removed": 0}
+            if not changed and not removed:
+                return stats
+                
+            if self._source_chunks is None:
+                # Index was loaded from disk: read every file once
+                self._source_chunks = {}
+                changed = sorted(self.loader.files())
+            for filename in removed:
+                self._source_chunks.pop(filename, None)
+            for filename in changed:
+                self._source_chunks[filename] = self.loader.load_file(filename)
+            new_chunks = self._prepare_chunks()
+            
+            # Live rows by identity; a near-duplicate group that gained or lost a member is re-added
+            old_store = self.vector_store
+            old_rows: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], List[int]] = {}
+            for row in old_store.live_rows():
+                old_rows.setdefault(self._doc_key(old_store.documents[row]), []).append(int(row))
+                
+            added = []
+            for chunk in new_chunks:
+                rows = old_rows.get(self._doc_key(chunk))
+                if rows:
+                    rows.pop()  # unchanged section keeps its row
+                else:
+                    added.append(chunk)
+            stale_rows = [row for rows in old_rows.values() for row in rows]
+            
+            embeddings = self._embed_chunks(added)
+            embedded = [(chunk, emb) for chunk, emb in zip(added, embeddings) if emb is not None]
+            for chunk, embedding in zip(added, embeddings):
+                if embedding is None:
+                    self.loader.forget(chunk["source"])
+                    
+            new_store = old_store.clone()
+            new_store.delete(stale_rows)
+            if embedded:
+                new_store.add_documents([chunk for chunk, _ in embedded], [emb for _, emb in embedded])
+            if new_store.tombstone_ratio > COMPACT_TOMBSTONE_RATIO:
+                new_store.compact()
+                
+            # Atomic swap: in-flight searches finish on the store they already hold
+            self._activate(new_store)
+            if self._status == "degraded" and len(new_store):
+                self._status = "ready"
+                self._warmup_lexical = None
+            stats["chunks_added"] = len(embedded)
+            stats["chunks_removed"] = len(stale_rows)
+            print(f"RAG index refreshed: {stats}")
+            
+            self._prune_embedding_cache(new_store.iter_documents())
+            if len(embedded) == len(added):
+                index_root, index_path, fingerprint = self._index_location()
+                with _index_build_lock(index_root):
+                    # Another worker may already have saved this corpus version
+                    if not self._load_index(index_path, fingerprint):
+                        if self._save_index(index_root, index_path, fingerprint):
+                            self._load_index(index_path, fingerprint)
+            return stats
+            
+    def start_auto_refresh(self, interval: float):
+        """Poll the rules directory every `interval` seconds in a daemon thread"""
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        self._refresh_stop.clear()
+        
+        def poll():
+            while not self._refresh_stop.wait(interval):
+                self._refresh_quietly()
+                    
+        self._refresh_thread = threading.Thread(target=poll, name="rag-refresh", daemon=True)
+        self._refresh_thread.start()
+        
+    def _refresh_quietly(self):
         try:
-            query_embedding = self.llm_client.embed(query)
-            return self.vector_store.search(query_embedding, k=k)
+            self.refresh_index()
         except Exception as e:
-            print(f"Search failed: {e}")
-            return []
+            print(f"RAG refresh failed: {e}")
             
-    def get_suggested_topics(self, limit: int = 5) -> List[str]:
-        """Get random topics (headers) from loaded rules"""
-        import random
+    def stop_auto_refresh(self):
+        """Stop the polling thread started by start_auto_refresh()"""
+        self._refresh_stop.set()
+            
+    def search(
+        self,
+        query: str,
+        k: int = 3,
+        source_type: Optional[str | Sequence[str]] = None,
+        path_prefix: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Search for relevant rules, docs and code
+        
+        With hybrid search on, vector and BM25 rankings are fused (RRF). The query
+        embedding runs alongside the lexical search and is abandoned after
+        RAG_QUERY_EMBED_TIMEOUT seconds, so exact identifier matches are still
+        answered when the embedding backend is slow or down.
+        
+        source_type (a RAG_SOURCES name or a list of names) and path_prefix restrict
+        the search; they select a cached row mask that both indexes score against.
         
-        all_docs = self.vector_store.documents
-        if not all_docs:
+        Before the warm-up has finished, only the lexical index is searched.
+        """
+        if not self.is_ready:
+            manager = self._registered()
+            if manager is not self:
+                return manager.search(query, k, source_type, path_prefix)
+            self._ensure_loaded()
+        if not self.is_ready:
+            return self._search_warming(query, k, source_type, path_prefix)
+            
+        store, lexical, filters = self._active
+        mask = filters.mask(source_type, path_prefix)
+        if lexical is None:
+            try:
+                query_embedding = self._embed_query(query)
+                return store.search(query_embedding, k=k, mask=mask)
+            except Exception as e:
+                print(f"Search failed: {e}")
+                return []
+                
+        depth = max(k * 4, 20)
+        embedding_future = self._embed_pool.submit(self._embed_query, query)
+        lexical_hits = [(store.documents[row], score) for row, score in lexical.search(query, k=depth, mask=mask)]
+        
+        vector_hits = []
+        try:
+            query_embedding = embedding_future.result(timeout=get_settings().rag_query_embed_timeout)
+            vector_hits = [(r["document"], r["score"]) for r in store.search(query_embedding, k=depth, mask=mask)]
+        except FuturesTimeoutError:
+            print("Query embedding timed out, using lexical results only")
+        except Exception as e:
+            print(f"Vector search failed, using lexical results only: {e}")
+            
+        return reciprocal_rank_fusion([vector_hits, lexical_hits], k)
+            
+    def search_many(
+        self,
+        queries: List[str],
+        k: int = 3,
+        source_type: Optional[str | Sequence[str]] = None,
+        path_prefix: Optional[str] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """Search for many queries at once (query expansion, evaluation runs, bulk checks)
+        
+        Uncached queries are embedded in one embed_many call and scored with a
+        single store.search_batch; results match search() query by query.
+        """
+        if not queries:
             return []
+        if not self.is_ready:
+            manager = self._registered()
+            if manager is not self:
+                return manager.search_many(queries, k, source_type, path_prefix)
+            self._ensure_loaded()
+        if not self.is_ready:
+            return [self._search_warming(query, k, source_type, path_prefix) for query in queries]
             
-        # Extract unique headers
-        headers = list(set(doc['header'] for doc in all_docs if doc['header'] != 'Intro'))
+        store, lexical, filters = self._active
+        mask = filters.mask(source_type, path_prefix)
+        depth = k if lexical is None else max(k * 4, 20)
+        vector_hits: List[List[Tuple[Dict[str, Any], float]]] = [[] for _ in queries]
+        try:
+            embeddings = self._embed_queries(queries)
+            for i, results in enumerate(store.search_batch(embeddings, k=depth, mask=mask)):
+                vector_hits[i] = [(r["document"], r["score"]) for r in results]
+        except Exception as e:
+            print(f"Batch vector search failed{', using lexical results only' if lexical else ''}: {e}")
+            
+        if lexical is None:
+            return [[{"document": doc, "score": score} for doc, score in hits] for hits in vector_hits]
+            
+        results = []
+        for query, hits in zip(queries, vector_hits):
+            lexical_hits = [(store.documents[row], score) for row, score in lexical.search(query, k=depth, mask=mask)]
+            results.append(reciprocal_rank_fusion([hits, lexical_hits], k))
+        return results
         
-        if not headers:
+    def _search_warming(
+        self, query: str, k: int, source_type: Optional[str | Sequence[str]], path_prefix: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """Lexical-only results from the warm-up index (empty until the corpus is loaded)"""
+        warmup = self._warmup_lexical
+        if warmup is None:
             return []
+        chunks, lexical, filters = warmup
+        mask = filters.mask(source_type, path_prefix)
+        hits = [(chunks[row], score) for row, score in lexical.search(query, k=k, mask=mask)]
+        return reciprocal_rank_fusion([[], hits], k)
+        
+    def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Query embeddings as a matrix; cache misses go out in one batched request"""
+        provider = self.llm_client.embedding_provider
+        model = self.llm_client.embedding_model
+        embeddings = [self.query_cache.get(provider, model, query) for query in queries]
+        
+        # Duplicate queries are embedded once
+        missing = list(dict.fromkeys(q for q, e in zip(queries, embeddings) if e is None))
+        if missing:
+            fresh = dict(zip(missing, self.llm_client.embed_many(missing)))
+            for query, embedding in fresh.items():
+                self.query_cache.put(provider, model, query, embedding)
+            embeddings = [fresh[q] if e is None else e for q, e in zip(queries, embeddings)]
             
-        # Shuffle and return top k
-        random.shuffle(headers)
-        return headers[:limit]
+        return np.asarray(embeddings, dtype=np.float32)
+        
+    def _embed_query(self, query: str) -> List[float]:
+        """Query embedding through the LRU/TTL cache (Self-RAG retries and common questions hit it)"""
+        provider = self.llm_client.embedding_provider
+        model = self.llm_client.embedding_model
+        embedding = self.query_cache.get(provider, model, query)
+        if embedding is None:
+            embedding = self.llm_client.embed(query)
+            self.query_cache.put(provider, model, query, embedding)
+        return embedding
+        
+    def get_suggested_topics(self, limit: int = 5) -> List[str]:
+        """Get random topics (headers) from loaded rules
+        
+        Headers are collected once per index (when it is activated, or on the
+        first call), not decoded from every document on each call.
+        """
+        import random
+        
+        store = self.vector_store
+        cached = self._topics
+        if cached is None or cached[0] is not store:
+            cached = self._topics = (store, self._topic_headers(store.iter_documents()))
+        headers = cached[1]
+        return random.sample(headers, min(limit, len(headers)))
+        
+    @staticmethod
+    def _topic_headers(docs: Iterable[Dict[str, Any]]) -> List[str]:
+        """Distinct markdown section headers of the documents (sorted)"""
+        return sorted({
+            doc['header'] for doc in docs
+            if doc['header'] != 'Intro' and doc.get('language', 'markdown') == 'markdown'
+        })
@@ -13,6 +13,7 @@ class AgentState(TypedDict, total=False):
     user_id: int
     message: str
     user_code: str | None
+    project: str | None  # RAG project/tenant key (None = default project)
     
     # Routing
     next_node: Literal["search", "verify", "code_review", "autonomous", "complete"]
@@ -0,0 +1,374 @@
+"""
+Code symbol index (classes, methods, functions, components, routes) for instant lookups
+"""
+import ast
+import re
+import threading
+import time
+from bisect import bisect_left
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from src.agent.code_syntax import ANNOTATION_PREFIX_RE, JAVA_METHOD_RE, JAVA_NOT_METHODS, JAVA_TYPE_RE, strip_code
+from src.agent.file_catalog import FileCatalog, get_file_catalog
+
+# File suffix -> symbol extractor language
+SYMBOL_LANGUAGES = {
+    ".java": "java",
+    ".py": "python",
+    ".js": "js",
+    ".jsx": "js",
+    ".ts": "js",
+    ".tsx": "js",
+    ".mjs": "js",
+}
+
+_MAX_FILE_BYTES = 1 << 20
+_SNIPPET_CHARS = 200
+_ANNOTATION_RE = re.compile(r"@([A-Za-z_][\w.]*)(?:\(([^)]*)\))?")
+_STRING_LITERAL_RE = re.compile(r'"([^"]*)"')
+_REQUEST_METHOD_RE = re.compile(r"RequestMethod\.([A-Z]+)")
+# Spring mapping annotation -> HTTP method (RequestMapping takes it from method=)
+_MAPPINGS = {
+    "GetMapping": "GET",
+    "PostMapping": "POST",
+    "PutMapping": "PUT",
+    "DeleteMapping": "DELETE",
+    "PatchMapping": "PATCH",
+    "RequestMapping": None,
+}
+_PY_FALLBACK_RE = re.compile(r"^\s*(?:async\s+)?(def|class)\s+([A-Za-z_]\w*)")
+_JS_DECLARATION_RE = re.compile(
+    r"^(export\s+(?:default\s+)?)?(?:async\s+)?(function\*?|class|const|let|var)\s+([A-Za-z_$][\w$]*)"
+)
+_JS_EXPORT_LIST_RE = re.compile(r"^export\s*\{([^}]*)\}")
+_JS_EXPORT_DEFAULT_RE = re.compile(r"^export\s+default\s+([A-Za-z_$][\w$]*)\s*;?\s*$")
+
+
+def _symbol(name: str, kind: str, path: str, line: int, source_line: str,
+            container: Optional[str] = None, annotations: Optional[List[str]] = None) -> Dict[str, Any]:
+    return {
+        "name": name,
+        "kind": kind,
+        "path": path,
+        "line": line,
+        "container": container,
+        "annotations": annotations or [],
+        "snippet": source_line.strip()[:_SNIPPET_CHARS],
+    }
+
+
+def extract_symbols(path: str, text: str) -> List[Dict[str, Any]]:
+    """Symbols declared in one source file (1-based lines)"""
+    language = SYMBOL_LANGUAGES.get(Path(path).suffix.lower())
+    lines = text.split("\n")
+    if language == "java":
+        return _java_symbols(path, lines)
+    if language == "python":
+        return _python_symbols(path, text, lines)
+    if language == "js":
+        return _js_symbols(path, lines)
+    return []
+
+
+def _java_symbols(path: str, lines: List[str]) -> List[Dict[str, Any]]:
+    """Types and methods by brace depth; Spring mapping annotations also yield route symbols"""
+    symbols = []
+    types: List[List[Any]] = []  # [type name, depth of its body, route prefix]
+    annotations: List[tuple] = []  # (name, arguments) seen since the last declaration
+    depth = 0
+    in_comment = False
+    for i, line in enumerate(lines):
+        code, in_comment_after = strip_code(line, in_comment)
+        if not in_comment:
+            for match in _ANNOTATION_RE.finditer(line.split("//", 1)[0]):
+                if line.lstrip().startswith("@") or ANNOTATION_PREFIX_RE.match(line.strip()):
+                    annotations.append((match.group(1).rsplit(".", 1)[-1], match.group(2) or ""))
+        declaration = ANNOTATION_PREFIX_RE.sub("", code.strip())
+        if declaration:
+            type_match = JAVA_TYPE_RE.search(declaration)
+            method_match = JAVA_METHOD_RE.match(declaration)
+            names = [name for name, _ in annotations]
+            if type_match and (not method_match or declaration.find("(") > type_match.start()):
+                name = type_match.group(2)
+                container = ".".join(t[0] for t in types) or None
+                symbols.append(_symbol(name, type_match.group(1), path, i + 1, line, container, names))
+                types.append([name, depth + 1, _route_path(annotations, "RequestMapping")])
+            elif types and depth == types[-1][1] and method_match and method_match.group(1) not in JAVA_NOT_METHODS:
+                name = method_match.group(1)
+                kind = "constructor" if name == types[-1][0] else "method"
+                symbols.append(_symbol(name, kind, path, i + 1, line, types[-1][0], names))
+                for annotation, arguments in annotations:
+                    if annotation not in _MAPPINGS:
+                        continue
+                    method = _MAPPINGS[annotation] or next(iter(_REQUEST_METHOD_RE.findall(arguments)), "ANY")
+                    route = "/" + "/".join(
+                        part.strip("/") for part in (types[-1][2], _first_string(arguments)) if part.strip("/")
+                    )
+                    symbols.append(_symbol(f"{method} {route}", "route", path, i + 1, line, f"{types[-1][0]}.{name}"))
+            annotations = []
+
+        depth += code.count("{") - code.count("}")
+        in_comment = in_comment_after
+        while types and depth < types[-1][1]:
+            types.pop()
+    return symbols
+
+
+def _route_path(annotations: List[tuple], name: str) -> str:
+    for annotation, arguments in annotations:
+        if annotation == name:
+            return _first_string(arguments)
+    return ""
+
+
+def _first_string(arguments: str) -> str:
+    match = _STRING_LITERAL_RE.search(arguments)
+    return match.group(1) if match else ""
+
+
+def _python_symbols(path: str, text: str, lines: List[str]) -> List[Dict[str, Any]]:
+    """Classes, functions and methods (decorator names as annotations)"""
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        symbols = []
+        for i, line in enumerate(lines):
+            match = _PY_FALLBACK_RE.match(line)
+            if match:
+                kind = "class" if match.group(1) == "class" else "function"
+                symbols.append(_symbol(match.group(2), kind, path, i + 1, line))
+        return symbols
+
+    symbols = []
+
+    def visit(body, container: Optional[str]):
+        for node in body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                decorators = [ast.unparse(d).split("(", 1)[0] for d in node.decorator_list]
+                if isinstance(node, ast.ClassDef):
+                    kind = "class"
+                else:
+                    kind = "method" if container else "function"
+                symbols.append(_symbol(node.name, kind, path, node.lineno, lines[node.lineno - 1], container, decorators))
+                if isinstance(node, ast.ClassDef):
+                    visit(node.body, f"{container}.{node.name}" if container else node.name)
+
+    visit(tree.body, None)
+    return symbols
+
+
+def _js_symbols(path: str, lines: List[str]) -> List[Dict[str, Any]]:
+    """Exports and top-level components (capitalized functions/consts/classes) of JS/JSX/TS files"""
+    declared: Dict[str, Dict[str, Any]] = {}
+    exported = set()
+    for i, line in enumerate(lines):
+        if not line[:1].strip():
+            continue  # top-level declarations start at column 0 in formatted code
+        match = _JS_DECLARATION_RE.match(line)
+        if match:
+            export, keyword, name = match.groups()
+            if keyword in ("const", "let", "var"):
+                kind = "component" if name[:1].isupper() else "const"
+            elif keyword == "class":
+                kind = "class"
+            else:
+                kind = "component" if name[:1].isupper() else "function"
+            declared.setdefault(name, _symbol(name, kind, path, i + 1, line))
+            if export:
+                exported.add(name)
+            continue
+        match = _JS_EXPORT_LIST_RE.match(line)
+        if match:
+            for item in match.group(1).split(","):
+                original, _, alias = item.strip().partition(" as ")
+                if original.strip() in declared and alias.strip():
+                    declared.setdefault(alias.strip(), dict(declared[original.strip()], name=alias.strip()))
+                exported.add((alias or original).strip())
+            continue
+        match = _JS_EXPORT_DEFAULT_RE.match(line)
+        if match:
+            exported.add(match.group(1))
+
+    return [
+        symbol for name, symbol in declared.items()
+        if name in exported or symbol["kind"] in ("component", "class")
+    ]
+
+
+class SymbolIndex:
+    """Name -> symbol declarations of the source files in a FileCatalog
+
+    Lookups are case-insensitive on the simple name, the qualified
+    "Container.name" and, for routes, the "GET /path" string and the bare path;
+    "@Annotation" finds every declaration carrying that annotation. Prefix
+    lookup bisects a sorted key list; fuzzy lookup compares names of similar
+    length that share the first letter. Updates are per file (catalog listener).
+    """
+
+    FUZZY_CUTOFF = 0.8
+
+    def __init__(self, catalog: FileCatalog):
+        self.catalog = catalog
+        self.root = catalog.root
+        self._lock = threading.RLock()
+        self._by_file: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_key: Dict[str, List[Dict[str, Any]]] = {}
+        self._by_annotation: Dict[str, List[Dict[str, Any]]] = {}
+        self._sorted_keys: Optional[List[str]] = None
+        self.build_seconds = 0.0
+        catalog.listeners.append(self._on_file_changed)
+
+    def __len__(self) -> int:
+        return sum(len(symbols) for symbols in self._by_file.values())
+
+    def build(self):
+        started = time.perf_counter()
+        with self._lock:
+            self._by_file, self._by_key, self._by_annotation = {}, {}, {}
+            self._sorted_keys = None
+            for relative in self.catalog.paths():
+                if Path(relative).suffix.lower() in SYMBOL_LANGUAGES:
+                    self.update_file(relative)
+        self.build_seconds = time.perf_counter() - started
+
+    def _on_file_changed(self, relative: str, exists: bool):
+        if Path(relative).suffix.lower() not in SYMBOL_LANGUAGES:
+            return
+        if exists:
+            self.update_file(relative)
+        else:
+            self.remove_file(relative)
+
+    def update_file(self, relative: str):
+        """Re-extract the symbols of one file"""
+        try:
+            path = self.root / relative
+            if path.stat().st_size > _MAX_FILE_BYTES:
+                symbols = []
+            else:
+                symbols = extract_symbols(relative, path.read_text(encoding="utf-8", errors="replace"))
+        except OSError:
+            symbols = []
+        with self._lock:
+            self.remove_file(relative)
+            if not symbols:
+                return
+            self._by_file[relative] = symbols
+            for symbol in symbols:
+                for key in self._keys(symbol):
+                    if key not in self._by_key:
+                        self._sorted_keys = None
+                    self._by_key.setdefault(key, []).append(symbol)
+                for annotation in symbol["annotations"]:
+                    self._by_annotation.setdefault(annotation.lower(), []).append(symbol)
+
+    def remove_file(self, relative: str):
+        with self._lock:
+            symbols = self._by_file.pop(relative, None)
+            if not symbols:
+                return
+            for symbol in symbols:
+                for key in self._keys(symbol):
+                    self._discard(self._by_key, key, symbol)
+                for annotation in symbol["annotations"]:
+                    self._discard(self._by_annotation, annotation.lower(), symbol)
+
+    def _discard(self, table: Dict[str, List[Dict[str, Any]]], key: str, symbol: Dict[str, Any]):
+        remaining = [s for s in table.get(key, ()) if s is not symbol]
+        if remaining:
+            table[key] = remaining
+        else:
+            table.pop(key, None)
+            self._sorted_keys = None
+
+    @staticmethod
+    def _keys(symbol: Dict[str, Any]) -> List[str]:
+        name = symbol["name"].lower()
+        if symbol["kind"] == "route":
+            return [name, name.split(" ", 1)[1]]
+        keys = [name]
+        if symbol["container"]:
+            keys.append(f"{symbol['container'].lower()}.{name}")
+        return keys
+
+    def lookup(self, query: str) -> List[Dict[str, Any]]:
+        """Exact (case-insensitive) matches; "@Name" looks up annotated declarations"""
+        key = query.strip().lower()
+        with self._lock:
+            if key.startswith("@"):
+                return list(self._by_annotation.get(key[1:], ()))
+            return list(self._by_key.get(key, ()))
+
+    def prefix(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Symbols whose key starts with query, simple names before qualified ones, shortest first"""
+        key = query.strip().lower()
+        keys = self._keys_snapshot()
+        matched = []
+        i = bisect_left(keys, key)
+        while i < len(keys) and keys[i].startswith(key) and len(matched) < limit * 4:
+            matched.append(keys[i])
+            i += 1
+        return self._collect(sorted(matched, key=lambda k: ("." in k, len(k))), limit)
+
+    def fuzzy(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Symbols with a similar name (typos), best first"""
+        key = query.strip().lower()
+        if not key:
+            return []
+        keys = self._keys_snapshot()
+        start = bisect_left(keys, key[0])
+        scored = []
+        for candidate in keys[start:bisect_left(keys, chr(ord(key[0]) + 1), start)]:
+            if abs(len(candidate) - len(key)) > 2:
+                continue
+            ratio = SequenceMatcher(None, key, candidate).ratio()
+            if ratio >= self.FUZZY_CUTOFF:
+                scored.append((-ratio, candidate))
+        return self._collect([candidate for _, candidate in sorted(scored)], limit)
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Exact matches, else prefix matches, else fuzzy matches"""
+        return self.lookup(query)[:limit] or self.prefix(query, limit) or self.fuzzy(query, limit)
+
+    def _collect(self, keys: List[str], limit: int) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = []
+        seen = set()
+        with self._lock:
+            for key in keys:
+                for symbol in self._by_key.get(key, ()):
+                    if id(symbol) not in seen:
+                        seen.add(id(symbol))
+                        results.append(symbol)
+                if len(results) >= limit:
+                    break
+        return results[:limit]
+
+    def _keys_snapshot(self) -> List[str]:
+        keys = self._sorted_keys
+        if keys is None:
+            with self._lock:
+                keys = self._sorted_keys = sorted(self._by_key)
+        return keys
+
+
+_indexes: Dict[Path, SymbolIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_symbol_index(root: str | Path) -> SymbolIndex:
+    """Shared symbol index of a project root, built on first use"""
+    catalog = get_file_catalog(root)
+    with _indexes_lock:
+        index = _indexes.get(catalog.root)
+        if index is None:
+            index = SymbolIndex(catalog)
+            index.build()
+            print(f"Symbol index built: {len(index)} symbols in {index.build_seconds * 1000:.0f}ms")
+            _indexes[catalog.root] = index
+    return index
+
+
+def peek_symbol_index(root: str | Path) -> Optional[SymbolIndex]:
+    """Symbol index of a project root if it is already built; never builds one or waits for a build"""
+    return _indexes.get(Path(root).resolve())
@@ -1,9 +1,28 @@
 """
 MCP Tools - File operations for the agent
 """
+import asyncio
 import os
+import re
+import shlex
 from pathlib import Path
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Tuple
+from src.agent.command_cache import get_command_cache, invalidate_command_cache
+from src.agent.command_runner import get_command_runner
+from src.agent.content_index import get_content_index
+from src.agent.file_catalog import get_file_catalog, notify_file_changed
+from src.agent.file_patch import PatchError, apply_patch, atomic_write
+from src.agent.file_reader import get_file_reader
+from src.agent.symbol_index import get_symbol_index, peek_symbol_index
+
+# Identifier-looking words of a question: CamelCase, snake_case or dotted names. Boundaries are
+# ASCII-only: Hangul counts as \w, so \b would miss "GoalRepository는"
+_IDENTIFIER_RE = re.compile(r"(?<![A-Za-z0-9_])(?:[A-Za-z_][A-Za-z0-9_]*\.[A-Za-z_][A-Za-z0-9_]*|[a-z]+[A-Z][A-Za-z0-9]*|[A-Z][a-z0-9]+[A-Z][A-Za-z0-9]*|[A-Z]{2,}[a-z][A-Za-z0-9]*|[a-z0-9]+(?:_[a-z0-9]+)+)(?![A-Za-z0-9_])")
+
+
+def code_identifiers(text: str) -> List[str]:
+    """Code identifiers mentioned in a natural-language question (for content search)"""
+    return list(dict.fromkeys(match.group(0) for match in _IDENTIFIER_RE.finditer(text)))
 
 
 class FileSearchTool:
@@ -14,70 +33,146 @@ class FileSearchTool:
             project_root = Path(__file__).resolve().parents[3]
         self.project_root = Path(project_root)
     
-    def search_files(self, query: str, extensions: Optional[List[str]] = None) -> List[dict]:
+    def search_files(self, query: str, extensions: Optional[List[str]] = None, mode: str = "filename") -> List[dict]:
         """
         Search for files matching the query
         
         Args:
             query: Search term (filename or content)
             extensions: File extensions to filter (e.g., ['.java', '.md'])
+            mode: "filename" or "content" (see search_content)
         
         Returns:
-            List of matching files with metadata
+            List of matching files with metadata, best fuzzy match first
         """
-        results = []
-        
         if extensions is None:
             extensions = ['.java', '.md', '.py', '.js', '.jsx', '.ts', '.tsx']
+        if mode == "content":
+            return self.search_content(query, extensions)
         
-        for ext in extensions:
-            for file_path in self.project_root.rglob(f"*{ext}"):
-                # Skip hidden files and directories
-                if any(part.startswith('.') for part in file_path.parts):
-                    continue
-                
-                # Check if filename matches
-                if query.lower() in file_path.name.lower():
-                    results.append({
-                        "path": str(file_path),
-                        "name": file_path.name,
-                        "type": ext,
-                        "match_type": "filename"
-                    })
+        catalog = get_file_catalog(self.project_root)
+        results = []
+        for relative, score in catalog.fuzzy_search(query, extensions, limit=10):
+            file_path = catalog.root / relative
+            results.append({
+                "path": str(file_path),
+                "name": file_path.name,
+                "type": file_path.suffix,
+                "match_type": "filename",
+                "score": score
+            })
+        
+        return results
+    
+    def search_content(
+        self, query: str, extensions: Optional[List[str]] = None, regex: bool = False, limit: int = 20
+    ) -> List[dict]:
+        """
+        Search file contents through the trigram index
+        
+        Args:
+            query: Literal text, or a regular expression when regex=True (case-insensitive)
+            extensions: File extensions to filter (e.g., ['.java', '.md'])
+            regex: Treat query as a regular expression
+            limit: Maximum number of matching lines
+        
+        Returns:
+            Matching lines with file metadata, line number and snippet
+        """
+        index = get_content_index(self.project_root)
+        try:
+            matches = index.search(query, regex=regex, extensions=extensions, limit=limit)
+        except re.error as e:
+            return [{"error": f"Invalid regex: {e}", "query": query}]
+        
+        results = []
+        for match in matches:
+            file_path = index.root / match["path"]
+            results.append({
+                "path": str(file_path),
+                "name": file_path.name,
+                "type": file_path.suffix,
+                "match_type": "content",
+                "line": match["line"],
+                "snippet": match["snippet"]
+            })
+        
+        return results
+    
+    def find_symbol(self, name: str, build: bool = True) -> List[dict]:
+        """Exact declarations of a symbol (Class, Class.method, function, "@Annotation", "GET /path")
+        
+        With build=False nothing is found until the symbol index exists (no repository walk).
+        """
+        index = get_symbol_index(self.project_root) if build else peek_symbol_index(self.project_root)
+        if index is None:
+            return []
+        return [self._symbol_result(index.root, symbol) for symbol in index.lookup(name)]
+    
+    def search_symbols(self, query: str, limit: int = 10) -> List[dict]:
+        """
+        Search code symbols: exact name, else prefix, else fuzzy (typo-tolerant) matches
+        
+        Args:
+            query: Symbol name, qualified name (GoalController.getMyGoals), "@GetMapping" or a route path
+            limit: Maximum number of symbols
         
-        return results[:10]  # Limit to 10 results
+        Returns:
+            Symbol declarations with file metadata, line number and the declaration line
+        """
+        index = get_symbol_index(self.project_root)
+        return [self._symbol_result(index.root, symbol) for symbol in index.search(query, limit)]
     
-    def read_file(self, file_path: str, max_lines: int = 100) -> dict:
+    @staticmethod
+    def _symbol_result(root: Path, symbol: dict) -> dict:
+        file_path = root / symbol["path"]
+        return {
+            "path": str(file_path),
+            "name": file_path.name,
+            "type": file_path.suffix,
+            "match_type": "symbol",
+            "symbol": symbol["name"],
+            "kind": symbol["kind"],
+            "container": symbol["container"],
+            "line": symbol["line"],
+            "snippet": symbol["snippet"]
+        }
+    
+    def read_file(
+        self,
+        file_path: str,
+        max_lines: int = 100,
+        start_line: int = 1,
+        end_line: Optional[int] = None,
+        max_line_bytes: int = 2000
+    ) -> dict:
         """
-        Read file contents
+        Read file contents (streamed; only the requested lines are loaded)
         
         Args:
             file_path: Absolute path to file
             max_lines: Maximum number of lines to read
+            start_line: First line to return (1-based)
+            end_line: Last line to return (inclusive, capped by max_lines)
+            max_line_bytes: Longer lines are cut with a truncation marker
         
         Returns:
-            File content and metadata
+            File content and metadata (total_lines is counted without loading the file)
         """
         try:
-            path = Path(file_path)
-            with open(path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                content = ''.join(lines[:max_lines])
-                
-            return {
-                "path": str(path),
-                "name": path.name,
-                "content": content,
-                "total_lines": len(lines),
-                "truncated": len(lines) > max_lines
-            }
+            return get_file_reader().read(
+                file_path,
+                start_line=start_line,
+                end_line=end_line,
+                max_lines=max_lines,
+                max_line_bytes=max_line_bytes
+            )
         except Exception as e:
             return {
                 "error": str(e),
                 "path": file_path
             }
 
-
 class GuardrailsTool:
     """Validate if questions are within project scope and filter harmful content"""
     
@@ -226,24 +321,40 @@ class GuardrailsTool:
 class RuleSearchTool:
     """Search project rules using RAG"""
     
-    def __init__(self):
+    def __init__(self, project: Optional[str] = None):
         from src.agent.rag_modules import RAGManager
-        # Initialize RAG Manager (loads rules and builds index)
-        self.rag_manager = RAGManager()
+        # Shared RAG Manager of the project (the index is loaded by its background warm-up)
+        self.rag_manager = RAGManager(project)
         
-    def search(self, query: str) -> str:
+    def search(
+        self,
+        query: str,
+        source_type: Optional[str] = None,
+        path_prefix: Optional[str] = None,
+        expansions: Optional[List[str]] = None,
+    ) -> str:
         """
         Search for project rules related to the query
         
         Args:
             query: Question about rules/standards (e.g., "naming convention", "api style")
+            source_type: Only search one corpus source (e.g., "rules", "design", "backend")
+            path_prefix: Only search files under this path (e.g., "backend/src/main/java/com/example/demo/ai")
+            expansions: Other phrasings searched in the same batch (e.g., the original question
+                after a Self-RAG query rewrite); each chunk keeps its best score
             
         Returns:
             Formatted string with top relevant rules
         """
-        results = self.rag_manager.search(query)
+        expansions = [q for q in dict.fromkeys(expansions or []) if q and q != query]
+        if expansions:
+            results = self._search_expanded([query] + expansions, source_type, path_prefix)
+        else:
+            results = self.rag_manager.search(query, source_type=source_type, path_prefix=path_prefix)
         
         if not results:
+            if not self.rag_manager.is_ready:
+                return "NO_RULES: 규칙 인덱스를 준비 중입니다. 잠시 후 다시 시도해주세요."
             return "NO_RULES: 관련 규칙을 찾을 수 없습니다."
 
         response = f"'{query}' 관련 프로젝트 규칙:\n\n"
@@ -251,13 +362,38 @@ class RuleSearchTool:
         for i, result in enumerate(results, 1):
             doc = result["document"]
             score = result["score"]
-            response += f"{i}. **{doc['header']}** (유사도: {score:.2f})\n"
-            response += f"   - 출처: `{doc['source']}`\n"
+            if "vector_score" in result or "lexical_score" in result:
+                # Hybrid results are ranked by the fused RRF score, not a similarity
+                scores = f"관련도 점수: {score:.2f}"
+                if "vector_score" in result:
+                    scores += f", 유사도: {result['vector_score']:.2f}"
+            else:
+                scores = f"유사도: {score:.2f}"
+            response += f"{i}. **{doc['header']}** ({scores})\n"
+            location = doc['source']
+            if doc.get('start_line'):
+                location += f":{doc['start_line']}-{doc['end_line']}"
+            response += f"   - 출처: `{location}`\n"
+            duplicates = [loc["source"] for loc in doc.get("locations", [])[1:]]
+            if duplicates:
+                response += f"   - 동일 내용: {', '.join(f'`{source}`' for source in duplicates)}\n"
             # Show snippet (first 3 lines or limited chars) to avoid overwhelming
             content_snippet = '\n'.join(doc['content'].split('\n')[:5])
-            response += f"   - 내용:\n```markdown\n{content_snippet}\n...\n```\n\n"
+            response += f"   - 내용:\n```{doc.get('language', 'markdown')}\n{content_snippet}\n...\n```\n\n"
             
         return response
+    
+    def _search_expanded(self, queries: List[str], source_type: Optional[str], path_prefix: Optional[str],
+                         k: int = 3) -> List[dict]:
+        """Top-k chunks over several queries (one batched embedding and scoring pass)"""
+        best = {}
+        for results in self.rag_manager.search_many(queries, k=k, source_type=source_type, path_prefix=path_prefix):
+            for result in results:
+                doc = result["document"]
+                key = doc.get("chunk_id") or f"{doc['source']}#{doc['header']}"
+                if key not in best or result["score"] > best[key]["score"]:
+                    best[key] = result
+        return sorted(best.values(), key=lambda result: result["score"], reverse=True)[:k]
 
 class FileManagementTool:
     """Tool for creating, editing, and managing files"""
@@ -277,26 +413,52 @@ class FileManagementTool:
             
             with open(full_path, 'w', encoding='utf-8') as f:
                 f.write(content)
+            # Searchable right away, without waiting for the file watcher
+            notify_file_changed(full_path)
+            invalidate_command_cache(full_path)
                 
             return f"File created successfully: {path}"
         except Exception as e:
             return f"Failed to create file: {e}"
             
-    def edit_file(self, path: str, edit_instruction: str, content: str) -> str:
-        """Edit an existing file (Overwrite for now)"""
+    def edit_file(self, path: str, edit_instruction: str, content: Optional[str] = None, patch: Optional[str] = None) -> str:
+        """
+        Edit an existing file
+        
+        Args:
+            path: File to edit
+            edit_instruction: What the edit does (for the log)
+            content: New full content of the file (when no patch is given)
+            patch: Unified diff (@@ hunks) or SEARCH/REPLACE blocks to apply instead
+                of rewriting the file; all hunks apply or none does
+        
+        Returns:
+            Status message; for a patch that does not apply, which hunk failed and why
+        """
         try:
             full_path = self._resolve_path(path)
             
             if not full_path.exists():
                 return f"File not found: {path}"
-                
-            # For now, we support full overwrite or append.
-            # Complex editing (diff) might need LLM assistance,
-            # but here we assume 'content' is the new content.
+            if content is None and patch is None:
+                return f"Failed to edit file: {path}: give the new content or a patch"
             
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-                
+            notes = []
+            if patch is not None:
+                with open(full_path, 'r', encoding='utf-8', newline='') as f:
+                    original = f.read()
+                try:
+                    content, notes = apply_patch(original, patch)
+                except PatchError as e:
+                    return f"Failed to apply patch to {path}: {e}"
+            
+            atomic_write(full_path, content)
+            notify_file_changed(full_path)
+            invalidate_command_cache(full_path)
+            
+            if patch is not None:
+                message = f"File patched successfully: {path}"
+                return message + "".join(f"\n- {note}" for note in notes)
             return f"File updated successfully: {path}"
         except Exception as e:
             return f"Failed to edit file: {e}"
@@ -310,6 +472,8 @@ class FileManagementTool:
                 return f"File not found: {path}"
                 
             os.remove(full_path)
+            notify_file_changed(full_path)
+            invalidate_command_cache(full_path)
             return f"File deleted successfully: {path}"
         except Exception as e:
             return f"Failed to delete file: {e}"
@@ -338,37 +502,104 @@ class CommandExecutor:
             project_root = Path(__file__).resolve().parents[3]
         self.project_root = Path(project_root)
 
-    def run_command(self, command: str) -> str:
-        """Run a shell command"""
-        import subprocess
-        import shlex
-        
-        # Security check
-        cmd_parts = shlex.split(command)
+    def check_command(self, command: str) -> Optional[str]:
+        """Reason a command may not run, None when it is allowed"""
+        try:
+            cmd_parts = shlex.split(command)
+        except ValueError as e:
+            return f"Invalid command: {e}"
         if not cmd_parts:
             return "Empty command"
             
         base_cmd = cmd_parts[0]
         if base_cmd not in self.ALLOWED_COMMANDS and not base_cmd.endswith(".sh"): # Allow scripts
              return f"Command not allowed: {base_cmd}"
+        return None
+
+    def run_command(self, command: str) -> str:
+        """Run a shell command from synchronous code; async callers must await run_command_async"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.run_command_async(command))
+        # Waiting here would block the event loop for the whole command
+        raise RuntimeError("run_command() called from a running event loop; use await run_command_async()")
+
+    async def run_command_async(self, command: str, timeout: Optional[float] = None) -> str:
+        """Run a shell command without blocking the event loop"""
+        error = self.check_command(command)
+        if error:
+            return error
         
         try:
-            result = subprocess.run(
-                command, 
-                shell=True, 
-                capture_output=True, 
-                text=True, 
-                cwd=str(self.project_root),
-                timeout=30
-            )
-            
-            output = result.stdout
-            if result.stderr:
-                output += f"\n[Stderr]\n{result.stderr}"
-                
-            return output if output.strip() else "Command executed (no output)"
-            
-        except subprocess.TimeoutExpired:
-            return "Command timed out"
+            result = await self._run(command, timeout)
         except Exception as e:
             return f"Execution failed: {e}"
+        
+        output = result["stdout"]
+        if result["stderr"]:
+            output += f"\n[Stderr]\n{result['stderr']}"
+        if result["timed_out"]:
+            return f"{output}\nCommand timed out" if output.strip() else "Command timed out"
+            
+        return output if output.strip() else "Command executed (no output)"
+
+    async def stream_command(self, command: str, timeout: Optional[float] = None) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Run a shell command and yield its output as it is produced
+        
+        Yields:
+            ("stdout" | "stderr", text) chunks, then ("exit", return code), ("timeout", message)
+            or ("error", message) for a rejected command
+        """
+        error = self.check_command(command)
+        if error:
+            yield "error", error
+            return
+        cache, key, fingerprint = await self._cache_lookup(command)
+        cached = cache.get(key, fingerprint[0]) if fingerprint else None
+        if cached is not None:
+            for kind in ("stdout", "stderr"):
+                if cached[kind]:
+                    yield kind, cached[kind]
+            yield "exit", str(cached["returncode"])
+            return
+        
+        output = {"stdout": [], "stderr": []}
+        async for kind, text in get_command_runner().stream(command, self.project_root, timeout):
+            if kind in output:
+                output[kind].append(text)
+            elif kind == "exit" and fingerprint:
+                result = {"stdout": "".join(output["stdout"]), "stderr": "".join(output["stderr"]),
+                          "returncode": int(text), "timed_out": False}
+                await self._cache_store(cache, key, fingerprint, result)
+            yield kind, text
+
+    async def _run(self, command: str, timeout: Optional[float]) -> dict:
+        cache, key, fingerprint = await self._cache_lookup(command)
+        if fingerprint:
+            cached = cache.get(key, fingerprint[0])
+            if cached is not None:
+                return cached
+        result = await get_command_runner().run(command, self.project_root, timeout)
+        if fingerprint and not result["timed_out"]:
+            await self._cache_store(cache, key, fingerprint, result)
+        return result
+
+    async def _cache_lookup(self, command: str):
+        """(cache, key, (fingerprint, paths)) of a cacheable command; Nones when caching does not apply"""
+        cache = get_command_cache()
+        if cache is None:
+            return None, None, None
+        key = cache.key(command, self.project_root)
+        if key is None:
+            # May write anything (rm, mv, npm, scripts...)
+            cache.invalidate()
+            return cache, None, None
+        return cache, key, await asyncio.to_thread(cache.fingerprint, key)
+
+    @staticmethod
+    async def _cache_store(cache, key, fingerprint, result: dict):
+        # Only keep results of a tree that did not change while the command ran
+        if await asyncio.to_thread(cache.fingerprint, key) == fingerprint:
+            cache.put(key, fingerprint[0], fingerprint[1], result)
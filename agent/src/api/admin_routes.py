@@ -1,6 +1,8 @@
 """
 Admin API Routes - 관리자 설정 API
 """
+import asyncio
+from typing import Optional
 from fastapi import APIRouter, HTTPException
 from src.graph_settings import (
     GraphSettings,
@@ -127,3 +129,85 @@ async def get_graph_visualization():
     
     print(f"[Admin API] Visualization generated with {len(mermaid)} nodes")
     return result
+
+
+@router.post("/rag/reindex")
+async def reindex_rag(project: Optional[str] = None):
+    """룰 디렉토리 변경분만 재인덱싱 (별도 스레드에서 실행, 완료 시 인덱스 교체)"""
+    print(f"[Admin API] POST /admin/rag/reindex - Refreshing RAG index (project={project or 'default'})")
+    
+    from src.agent.rag_modules import RAGManager
+    
+    rag_manager = RAGManager.existing(project)
+    if rag_manager is None or rag_manager.readiness()["status"] in ("idle", "warming"):
+        raise HTTPException(status_code=503, detail="RAG index is still warming up")
+    
+    def refresh():
+        return rag_manager.refresh_index()
+    
+    try:
+        stats = await asyncio.to_thread(refresh)
+    except Exception as e:
+        print(f"[Admin API] Failed to refresh RAG index: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    print(f"[Admin API] RAG index refreshed: {stats}")
+    return stats
+
+
+@router.get("/rag/stats")
+async def get_rag_stats():
+    """RAG 인덱스 크기와 쿼리 임베딩 캐시 적중률 (hit = 절약된 임베딩 호출)"""
+    from src.agent.rag_modules import RAGManager
+    
+    managers = RAGManager.resident()
+    if not managers:
+        raise HTTPException(status_code=503, detail="RAG is not initialized")
+    
+    # 프로젝트별 인덱스 (최근 사용 순서의 역순: 앞쪽이 먼저 제거됨)
+    projects = {
+        rag_manager.project: {
+            "status": rag_manager.readiness()["status"],
+            "chunks": len(rag_manager.vector_store),
+            "memory_mb": round(rag_manager.memory_nbytes() / 2**20, 2),
+        }
+        for rag_manager in managers
+    }
+    return {
+        "projects": projects,
+        "query_embedding_cache": managers[0].query_cache.stats(),
+    }
+
+
+@router.get("/files/stats")
+async def get_file_index_stats():
+    """파일 카탈로그/본문 인덱스 크기와 변경 감지 상태 (lag = 변경부터 인덱스 반영까지 걸린 시간)"""
+    from src.agent.content_index import existing_content_index
+    from src.agent.file_catalog import built_catalogs
+    from src.agent.file_watcher import file_watcher
+    
+    catalogs = built_catalogs()
+    if not catalogs:
+        raise HTTPException(status_code=503, detail="File index is not initialized")
+    
+    stats = {}
+    for catalog in catalogs:
+        content_index = existing_content_index(catalog.root)
+        watcher = file_watcher(catalog.root)
+        stats[str(catalog.root)] = {
+            "files": len(catalog),
+            "directories": len(catalog.directories),
+            "content_index": content_index.stats() if content_index else None,
+            "watcher": watcher.stats() if watcher else None,
+        }
+    return {"roots": stats}
+
+
+@router.get("/commands/stats")
+async def get_command_stats():
+    """셸 명령 실행 풀 상태 (실행 중/대기 중 명령 수, 대기 시간, 타임아웃으로 종료된 명령 수)와 읽기 전용 명령 캐시 적중률"""
+    from src.agent.command_cache import get_command_cache
+    from src.agent.command_runner import get_command_runner
+    
+    cache = get_command_cache()
+    return {**get_command_runner().stats(), "cache": cache.stats() if cache else None}
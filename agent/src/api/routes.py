@@ -2,6 +2,7 @@
 API Routes
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
 from src.api.schemas import (
     ChatRequest,
     ChatResponse,
@@ -10,6 +11,7 @@ from src.api.schemas import (
     CodeReviewRequest,
     CodeReviewResponse,
     HealthResponse,
+    ReadinessResponse,
 )
 from src.agent import get_agent_graph, AgentState
 from src.config import get_settings
@@ -31,12 +33,39 @@ async def health_check():
     )
 
 
+@router.get("/ready", response_model=ReadinessResponse, tags=["Health"])
+async def readiness_check():
+    """
+    Readiness check endpoint.
+    200 once the RAG index is loaded, 503 while it is still warming up (or failed).
+    Unlike /health, this reflects answer quality: requests are served either way,
+    with lexical-only rule search until the index is ready.
+    """
+    from src.agent.rag_modules import RAGManager, rag_unavailable_reason
+    
+    reason = rag_unavailable_reason()
+    if reason:
+        return ReadinessResponse(status="ready", rag={"status": "disabled", "error": reason})
+        
+    rag_manager = RAGManager.existing()
+    rag = rag_manager.readiness() if rag_manager is not None else {"status": "idle"}
+    if rag["status"] != "ready":
+        response = ReadinessResponse(status="not_ready", rag=rag)
+        return JSONResponse(status_code=503, content=response.model_dump())
+    return ReadinessResponse(status="ready", rag=rag)
+
+
 @router.post("/chat", response_model=ChatResponse, tags=["Chat"])
 async def chat(request: ChatRequest):
     """
     Chat with the AI agent.
     The agent will automatically route to the appropriate handler based on intent.
     """
+    if request.project:
+        from src.agent.rag_modules import is_known_project
+        if not is_known_project(request.project):
+            raise HTTPException(status_code=404, detail=f"Unknown project: {request.project}")
+            
     try:
         graph = get_agent_graph()
         
@@ -45,6 +74,7 @@ async def chat(request: ChatRequest):
             "user_id": 0,
             "message": request.message,
             "user_code": request.user_code,
+            "project": request.project,
         }
         
         result = await graph.ainvoke(initial_state)
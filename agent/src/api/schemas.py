@@ -2,7 +2,7 @@
 API Schemas (Request/Response DTOs)
 """
 from pydantic import BaseModel, Field
-from typing import Optional, Literal
+from typing import Any, Dict, Optional, Literal
 
 
 class ChatRequest(BaseModel):
@@ -10,6 +10,7 @@ class ChatRequest(BaseModel):
     message: str = Field(..., description="User message")
     thread_id: Optional[str] = Field(None, description="Thread ID for conversation context")
     user_code: Optional[str] = Field(None, description="Code to review/verify")
+    project: Optional[str] = Field(None, description="RAG project/tenant key (RAG_PROJECTS), default project if omitted")
     
     class Config:
         json_schema_extra = {
@@ -79,3 +80,9 @@ class HealthResponse(BaseModel):
     status: str
     llm_mode: str
     llm_provider: str
+
+
+class ReadinessResponse(BaseModel):
+    """Readiness check response"""
+    status: Literal["ready", "not_ready"]
+    rag: Dict[str, Any]
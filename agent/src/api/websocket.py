@@ -15,6 +15,8 @@ async def websocket_ai_stream(websocket: WebSocket):
     WebSocket endpoint for streaming AI responses.
     Connected by Spring Boot backend.
     """
+    from src.agent.rag_modules import is_known_project
+    
     await websocket.accept()
     
     try:
@@ -26,12 +28,21 @@ async def websocket_ai_stream(websocket: WebSocket):
             message = request.get("message", "")
             thread_id = request.get("thread_id", str(uuid.uuid4()))
             user_id = request.get("user_id", 0)
+            project = request.get("project")
+            if not is_known_project(project):
+                # Keep the connection open for the next message
+                await websocket.send_text(json.dumps({
+                    "type": "error",
+                    "content": f"Unknown project: {project}"
+                }))
+                continue
             
             # Initial state
             state: AgentState = {
                 "thread_id": thread_id,
                 "user_id": user_id,
                 "message": message,
+                "project": project,
                 "stream_tokens": []
             }
             
@@ -0,0 +1,89 @@
+"""
+IVF vs brute-force benchmark - recall@k and per-query latency across nprobe values
+
+Usage:
+    python src/bench_ann.py --sizes 10000 100000 1000000 --dim 256 --nprobe 1 4 8 16 32
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to python path (parent of src)
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.agent.rag_modules import SimpleVectorStore
+from src.agent.ann_index import IVFVectorStore
+
+
+def clustered_vectors(rng, n: int, dim: int, topics: int) -> np.ndarray:
+    """Synthetic embeddings: points scattered around topic centers (real corpora are clustered)"""
+    centers = rng.standard_normal((topics, dim), dtype=np.float32)
+    labels = rng.integers(0, topics, size=n)
+    return centers[labels] + 0.6 * rng.standard_normal((n, dim), dtype=np.float32)
+
+
+def _fill(store, vectors: np.ndarray, batch: int = 50_000) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(vectors), batch):
+        block = vectors[i:i + batch]
+        store.add_documents([{"id": i + j} for j in range(len(block))], block)
+    return time.perf_counter() - start
+
+
+def _run(store, queries: np.ndarray, k: int) -> tuple[float, list[set]]:
+    """Median latency (ms) and the ids returned per query"""
+    latencies, found = [], []
+    for q in queries:
+        start = time.perf_counter()
+        results = store.search(q, k=k)
+        latencies.append(time.perf_counter() - start)
+        found.append({r["document"]["id"] for r in results})
+    return float(np.median(latencies)) * 1000, found
+
+
+def bench(size: int, dim: int, nprobes: list[int], nlist: int, queries: int, k: int):
+    rng = np.random.default_rng(0)
+    topics = max(16, size // 500)
+    vectors = clustered_vectors(rng, size, dim, topics)
+    query_vecs = clustered_vectors(rng, queries, dim, topics)
+
+    flat = SimpleVectorStore()
+    _fill(flat, vectors)
+    flat_ms, truth = _run(flat, query_vecs, k)
+    del flat
+
+    ivf = IVFVectorStore(nlist=nlist, min_train_size=0)
+    build_s = _fill(ivf, vectors)
+    rows = [("flat", "-", flat_ms, 1.0, 0.0)]
+    for nprobe in nprobes:
+        ivf.nprobe = nprobe
+        ivf_ms, found = _run(ivf, query_vecs, k)
+        recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+        rows.append(("ivf", nprobe, ivf_ms, recall, build_s))
+    return len(ivf._centroids), rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--nlist", type=int, default=0, help="0 = 4 * sqrt(n)")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"dim={args.dim}, k={args.k}, queries={args.queries}")
+    print(f"{'chunks':>10} {'nlist':>6} {'index':<5} {'nprobe':>6} {'query ms':>9} {f'recall@{args.k}':>10} {'build s':>8}")
+    for size in args.sizes:
+        nlist, rows = bench(size, args.dim, args.nprobe, args.nlist, args.queries, args.k)
+        for name, nprobe, ms, recall, build_s in rows:
+            print(f"{size:>10,} {nlist:>6} {name:<5} {nprobe:>6} {ms:>9.3f} {recall:>10.3f} {build_s:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Vector precision report - memory scanned per query, latency and recall@k per storage mode
+
+"search MB" is what a brute-force query reads (codes + scales). "built MB" is what
+a freshly built store holds in RAM: a quantized store also keeps its float32 rows
+until it is saved, so it uses more memory than float32 alone. "loaded MB" is the
+same index after save + load, where the float32 rows used for rescoring stay on
+disk (memory-mapped) except for the k * rescore rows read per query. Recall is
+against exact float32 search.
+
+Usage:
+    python src/bench_quantization.py --sizes 10000 100000 --dim 1536 --rescore 0 4
+"""
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to python path (parent of src)
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.agent.rag_modules import SimpleVectorStore
+from src.config import get_settings
+from src.bench_ann import clustered_vectors
+
+
+def _run(store, queries: np.ndarray, k: int) -> tuple[float, list[set]]:
+    """Median latency (ms) and the ids returned per query"""
+    store.search(queries[0], k=k)  # warm-up
+    latencies, found = [], []
+    for q in queries:
+        start = time.perf_counter()
+        results = store.search(q, k=k)
+        latencies.append(time.perf_counter() - start)
+        found.append({r["document"]["id"] for r in results})
+    return float(np.median(latencies)) * 1000, found
+
+
+def _load(path: str, precision: str) -> SimpleVectorStore:
+    """SimpleVectorStore.load at the given precision (load uses the configured one)"""
+    settings = get_settings()
+    configured = settings.rag_vector_precision
+    settings.rag_vector_precision = precision
+    try:
+        store = SimpleVectorStore.load(path)
+    finally:
+        settings.rag_vector_precision = configured
+    return store
+
+
+def bench(size: int, dim: int, rescores: list[int], queries: int, k: int):
+    rng = np.random.default_rng(0)
+    topics = max(16, size // 500)
+    vectors = clustered_vectors(rng, size, dim, topics)
+    query_vecs = clustered_vectors(rng, queries, dim, topics)
+    documents = [{"id": i} for i in range(size)]
+
+    rows = []
+    truth = None
+    for precision in SimpleVectorStore.PRECISIONS:
+        store = SimpleVectorStore(precision=precision, rescore_factor=0)
+        store.add_documents(documents, vectors)
+        built_nbytes = store.resident_nbytes
+        with tempfile.TemporaryDirectory() as tmp:
+            # Searches run on the loaded (memory-mapped) index, as served
+            store.save(tmp)
+            del store
+            store = _load(tmp, precision)
+            loaded_nbytes = store.resident_nbytes
+            for rescore in ([0] if precision == "float32" else rescores):
+                store.rescore_factor = rescore
+                latency_ms, found = _run(store, query_vecs, k)
+                if truth is None:
+                    truth = found
+                recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+                rows.append((precision, rescore, store.search_nbytes, built_nbytes, loaded_nbytes, latency_ms, recall))
+            del store
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--rescore", type=int, nargs="+", default=[0, 4], help="rescore factors (0 = off)")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"dim={args.dim}, k={args.k}, queries={args.queries}")
+    print(
+        f"{'chunks':>10} {'precision':<9} {'rescore':>7} {'search MB':>10} {'vs f32':>7} "
+        f"{'built MB':>9} {'loaded MB':>10} {'query ms':>9} {f'recall@{args.k}':>10}"
+    )
+    for size in args.sizes:
+        rows = bench(size, args.dim, args.rescore, args.queries, args.k)
+        baseline = rows[0][2]
+        for precision, rescore, nbytes, built, loaded, ms, recall in rows:
+            print(
+                f"{size:>10,} {precision:<9} {rescore:>7} {nbytes / 2**20:>10.1f} "
+                f"{nbytes / baseline:>7.2f} {built / 2**20:>9.1f} {loaded / 2**20:>10.1f} "
+                f"{ms:>9.3f} {recall:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+SimpleVectorStore benchmark - per-query latency and memory, legacy vs current
+
+"batch ms/q" is search_batch over all queries divided by the query count.
+
+Usage:
+    python src/bench_vector_store.py --sizes 10000 100000 1000000 --dim 768
+"""
+import sys
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to python path (parent of src)
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.agent.rag_modules import SimpleVectorStore
+
+
+class LegacyVectorStore:
+    """Previous implementation: float64, vstack growth, norms per query, full argsort"""
+
+    def __init__(self):
+        self.vectors = []
+        self.documents = []
+
+    def add_documents(self, documents, embeddings):
+        self.documents.extend(documents)
+        if len(self.vectors) == 0:
+            self.vectors = np.array(embeddings)
+        else:
+            self.vectors = np.vstack((self.vectors, np.array(embeddings)))
+
+    def search(self, query_embedding, k=3):
+        query_vec = np.array(query_embedding)
+        norm_vectors = np.linalg.norm(self.vectors, axis=1)
+        norm_query = np.linalg.norm(query_vec)
+        similarities = np.dot(self.vectors, query_vec) / (norm_vectors * norm_query)
+        top_k_indices = np.argsort(similarities)[-k:][::-1]
+        return [{"document": self.documents[i], "score": float(similarities[i])} for i in top_k_indices]
+
+
+def _build(store, vectors: np.ndarray, batch: int) -> float:
+    """Insert in batches like repeated add_documents calls, return seconds"""
+    start = time.perf_counter()
+    for i in range(0, len(vectors), batch):
+        block = vectors[i:i + batch]
+        store.add_documents([{"id": i + j} for j in range(len(block))], block)
+    return time.perf_counter() - start
+
+
+def _query(store, queries: np.ndarray, k: int) -> tuple[float, int]:
+    """Median query latency (ms) and peak temporary allocation (bytes)"""
+    store.search(queries[0], k=k)  # warm-up
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        store.search(q, k=k)
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    store.search(queries[0], k=k)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return float(np.median(latencies)) * 1000, peak
+
+
+def _query_batch(store, queries: np.ndarray, k: int) -> float:
+    """Per-query latency (ms) of one search_batch call, NaN if the store has none"""
+    if not hasattr(store, "search_batch"):
+        return float("nan")
+    start = time.perf_counter()
+    store.search_batch(queries, k=k)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def bench(size: int, dim: int, queries: int, k: int, batch: int, legacy: bool):
+    rng = np.random.default_rng(0)
+    # Embedding APIs return Python floats, i.e. float64 once converted by numpy
+    vectors = rng.standard_normal((size, dim))
+    query_vecs = rng.standard_normal((queries, dim))
+
+    rows = []
+    stores = [("current", SimpleVectorStore)]
+    if legacy:
+        stores.insert(0, ("legacy", LegacyVectorStore))
+
+    for name, cls in stores:
+        store = cls()
+        build_s = _build(store, vectors, batch)
+        latency_ms, temp_bytes = _query(store, query_vecs, k)
+        batch_ms = _query_batch(store, query_vecs, k)
+        index_bytes = store.vectors.nbytes
+        rows.append((name, size, build_s, latency_ms, batch_ms, index_bytes, temp_bytes))
+        del store
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--batch", type=int, default=1000, help="rows per add_documents call")
+    parser.add_argument("--no-legacy", action="store_true", help="skip the legacy store (it needs 2x memory)")
+    args = parser.parse_args()
+
+    print(f"dim={args.dim}, k={args.k}, queries={args.queries}, add batch={args.batch}")
+    print(f"{'store':<8} {'chunks':>10} {'build s':>9} {'query ms':>10} {'batch ms/q':>11} {'index MB':>10} {'query tmp MB':>13}")
+    for size in args.sizes:
+        for name, n, build_s, latency_ms, batch_ms, index_bytes, temp_bytes in bench(
+            size, args.dim, args.queries, args.k, args.batch, not args.no_legacy
+        ):
+            print(
+                f"{name:<8} {n:>10,} {build_s:>9.2f} {latency_ms:>10.3f} {batch_ms:>11.3f} "
+                f"{index_bytes / 2**20:>10.1f} {temp_bytes / 2**20:>13.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -59,6 +59,13 @@ class GraphSettings(BaseModel):
         description="최대 답변 개선 횟수"
     )
     
+    # ===== 심볼 바로 찾기 =====
+    # "UserController 어디 있어?"처럼 위치를 묻는 질문은 심볼 인덱스에서 바로 답변
+    enable_symbol_fast_path: bool = Field(
+        default=True,
+        description="심볼 바로 찾기 활성화: 클래스/메서드 이름이 정확히 일치하면 LLM 호출 없이 파일:줄 응답"
+    )
+    
     # ===== Human-in-the-loop 패턴 =====
     # 중요 결정에서 사용자 확인 요청
     enable_human_approval: bool = Field(
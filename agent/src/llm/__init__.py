@@ -1,6 +1,13 @@
 """
 LLM module - Client abstraction for multiple LLM providers
 """
-from src.llm.client import LLMClient, get_llm_client, OpenAIClient, AnthropicClient, OllamaClient
+from src.llm.client import (
+    LLMClient,
+    get_llm_client,
+    OpenAIClient,
+    AnthropicClient,
+    OllamaClient,
+    LocalEmbeddingClient,
+)
 
-__all__ = ["LLMClient", "get_llm_client", "OpenAIClient", "AnthropicClient", "OllamaClient"]
+__all__ = ["LLMClient", "get_llm_client", "OpenAIClient", "AnthropicClient", "OllamaClient", "LocalEmbeddingClient"]
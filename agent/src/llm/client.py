@@ -1,7 +1,12 @@
 """
 LLM Client module - Supports both API (OpenAI/Anthropic) and Local (Ollama) modes
 """
+import hashlib
+import json
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Generator, Any
 from src.config import get_settings
 
@@ -9,6 +14,10 @@ from src.config import get_settings
 class LLMClient(ABC):
     """Abstract base class for LLM clients"""
     
+    # Identify the embedding space (used as the embedding cache namespace)
+    embedding_provider: str = ""
+    embedding_model: str = ""
+    
     @abstractmethod
     def chat(self, messages: list[dict], stream: bool = False) -> Any:
         """Send chat request to LLM"""
@@ -23,11 +32,41 @@ class LLMClient(ABC):
     def embed(self, text: str) -> list[float]:
         """Generate embedding for text"""
         pass
+    
+    def embed_many(
+        self,
+        texts: list[str],
+        batch_size: int | None = None,
+        max_concurrency: int | None = None,
+    ) -> list[list[float]]:
+        """Generate embeddings for many texts (batched, bounded concurrency, order preserved)"""
+        if not texts:
+            return []
+        
+        settings = get_settings()
+        batch_size = max(1, batch_size or settings.embedding_batch_size)
+        max_concurrency = max(1, max_concurrency or settings.embedding_max_concurrency)
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        
+        if len(batches) == 1 or max_concurrency == 1:
+            results = [self._embed_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(max_concurrency, len(batches))) as pool:
+                results = list(pool.map(self._embed_batch, batches))
+        
+        return [embedding for batch in results for embedding in batch]
+    
+    def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        """Embed one batch - one request per text unless the provider supports batching"""
+        return [self.embed(text) for text in texts]
 
 
 class OpenAIClient(LLMClient):
     """OpenAI API client"""
     
+    embedding_provider = "openai"
+    embedding_model = "text-embedding-3-small"
+    
     def __init__(self, model: str = "gpt-4o-mini"):
         from openai import OpenAI
         settings = get_settings()
@@ -50,15 +89,27 @@ class OpenAIClient(LLMClient):
     
     def embed(self, text: str) -> list[float]:
         response = self.client.embeddings.create(
-            model="text-embedding-3-small",
+            model=self.embedding_model,
             input=text
         )
         return response.data[0].embedding
+    
+    def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        # Native batching: one request with a list input
+        response = self.client.embeddings.create(
+            model=self.embedding_model,
+            input=texts
+        )
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
 
 
 class AnthropicClient(LLMClient):
     """Anthropic API client"""
     
+    # Anthropic has no embeddings API, embeddings come from OpenAI
+    embedding_provider = "openai"
+    embedding_model = "text-embedding-3-small"
+    
     def __init__(self, model: str = "claude-3-haiku-20240307"):
         from anthropic import Anthropic
         settings = get_settings()
@@ -89,20 +140,26 @@ class AnthropicClient(LLMClient):
                 yield text
     
     def embed(self, text: str) -> list[float]:
+        return self._embed_batch([text])[0]
+    
+    def _embed_batch(self, texts: list[str]) -> list[list[float]]:
         # Anthropic doesn't have embeddings, fallback to OpenAI
         from openai import OpenAI
         settings = get_settings()
         client = OpenAI(api_key=settings.openai_api_key)
         response = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text
+            model=self.embedding_model,
+            input=texts
         )
-        return response.data[0].embedding
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
 
 
 class OllamaClient(LLMClient):
     """Ollama local client"""
     
+    embedding_provider = "ollama"
+    embedding_model = "nomic-embed-text"
+    
     def __init__(self, model: str | None = None):
         import ollama
         settings = get_settings()
@@ -128,10 +185,148 @@ class OllamaClient(LLMClient):
     
     def embed(self, text: str) -> list[float]:
         response = self.ollama.embeddings(
-            model="nomic-embed-text",
+            model=self.embedding_model,
             prompt=text
         )
         return response["embedding"]
+    
+    def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        # /api/embed accepts a list input
+        response = self.ollama.embed(
+            model=self.embedding_model,
+            input=texts
+        )
+        return [list(embedding) for embedding in response["embeddings"]]
+
+
+class LocalEmbeddingClient(LLMClient):
+    """In-process sentence-embedding model (transformers/torch), embeddings only
+    
+    Loads from a local model directory without network access. Texts are
+    embedded in length-sorted micro-batches so padding stays small.
+    """
+    
+    embedding_provider = "local"
+    # Weight files that define the embedding space
+    WEIGHT_PATTERNS = ("*.safetensors", "*.bin", "*.pt", "*.onnx")
+    # Bytes hashed from each end of a weight file (the safetensors header is at the start)
+    DIGEST_BLOCK_BYTES = 1 << 20
+    _CHAT_ERROR = (
+        "EMBEDDING_PROVIDER=local loads an embedding model, which cannot chat. "
+        "Chat models come from get_llm_client() (LLM_MODE / LLM_PROVIDER)."
+    )
+    
+    def __init__(self, model_dir: str | None = None):
+        settings = get_settings()
+        self.model_dir = Path(model_dir or settings.local_embedding_model_dir)
+        self._embedding_model: str | None = None
+        self.device = settings.local_embedding_device
+        self.max_length = settings.local_embedding_max_length
+        self.micro_batch_size = max(1, settings.local_embedding_micro_batch)
+        self.pooling = settings.local_embedding_pooling
+        self.num_threads = settings.local_embedding_threads
+        self._model = None
+        self._tokenizer = None
+        self._load_lock = threading.Lock()
+    
+    @property
+    def embedding_model(self) -> str:
+        """Embedding space of the model files (cache / index namespace): model name + weights digest
+        
+        Replacing the files in the same directory with another model changes it, so
+        cached vectors and saved indexes of the old model are not reused. The digest
+        covers each weight file's name, size and first/last block, so it costs a
+        few MB of reads however large the model is.
+        """
+        if self._embedding_model is None:
+            name = self.model_dir.name
+            try:
+                with open(self.model_dir / "config.json", "r", encoding="utf-8") as f:
+                    name = json.load(f).get("_name_or_path") or name
+            except (OSError, ValueError):
+                pass
+            digest = hashlib.sha256()
+            weights = sorted({path for pattern in self.WEIGHT_PATTERNS for path in self.model_dir.glob(pattern)})
+            for path in weights:
+                size = path.stat().st_size
+                digest.update(f"{path.name}\0{size}\0".encode("utf-8"))
+                with open(path, "rb") as f:
+                    digest.update(f.read(self.DIGEST_BLOCK_BYTES))
+                    if size > self.DIGEST_BLOCK_BYTES:
+                        f.seek(max(self.DIGEST_BLOCK_BYTES, size - self.DIGEST_BLOCK_BYTES))
+                        digest.update(f.read())
+            self._embedding_model = f"{name}@{digest.hexdigest()[:16]}" if weights else name
+        return self._embedding_model
+    
+    def chat(self, messages: list[dict], stream: bool = False) -> Any:
+        raise RuntimeError(self._CHAT_ERROR)
+    
+    def chat_stream(self, messages: list[dict]) -> Generator[str, None, None]:
+        raise RuntimeError(self._CHAT_ERROR)
+    
+    def _load(self):
+        """Lazy load tokenizer and model (once, from local files only)"""
+        if self._model is not None:
+            return
+        with self._load_lock:
+            if self._model is not None:
+                return
+            import torch
+            from transformers import AutoModel, AutoTokenizer
+            
+            if not self.model_dir.is_dir():
+                raise FileNotFoundError(f"Local embedding model directory not found: {self.model_dir}")
+            if self.num_threads > 0:
+                torch.set_num_threads(self.num_threads)
+            if self.device == "auto":
+                self.device = "cuda" if torch.cuda.is_available() else "cpu"
+            
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model_dir, local_files_only=True)
+            model = AutoModel.from_pretrained(self.model_dir, local_files_only=True)
+            self._model = model.to(self.device).eval()
+    
+    def embed(self, text: str) -> list[float]:
+        return self._embed_batch([text])[0]
+    
+    def embed_many(
+        self,
+        texts: list[str],
+        batch_size: int | None = None,
+        max_concurrency: int | None = None,
+    ) -> list[list[float]]:
+        # torch already spreads one forward pass over its intra-op threads
+        return super().embed_many(texts, batch_size, max_concurrency or 1)
+    
+    def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        import torch
+        self._load()
+        
+        # Similar lengths in the same micro-batch keep padding small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        embeddings: list[list[float] | None] = [None] * len(texts)
+        with torch.inference_mode():
+            for start in range(0, len(order), self.micro_batch_size):
+                batch = order[start:start + self.micro_batch_size]
+                encoded = self._tokenizer(
+                    [texts[i] for i in batch],
+                    padding=True,
+                    truncation=True,
+                    max_length=self.max_length,
+                    return_tensors="pt",
+                ).to(self.device)
+                hidden = self._model(**encoded).last_hidden_state
+                
+                if self.pooling == "cls":
+                    pooled = hidden[:, 0]
+                else:
+                    # Mean over real tokens only (padding masked out)
+                    mask = encoded["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                    pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+                pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
+                
+                for i, vector in zip(batch, pooled.float().cpu().tolist()):
+                    embeddings[i] = vector
+        return embeddings
 
 
 def get_llm_client() -> LLMClient:
@@ -152,5 +347,7 @@ def get_embedding_client() -> LLMClient:
     
     if settings.embedding_provider == "ollama":
         return OllamaClient()
+    elif settings.embedding_provider == "local":
+        return LocalEmbeddingClient()
     else:
         return OpenAIClient()
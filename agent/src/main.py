@@ -4,6 +4,7 @@ FastAPI Application Entry Point
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import threading
 from src.api import router
 from src.config import get_settings
 
@@ -20,21 +21,46 @@ async def lifespan(app: FastAPI):
     
     # Initialize RAG Manager on startup
     try:
+        from src.agent.rag_modules import RAGManager, rag_unavailable_reason
+        
         # Check if RAG is possible
-        can_run_rag = True
-        if settings.embedding_provider == "openai" and not settings.openai_api_key:
-            can_run_rag = False
-            print("RAG Skipped: OpenAI API Key missing for OpenAI Embeddings")
-            
-        if can_run_rag:
-             from src.agent.rag_modules import RAGManager
-             RAGManager() # This triggers initialization and logs
+        reason = rag_unavailable_reason()
+        if reason:
+            print(f"RAG Skipped: {reason}")
+        else:
+            # Loads or builds the index in the background; the server starts taking
+            # requests right away (lexical-only RAG until GET /api/v1/ready is 200)
+            RAGManager().start_warmup()
     except Exception as e:
         print(f"RAG Initialization Failed: {e}")
+    
+    # Build the file catalog (one directory walk), symbol and content indexes off the event loop,
+    # then keep them up to date with a file watcher
+    from src.agent.content_index import get_content_index
+    from src.agent.file_watcher import start_file_watcher
+    from src.agent.symbol_index import get_symbol_index
+    from src.agent.tools import FileSearchTool
+    
+    def build_file_index():
+        try:
+            project_root = FileSearchTool().project_root
+            get_symbol_index(project_root)
+            start_file_watcher(get_content_index(project_root).catalog)
+        except Exception as e:
+            print(f"File Index Initialization Failed: {e}")
+    
+    threading.Thread(target=build_file_index, name="file-index", daemon=True).start()
         
     yield
     # Shutdown
     print("Shutting down Agent Service...")
+    from src.agent.rag_modules import RAGManager
+    for rag_manager in RAGManager.resident():
+        rag_manager.stop_auto_refresh()
+    from src.agent.file_watcher import stop_file_watchers
+    stop_file_watchers()
+    from src.agent.command_runner import terminate_commands
+    terminate_commands()
 
 
 def create_app() -> FastAPI:
@@ -0,0 +1,51 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to python path (parent of src)
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.agent.chunking import MarkdownChunker, estimate_tokens
+
+PARAGRAPH = "Paragraph {n} starts here. It has a second sentence. And a third one ends it."
+
+def _split(text: str, max_tokens: int = 60, overlap_tokens: int = 12):
+    chunker = MarkdownChunker(0, max_tokens, overlap_tokens)
+    return [chunk["content"] for chunk in chunker.split("명명 규칙", text, "rules/naming.md")]
+
+def test_small_blocks_are_carried_whole():
+    text = "## 명명 규칙\n\n" + "\n\n".join(f"Rule {n} applies." for n in range(20))
+    pieces = _split(text)
+    assert len(pieces) > 1
+    for previous, piece in zip(pieces, pieces[1:]):
+        assert piece.startswith("## 명명 규칙\n\n")
+        # The next piece opens with the last whole blocks of the previous one
+        before, after = previous.split("\n\n")[1:], piece.split("\n\n")[1:]
+        carried = [block for block in after if block in before]
+        assert carried and before[-len(carried):] == carried == after[:len(carried)]
+        assert estimate_tokens("\n\n".join(carried)) <= 12
+
+def test_long_last_block_carries_its_trailing_sentences():
+    text = "## 명명 규칙\n\n" + "\n\n".join(PARAGRAPH.format(n=n) for n in range(4))
+    pieces = _split(text)
+    assert len(pieces) == 2
+    assert pieces[1].startswith("## 명명 규칙\n\nAnd a third one ends it.\n\nParagraph 2 starts here.")
+    assert estimate_tokens("And a third one ends it.") <= 12
+
+def test_single_long_sentence_carries_its_last_tokens():
+    sentence = "word " * 30 + "final words here"
+    text = "## 명명 규칙\n\n" + sentence + "\n\n" + PARAGRAPH.format(n=1)
+    pieces = _split(text, max_tokens=45, overlap_tokens=4)
+    carried = pieces[1].split("\n\n")[1]
+    assert carried == "word final words here" and estimate_tokens(carried) == 4
+
+def test_code_fences_are_not_carried_in_part():
+    code = "```java\n" + "\n".join(f"int value{n} = {n};" for n in range(6)) + "\n```"
+    text = "## 명명 규칙\n\n" + code + "\n\n" + PARAGRAPH.format(n=1)
+    pieces = _split(text)
+    assert pieces[1] == "## 명명 규칙\n\n" + PARAGRAPH.format(n=1)
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,19 @@
+import sys
+from pathlib import Path
+
+# Add project root to python path (parent of src)
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.agent.tools import code_identifiers
+
+def test_code_identifiers():
+    assert code_identifiers("GoalRepository는 어디서 쓰여?") == ["GoalRepository"]
+    assert code_identifiers("goalService.findAll을 호출하는 곳") == ["goalService.findAll"]
+    assert code_identifiers("get_user와 RAGManager가 뭐야") == ["get_user", "RAGManager"]
+    assert code_identifiers("GuideService가 어디 정의돼 있어?") == ["GuideService"]
+    assert code_identifiers("변수 명명 규칙이 뭐야?") == []
+
+if __name__ == "__main__":
+    test_code_identifiers()
+    print("OK")
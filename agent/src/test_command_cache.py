@@ -0,0 +1,74 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to python path (parent of src)
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.agent import command_cache
+from src.agent.command_cache import read_only_argv
+from src.agent.tools import CommandExecutor, FileManagementTool
+from src.config import get_settings
+
+def test_read_only_allowlist():
+    assert read_only_argv("ls -la src") == ("ls", "-la", "src")
+    assert read_only_argv("grep -rn 'a|b' src") == ("grep", "-rn", "a|b", "src")
+    assert read_only_argv("find . -name '*.java'") == ("find", ".", "-name", "*.java")
+    rejected = [
+        "find . -name x -exec rm {} ;",
+        "find . -delete",
+        "find . -mmin -5",
+        "find . -newer build.gradle",
+        "ls ~",
+        "cat ~/notes.txt",
+        "cat a.txt > b.txt",
+        "cat < a.txt",
+        "ls | head",
+        "ls && rm -rf build",
+        "cat $HOME/a",
+        "ls *.md",
+        "cat",
+        "rm a.txt",
+    ]
+    for command in rejected:
+        assert read_only_argv(command) is None, command
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(get_settings(), "command_cache_enabled", True)
+    monkeypatch.setattr(command_cache, "_cache", None)
+    return command_cache.get_command_cache()
+
+def test_file_management_edits_invalidate(tmp_path, cache):
+    (tmp_path / "a.txt").write_text("old\n", encoding="utf-8")
+    executor = CommandExecutor(tmp_path)
+    assert executor.run_command("cat a.txt") == "old\n"
+    assert executor.run_command("cat a.txt") == "old\n"
+    assert cache.stats()["hits"] == 1
+
+    FileManagementTool(tmp_path).edit_file("a.txt", "update", content="new\n")
+    assert cache.stats()["invalidations"] == 1
+    assert executor.run_command("cat a.txt") == "new\n"
+
+def test_external_changes_are_seen(tmp_path, cache):
+    path = tmp_path / "a.txt"
+    path.write_text("one\n", encoding="utf-8")
+    executor = CommandExecutor(tmp_path)
+    assert executor.run_command("cat a.txt") == "one\n"
+
+    # Same size, only the mtime tells the contents apart
+    path.write_text("two\n", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert executor.run_command("cat a.txt") == "two\n"
+
+    listing = executor.run_command("ls -l a.txt")
+    path.chmod(0o600)
+    assert executor.run_command("ls -l a.txt") != listing
+    assert cache.stats()["hits"] == 0
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,92 @@
+import random
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to python path (parent of src)
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.agent.content_index import TrigramIndex, required_literals
+from src.agent.file_catalog import FileCatalog
+
+WORDS = ["goal", "Goal", "Repository", "service", "findAll", "user_id", "getUser", "규칙", "명명",
+         "return", "null", "(", ")", "{", "}", ";", "@GetMapping", "/api/goals", "x", "42"]
+QUERIES = [
+    ("goal", False), ("GoalRepository", False), ("findAll(", False), ("규칙", False), ("/api/goals", False),
+    ("user_id", False), ("zz", False), ("go", False),
+    (r"get\w+\(", True), (r"find(All|One)", True), (r"goal|user", True), (r"[Gg]oalRepo", True),
+    (r"@GetMapping\(\"/api", True), (r"return\s+null;", True), (r"명명\s*규칙", True), (r"x?42", True),
+]
+
+def _tree(tmp_path, files: int = 60, seed: int = 0):
+    rng = random.Random(seed)
+    for n in range(files):
+        lines = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 8))) for _ in range(rng.randint(1, 30))]
+        path = tmp_path / f"pkg{n % 4}" / f"File{n}.java"
+        path.parent.mkdir(exist_ok=True)
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    catalog = FileCatalog(tmp_path, ignored_dirs=[])
+    catalog.build()
+    return catalog
+
+def _scan(root: Path, query: str, regex: bool):
+    """Every matching (path, line) by reading every file"""
+    compiled = re.compile(query if regex else re.escape(query), re.IGNORECASE)
+    hits = set()
+    for path in sorted(root.rglob("*.java")):
+        for number, line in enumerate(path.read_text(encoding="utf-8").splitlines(), 1):
+            if compiled.search(line):
+                hits.add((path.relative_to(root).as_posix(), number))
+    return hits
+
+def _search(index: TrigramIndex, query: str, regex: bool):
+    return {(hit["path"], hit["line"])
+            for hit in index.search(query, regex=regex, limit=10**6, max_per_file=10**6)}
+
+@pytest.mark.parametrize("budget", [None, 2000])
+def test_trigram_search_matches_a_full_scan(tmp_path, budget):
+    # budget=2000 leaves most files scan-only (past the memory budget)
+    index = TrigramIndex(_tree(tmp_path), budget_bytes=budget)
+    index.build()
+    for query, regex in QUERIES:
+        assert _search(index, query, regex) == _scan(tmp_path, query, regex), query
+
+def test_candidates_cover_every_match_and_prune_the_rest(tmp_path):
+    catalog = _tree(tmp_path)
+    (tmp_path / "pkg0" / "Rare.java").write_text("class RareWidgetFactory {}\n", encoding="utf-8")
+    catalog.build()
+    index = TrigramIndex(catalog)
+    index.build()
+    assert index.candidates(["rarewidget"]) == ["pkg0/Rare.java"]
+    assert index.candidates(["nowhere to be found"]) == []
+    containing = {path for path, _ in _scan(tmp_path, "getUser", False)}
+    candidates = set(index.candidates(["getUser"]))
+    assert containing <= candidates < set(catalog.paths())
+    # Literals shorter than a trigram cannot filter anything
+    assert index.candidates(["go"]) == sorted(catalog.paths())
+
+def test_updates_keep_the_index_exact(tmp_path):
+    catalog = _tree(tmp_path, files=10)
+    index = TrigramIndex(catalog)
+    index.build()
+    (tmp_path / "pkg0" / "File0.java").write_text("class NewlyAddedThing {}\n", encoding="utf-8")
+    index.update_file("pkg0/File0.java")
+    (tmp_path / "pkg1" / "File1.java").unlink()
+    index.remove_file("pkg1/File1.java")
+    for query, regex in QUERIES + [("NewlyAdded", False)]:
+        assert _search(index, query, regex) == _scan(tmp_path, query, regex), query
+
+def test_required_literals_are_conservative():
+    assert required_literals("GoalRepository") == ["GoalRepository"]
+    assert required_literals(r"get\w+\(") == ["get", "("]
+    # Any alternation gives up, even one nested in a group
+    assert required_literals(r"find(All|One)") == []
+    assert required_literals(r"colou?r") == ["colo", "r"]
+    assert required_literals(r"goal|user") == []
+    assert required_literals(r"[Gg]oalRepo") == ["oalRepo"]
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,59 @@
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add project root to python path (parent of src)
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.agent.dedup import MinHashDeduplicator
+
+def _chunk(name: str, content: str, language: str = "markdown"):
+    return {"chunk_id": name, "source": f"{name}.md", "header": name, "content": content, "language": language}
+
+def _edit(words, count: int, rng):
+    words = list(words)
+    for i in rng.sample(range(len(words)), count):
+        words[i] = f"edit{rng.randrange(10**6)}"
+    return words
+
+def test_groups_are_not_chained():
+    rng = random.Random(0)
+    a = [f"word{rng.randrange(10**6)}" for _ in range(200)]
+    b = _edit(a, 15, rng)
+    c = _edit(b, 15, rng)
+    chunks = [_chunk(name, " ".join(words)) for name, words in (("a", a), ("b", b), ("c", c))]
+    deduplicator = MinHashDeduplicator()
+    sig = {chunk["chunk_id"]: deduplicator.signature(chunk["content"]) for chunk in chunks}
+
+    def similarity(x, y):
+        return float(np.mean(sig[x] == sig[y]))
+
+    # A threshold that B reaches from both sides but C does not reach from A
+    assert similarity("a", "c") < min(similarity("a", "b"), similarity("b", "c"))
+    deduplicator.threshold = (similarity("a", "c") + min(similarity("a", "b"), similarity("b", "c"))) / 2
+
+    results = deduplicator.deduplicate(chunks)
+    assert [r["chunk_id"] for r in results] == ["a", "c"]
+    assert [loc["source"] for loc in results[0]["locations"]] == ["a.md", "b.md"]
+    assert "locations" not in results[1]
+
+def test_exact_copies_collapse_into_the_first():
+    chunks = [_chunk(f"copy{n}", "## 명명 규칙\n클래스 이름은 PascalCase를 사용합니다.") for n in range(5)]
+    results = MinHashDeduplicator().deduplicate(chunks + [_chunk("other", "전혀 다른 내용의 섹션입니다.")])
+    assert [r["chunk_id"] for r in results] == ["copy0", "other"]
+    assert len(results[0]["locations"]) == 5
+
+def test_only_listed_languages_are_deduplicated():
+    body = "public GoalDto toDto(Goal goal) { return new GoalDto(goal.getId(), goal.getTitle()); }"
+    chunks = [_chunk("java1", body, "java"), _chunk("java2", body, "java"),
+              _chunk("doc1", "같은 문서 내용"), _chunk("doc2", "같은 문서 내용")]
+    results = MinHashDeduplicator(languages=["markdown"]).deduplicate(chunks)
+    assert [r["chunk_id"] for r in results] == ["java1", "java2", "doc1"]
+    assert [r["chunk_id"] for r in MinHashDeduplicator().deduplicate(chunks)] == ["java1", "doc1"]
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
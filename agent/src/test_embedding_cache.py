@@ -0,0 +1,41 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to python path (parent of src)
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.agent.embedding_cache import QueryEmbeddingCache, normalize_query
+
+def test_normalize_query_only_collapses_whitespace():
+    assert normalize_query("  명명   규칙\t알려줘\n") == "명명 규칙 알려줘"
+    # Case and Unicode form reach the embedding model, so they stay part of the key
+    assert normalize_query("GoalRepository") != normalize_query("goalrepository")
+    assert normalize_query("ＡＰＩ") == "ＡＰＩ"
+
+def test_cached_embeddings_are_copies():
+    cache = QueryEmbeddingCache()
+    embedding = [0.1, 0.2, 0.3]
+    cache.put("openai", "m", "규칙", embedding)
+    embedding[0] = 9.0
+    first = cache.get("openai", "m", " 규칙 ")
+    assert first == [0.1, 0.2, 0.3]
+    first[1] = 9.0
+    assert cache.get("openai", "m", "규칙") == [0.1, 0.2, 0.3]
+    assert cache.get("openai", "other-model", "규칙") is None
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+def test_expired_and_evicted_entries(monkeypatch):
+    cache = QueryEmbeddingCache(max_entries=2, ttl=10)
+    clock = [100.0]
+    monkeypatch.setattr("src.agent.embedding_cache.time.monotonic", lambda: clock[0])
+    for query in ("a", "b", "c"):
+        cache.put("p", "m", query, [1.0])
+    assert cache.get("p", "m", "a") is None and cache.stats()["evictions"] == 1
+    clock[0] += 11
+    assert cache.get("p", "m", "c") is None and cache.stats()["size"] == 1
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
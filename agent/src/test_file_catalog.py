@@ -0,0 +1,114 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to python path (parent of src)
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.agent.file_catalog import FileCatalog, GitIgnore
+
+def _gitignore(tmp_path, text: str, directory: str = "") -> GitIgnore:
+    path = tmp_path / directory / ".gitignore"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    gitignore = GitIgnore()
+    gitignore.load(directory, path)
+    return gitignore
+
+def test_gitignore_negation_and_order(tmp_path):
+    gitignore = _gitignore(tmp_path, "# logs\n*.log\n!keep.log\n\nsecret*\n!secret.example\nsecret.example\n")
+    assert gitignore.ignored("app.log", False)
+    assert gitignore.ignored("server/app.log", False)
+    assert not gitignore.ignored("keep.log", False)
+    assert not gitignore.ignored("server/keep.log", False)
+    # The last matching rule wins
+    assert gitignore.ignored("secret.example", False)
+
+def test_gitignore_directory_only_patterns(tmp_path):
+    gitignore = _gitignore(tmp_path, "build/\n")
+    assert gitignore.ignored("build", True)
+    assert gitignore.ignored("backend/build", True)
+    assert not gitignore.ignored("build", False)  # a file named build is kept
+
+def test_gitignore_anchoring(tmp_path):
+    gitignore = _gitignore(tmp_path, "/dist\ndocs/*.tmp\nout\n**/generated/*.java\n")
+    assert gitignore.ignored("dist", True)
+    assert not gitignore.ignored("frontend/dist", True)
+    assert gitignore.ignored("docs/a.tmp", False)
+    assert not gitignore.ignored("src/docs/a.tmp", False)  # a middle slash anchors too
+    assert not gitignore.ignored("docs/sub/a.tmp", False)  # * does not cross /
+    assert gitignore.ignored("out", True) and gitignore.ignored("a/b/out", False)
+    assert gitignore.ignored("generated/A.java", False)
+    assert gitignore.ignored("src/main/generated/A.java", False)
+
+def test_nested_gitignore_overrides_parent(tmp_path):
+    gitignore = _gitignore(tmp_path, "*.json\n")
+    (tmp_path / "web").mkdir()
+    (tmp_path / "web" / ".gitignore").write_text("!package.json\n", encoding="utf-8")
+    gitignore.load("web", tmp_path / "web" / ".gitignore")
+    assert gitignore.ignored("data.json", False)
+    assert gitignore.ignored("web/data.json", False)
+    assert not gitignore.ignored("web/package.json", False)
+
+def test_catalog_prunes_ignored_trees(tmp_path):
+    files = [
+        "README.md",
+        "app.log",
+        "keep.log",
+        "backend/src/Main.java",
+        "backend/build/Main.class",
+        "frontend/node_modules/react/index.js",
+        "frontend/src/App.jsx",
+        ".git/config",
+        ".env",
+    ]
+    for name in files:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("x", encoding="utf-8")
+    (tmp_path / ".gitignore").write_text("*.log\n!keep.log\nbuild/\n", encoding="utf-8")
+
+    catalog = FileCatalog(tmp_path, ignored_dirs=["node_modules"])
+    catalog.build()
+    assert sorted(catalog.paths()) == ["README.md", "backend/src/Main.java", "frontend/src/App.jsx", "keep.log"]
+    assert "backend/build" not in catalog.directories
+    assert catalog.search("main") == ["backend/src/Main.java"]
+    assert catalog.search("a", extensions=[".jsx"]) == ["frontend/src/App.jsx"]
+
+def _catalog(tmp_path, names):
+    for name in names:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("x", encoding="utf-8")
+    catalog = FileCatalog(tmp_path, ignored_dirs=[])
+    catalog.build()
+    return catalog
+
+def test_fuzzy_ranking_order(tmp_path):
+    catalog = _catalog(tmp_path, [
+        "src/GoalRepository.java",
+        "src/goal_repo.py",
+        "src/GoalService.java",
+        "src/aggregator.java",
+        "src/ProgressReport.java",
+        "goals/repo/Readme.md",
+    ])
+    ranked = [path for path, _ in catalog.fuzzy_search("goalrepo")]
+    # camelCase humps and _ boundaries beat the same letters mid-word; equal scores prefer the shorter name
+    assert ranked[:2] == ["src/GoalRepository.java", "src/goal_repo.py"]
+    # A match only through directories ranks below every file-name match
+    assert ranked[-1] == "goals/repo/Readme.md"
+    ranked = [path for path, _ in catalog.fuzzy_search("gr")]
+    assert ranked.index("src/GoalRepository.java") < ranked.index("src/GoalService.java") < ranked.index("src/aggregator.java")
+    assert [path for path, _ in catalog.fuzzy_search("readme")] == ["goals/repo/Readme.md"]
+    assert catalog.fuzzy_search("gr", limit=2) == catalog.fuzzy_search("gr")[:2]
+    assert [path for path, _ in catalog.fuzzy_search("gr", extensions=[".py"])] == ["src/goal_repo.py"]
+
+def test_fuzzy_boundaries_follow_the_lowercased_name(tmp_path):
+    # 'İ' lowercases to two characters; the humps after it must still line up
+    catalog = _catalog(tmp_path, ["a/IxGoalRepository.java", "b/İxGoalRepository.java"])
+    scores = dict(catalog.fuzzy_search("goalrepo"))
+    assert scores["b/İxGoalRepository.java"] == scores["a/IxGoalRepository.java"]
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,83 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to python path (parent of src)
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.agent import file_patch
+from src.agent.file_patch import PatchError, apply_patch, atomic_write
+from src.agent.tools import FileManagementTool
+
+ORIGINAL = "".join(f"line {n}\n" for n in range(1, 21))
+
+def test_hunks_follow_offset_drift():
+    # Three lines were added above both hunks since the diff was made
+    text = "new a\nnew b\nnew c\n" + ORIGINAL
+    patch = (
+        "@@ -4,3 +4,3 @@\n line 4\n-line 5\n+LINE 5\n line 6\n"
+        "@@ -14,3 +14,4 @@\n line 14\n line 15\n+inserted\n line 16\n"
+    )
+    patched, notes = apply_patch(text, patch)
+    lines = patched.splitlines()
+    assert lines[7] == "LINE 5"
+    assert lines[17:20] == ["line 15", "inserted", "line 16"]
+    # The first hunk's drift is carried to the second, which then lands on its hint
+    assert notes == ["Hunk 1: applied at line 7 (offset +3)"]
+
+def test_context_mismatch_fails_without_writing(tmp_path):
+    path = tmp_path / "Main.java"
+    path.write_text(ORIGINAL, encoding="utf-8")
+    patch = "@@ -4,3 +4,3 @@\n line 4\n-line five\n+LINE 5\n line 6\n"
+    result = FileManagementTool(tmp_path).edit_file("Main.java", "rename", patch=patch)
+    assert result.startswith("Failed to apply patch to Main.java: Hunk 1:")
+    assert "differs at line 5" in result
+    assert path.read_text(encoding="utf-8") == ORIGINAL
+    assert os.listdir(tmp_path) == ["Main.java"]
+
+def test_search_replace_not_found_and_ambiguous():
+    not_found = "<<<<<<< SEARCH\nline 99\n=======\nline 100\n>>>>>>> REPLACE\n"
+    with pytest.raises(PatchError, match="Block 1: lines to replace not found"):
+        apply_patch(ORIGINAL, not_found)
+
+    ambiguous = "<<<<<<< SEARCH\nreturn null;\n=======\nreturn Optional.empty();\n>>>>>>> REPLACE\n"
+    with pytest.raises(PatchError, match="matches 2 places \\(lines 2, 4\\)"):
+        apply_patch("a\nreturn null;\nb\nreturn null;\n", ambiguous)
+
+    # A later block that fails leaves the earlier one unapplied too (all or nothing)
+    with pytest.raises(PatchError, match="Block 2"):
+        apply_patch(ORIGINAL, "<<<<<<< SEARCH\nline 1\n=======\nLINE 1\n>>>>>>> REPLACE\n" + not_found)
+
+def test_crlf_and_missing_final_newline_are_kept():
+    patch = "<<<<<<< SEARCH\nb\n=======\nB\nB2\n>>>>>>> REPLACE\n"
+    assert apply_patch("a\r\nb\r\nc\r\n", patch)[0] == "a\r\nB\r\nB2\r\nc\r\n"
+    assert apply_patch("a\nb", patch)[0] == "a\nB\nB2"
+    assert apply_patch("a\nb", "@@ -2,0 +3,1 @@\n+c\n")[0] == "a\nb\nc"
+
+def test_mixed_line_endings_are_kept_per_line():
+    text = "a\r\nb\nc\r\nd\n"
+    patch = "<<<<<<< SEARCH\nb\n=======\nB\n>>>>>>> REPLACE\n<<<<<<< SEARCH\nd\n=======\nD\nE\n>>>>>>> REPLACE\n"
+    assert apply_patch(text, patch)[0] == "a\r\nB\nc\r\nD\nE\n"
+
+def test_other_line_separators_stay_inside_lines():
+    text = "a\x0cb\nc d\n"
+    patch = "<<<<<<< SEARCH\nc d\n=======\nC D\n>>>>>>> REPLACE\n"
+    assert apply_patch(text, patch)[0] == "a\x0cb\nC D\n"
+
+def test_atomic_write_keeps_the_original_on_failure(tmp_path, monkeypatch):
+    path = tmp_path / "rules.md"
+    path.write_text("original\n", encoding="utf-8")
+
+    def fail(src, dst):
+        raise OSError("disk full")
+    monkeypatch.setattr(file_patch.os, "replace", fail)
+    with pytest.raises(OSError, match="disk full"):
+        atomic_write(path, "half written")
+    assert path.read_text(encoding="utf-8") == "original\n"
+    assert os.listdir(tmp_path) == ["rules.md"]
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
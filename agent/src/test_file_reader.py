@@ -0,0 +1,115 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to python path (parent of src)
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.agent import file_reader
+from src.agent.file_reader import FileReader
+
+MAX_LINE_BYTES = 40
+
+def _write(tmp_path, lines, newline="\n", trailing=True, name="a.log"):
+    path = tmp_path / name
+    path.write_bytes((newline.join(lines) + (newline if trailing else "")).encode("utf-8"))
+    return path
+
+def _expected(lines, start, end, max_line_bytes=MAX_LINE_BYTES):
+    """Reference window: the whole file split in memory, long lines cut by hand"""
+    window = []
+    for line in lines[start - 1:end]:
+        data = line.encode("utf-8")
+        if len(data) > max_line_bytes:
+            cut = data[:max_line_bytes].decode("utf-8", errors="replace")
+            line = f"{cut} … [{len(data) - max_line_bytes} bytes truncated]"
+        window.append(line)
+    return window
+
+def _random_lines(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    words = ["INFO", "ERROR", "goal", "규칙", "x" * 30, ""]
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(0, 6))) for _ in range(count)]
+
+@pytest.fixture(params=["streamed", "indexed"])
+def reader(request):
+    reader = FileReader()
+    if request.param == "indexed":
+        reader.INDEX_MIN_BYTES = 1  # every non-empty file goes through the LineIndex path
+    return reader
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+@pytest.mark.parametrize("trailing", [True, False])
+def test_windows_match_an_in_memory_split(tmp_path, reader, newline, trailing):
+    lines = _random_lines(200)
+    path = _write(tmp_path, lines, newline, trailing)
+    for start, count in ((1, 10), (1, 500), (57, 13), (200, 5), (190, 100)):
+        result = reader.read(path, start_line=start, max_lines=count, max_line_bytes=MAX_LINE_BYTES)
+        expected = _expected(lines, start, start + count - 1)
+        assert result["content"] == "".join(line + "\n" for line in expected)
+        assert result["total_lines"] == 200
+        assert result["end_line"] == start + len(expected) - 1
+        assert result["long_lines_truncated"] == sum(line.endswith("bytes truncated]") for line in expected)
+
+def test_window_past_the_end(tmp_path, reader):
+    path = _write(tmp_path, ["one", "two", "three"])
+    result = reader.read(path, start_line=10, max_lines=5)
+    assert result["content"] == "" and result["total_lines"] == 3
+    assert result["end_line"] == 3 and result["truncated"]
+    result = reader.read(path, start_line=2, end_line=2)
+    assert result["content"] == "two\n" and result["truncated"]
+    assert reader.read(path)["truncated"] is False
+
+def test_empty_file(tmp_path, reader):
+    path = tmp_path / "empty.txt"
+    path.write_bytes(b"")
+    result = reader.read(path)
+    assert result["content"] == "" and result["total_lines"] == 0 and not result["truncated"]
+
+def test_long_line_cap(tmp_path, reader):
+    # The cut lands inside a multibyte character, at the exact cap and one past it
+    lines = ["short", "규칙" * 50, "y" * MAX_LINE_BYTES, "z" * (MAX_LINE_BYTES + 1), "tail"]
+    for newline in ("\n", "\r\n"):
+        path = _write(tmp_path, lines, newline)
+        result = reader.read(path, max_line_bytes=MAX_LINE_BYTES)
+        assert result["content"].splitlines() == _expected(lines, 1, len(lines))
+        assert result["long_lines_truncated"] == 2 and result["truncated"]
+        assert result["content"].splitlines()[3].endswith("… [1 bytes truncated]")
+
+def test_a_huge_line_is_not_loaded_whole(tmp_path, reader):
+    path = _write(tmp_path, ["head", "q" * (3 << 20), "tail"])
+    result = reader.read(path, max_line_bytes=100)
+    assert result["content"] == f"head\n{'q' * 100} … [{(3 << 20) - 100} bytes truncated]\ntail\n"
+
+def test_crlf_split_across_skip_blocks(tmp_path, monkeypatch):
+    # Tiny skip blocks put the \r of a cut line at the end of a block, before its \n
+    monkeypatch.setattr(file_reader, "_COUNT_BLOCK_BYTES", 7)
+    lines = ["w" * length for length in range(MAX_LINE_BYTES - 2, MAX_LINE_BYTES + 30)]
+    path = _write(tmp_path, lines, "\r\n")
+    result = FileReader().read(path, max_lines=len(lines), max_line_bytes=MAX_LINE_BYTES)
+    assert result["content"].splitlines() == _expected(lines, 1, len(lines))
+
+def test_files_past_the_index_threshold(tmp_path):
+    reader = FileReader()
+    lines = [f"{n:07d} " + "abcdefghij" * 4 for n in range(100_000)]  # about 5 MB
+    path = _write(tmp_path, lines)
+    assert path.stat().st_size >= reader.INDEX_MIN_BYTES
+    result = reader.read(path, start_line=87_654, max_lines=3)
+    assert result["content"] == "".join(line + "\n" for line in lines[87_653:87_656])
+    assert result["total_lines"] == 100_000 and len(reader._indexes) == 1
+    # Rewriting the file replaces its cached index
+    _write(tmp_path, lines[:99_000] + ["changed"])
+    assert reader.read(path, start_line=99_001)["content"] == "changed\n"
+    assert len(reader._indexes) == 1
+
+def test_binary_files_are_refused(tmp_path, reader):
+    path = tmp_path / "a.bin"
+    path.write_bytes(b"PK\x03\x04\x00\x00" + b"x" * 100)
+    with pytest.raises(ValueError):
+        reader.read(path)
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
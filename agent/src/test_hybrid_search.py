@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add project root to python path (parent of src)
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.agent.lexical_index import BM25Index, tokenize
+from src.agent.rag_modules import reciprocal_rank_fusion
+
+def test_tokenize_hangul_bigrams():
+    assert tokenize("규칙이") == ["규칙이", "규칙", "칙이"]
+    # Two-syllable words are their own bigram
+    assert tokenize("명명 규칙") == ["명명", "규칙"]
+
+def test_tokenize_identifiers():
+    assert tokenize("GoalRepository") == ["goalrepository", "goal", "repository"]
+    assert tokenize("getHTTPResponse") == ["gethttpresponse", "get", "http", "response"]
+    assert tokenize("get_user") == ["get_user", "get", "user"]
+    assert tokenize("@GetMapping") == ["@getmapping", "getmapping", "get", "mapping"]
+    assert tokenize("goalService.findAll") == ["goalservice.findall", "goal", "service", "find", "all"]
+
+def test_bm25_ranks_and_filters():
+    texts = [
+        "변수 명명 규칙이 있습니다",
+        "class GoalRepository extends JpaRepository",
+        "API 응답 형식",
+        "GoalRepository 사용 규칙",
+    ]
+    index = BM25Index(texts, rows=[10, 11, 12, 13])
+    # Both Hangul eojeol and identifier parts match; unrelated rows are left out
+    assert [row for row, _ in index.search("규칙")] == [13, 10]
+    # "repository" occurs twice in row 11 (GoalRepository, JpaRepository)
+    assert [row for row, _ in index.search("repository")] == [11, 13]
+    assert index.search("GoalRepository", k=1)[0][0] == 13
+
+    mask = np.zeros(14, dtype=bool)
+    mask[10] = True
+    assert [row for row, _ in index.search("규칙", mask=mask)] == [10]
+    assert index.search("없는단어") == []
+    assert BM25Index([]).search("규칙") == []
+
+def _doc(name):
+    return {"source": f"{name}.md", "header": name, "chunk_id": name}
+
+def test_rrf_orders_by_fused_rank():
+    a, b, c, d = (_doc(name) for name in "abcd")
+    vector = [(a, 0.9), (b, 0.8), (c, 0.7)]
+    lexical = [(c, 12.0), (a, 7.0), (d, 3.0)]
+    results = reciprocal_rank_fusion([vector, lexical], k=4)
+    # a: 1st + 2nd, c: 3rd + 1st, b: 2nd only, d: 3rd only
+    assert [r["document"]["header"] for r in results] == ["a", "c", "b", "d"]
+    assert results[0]["vector_score"] == 0.9 and results[0]["lexical_score"] == 7.0
+    assert "lexical_score" not in results[2] and "vector_score" not in results[3]
+    assert len(reciprocal_rank_fusion([vector, lexical], k=2)) == 2
+
+def test_rrf_scores_and_ties():
+    a, b = _doc("a"), _doc("b")
+    # First in every ranking scores 1.0
+    assert reciprocal_rank_fusion([[(a, 0.5)], [(a, 1.0)]], k=3)[0]["score"] == pytest.approx(1.0)
+    # An empty ranking does not count against the others
+    assert reciprocal_rank_fusion([[], [(b, 2.0)]], k=3)[0]["score"] == pytest.approx(1.0)
+    # Equal fused scores keep the order of first appearance (vector ranking first)
+    results = reciprocal_rank_fusion([[(a, 0.5)], [(b, 9.0)]], k=3)
+    assert [r["document"]["header"] for r in results] == ["a", "b"]
+    assert results[0]["score"] == results[1]["score"] == pytest.approx(0.5)
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,75 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to python path (parent of src)
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.llm.client import LocalEmbeddingClient
+
+def _write_model(model_dir: Path, weights: bytes):
+    model_dir.mkdir(parents=True, exist_ok=True)
+    (model_dir / "config.json").write_text(json.dumps({"_name_or_path": "BAAI/bge-m3"}), encoding="utf-8")
+    (model_dir / "model.safetensors").write_bytes(weights)
+
+def test_namespace_follows_model_files(tmp_path):
+    first = tmp_path / "embedding"
+    _write_model(first, b"weights v1")
+    namespace = LocalEmbeddingClient(str(first)).embedding_model
+    assert namespace.startswith("BAAI/bge-m3@")
+
+    # Same files elsewhere: same embedding space
+    _write_model(tmp_path / "copy", b"weights v1")
+    assert LocalEmbeddingClient(str(tmp_path / "copy")).embedding_model == namespace
+
+    # Another model dropped into the same directory: new namespace
+    _write_model(first, b"weights v2")
+    assert LocalEmbeddingClient(str(first)).embedding_model != namespace
+
+def test_namespace_reads_only_the_ends_of_large_weights(tmp_path, monkeypatch):
+    monkeypatch.setattr(LocalEmbeddingClient, "DIGEST_BLOCK_BYTES", 4)
+    _write_model(tmp_path, b"head" + b"middle" + b"tail")
+    namespace = LocalEmbeddingClient(str(tmp_path)).embedding_model
+
+    _write_model(tmp_path, b"head" + b"MIDDLE" + b"tail")
+    assert LocalEmbeddingClient(str(tmp_path)).embedding_model == namespace
+    _write_model(tmp_path, b"head" + b"middle" + b"TAIL")
+    assert LocalEmbeddingClient(str(tmp_path)).embedding_model != namespace
+    _write_model(tmp_path, b"head" + b"middle!" + b"tail")
+    assert LocalEmbeddingClient(str(tmp_path)).embedding_model != namespace
+
+def test_chat_is_a_configuration_error(tmp_path):
+    client = LocalEmbeddingClient(str(tmp_path))
+    with pytest.raises(RuntimeError, match="EMBEDDING_PROVIDER=local"):
+        client.chat([{"role": "user", "content": "hi"}])
+
+def test_embed_many_with_a_tiny_model(tmp_path):
+    torch = pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "goal", "service", "find", "all", "user"]
+    (tmp_path / "vocab.txt").write_text("\n".join(vocab), encoding="utf-8")
+    transformers.BertTokenizer(str(tmp_path / "vocab.txt")).save_pretrained(tmp_path)
+    config = transformers.BertConfig(
+        vocab_size=len(vocab), hidden_size=32, num_hidden_layers=1,
+        num_attention_heads=2, intermediate_size=64,
+    )
+    torch.manual_seed(0)
+    transformers.BertModel(config).save_pretrained(tmp_path)
+
+    client = LocalEmbeddingClient(str(tmp_path))
+    client.device = "cpu"
+    texts = ["goal service", "find all user goal service", "user"]
+    vectors = client.embed_many(texts)
+    assert len(vectors) == len(texts)
+    for vector in vectors:
+        assert len(vector) == config.hidden_size
+        assert abs(sum(x * x for x in vector) - 1.0) < 1e-4
+    # Sorting by length for micro-batches must not reorder the results
+    assert client.embed("user") == pytest.approx(vectors[2], abs=1e-5)
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
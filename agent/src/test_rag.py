@@ -11,6 +11,8 @@ def test_rag():
     print("Initializing RuleSearchTool...")
     try:
         tool = RuleSearchTool()
+        if not tool.rag_manager.wait_until_ready():
+            print(f"RAG index not ready: {tool.rag_manager.readiness()}")
         print("Initialization successful")
     except Exception as e:
         print(f"Initialization failed: {e}")
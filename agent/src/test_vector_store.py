@@ -0,0 +1,88 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add project root to python path (parent of src)
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.agent.rag_modules import SimpleVectorStore
+
+def _store(rows: int = 300, dim: int = 16, seed: int = 0, precision: str = "float32"):
+    vectors = np.random.default_rng(seed).standard_normal((rows, dim)).astype(np.float32)
+    store = SimpleVectorStore(initial_capacity=8, precision=precision)
+    store.add_documents([{"id": i} for i in range(rows)], vectors.tolist())
+    return store, vectors
+
+def _brute_force(vectors, query, k, excluded=()):
+    """Ids of the k most cosine-similar rows by a full sort"""
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    similarities = unit @ (query / np.linalg.norm(query))
+    order = [int(i) for i in np.argsort(-similarities, kind="stable") if int(i) not in excluded]
+    return order[:k], similarities
+
+def _ids(results):
+    return [result["document"]["id"] for result in results]
+
+def test_search_matches_brute_force():
+    store, vectors = _store()
+    queries = np.random.default_rng(1).standard_normal((20, vectors.shape[1]))
+    for k in (1, 3, 10):
+        for query in queries:
+            expected, similarities = _brute_force(vectors, query, k)
+            results = store.search(query.tolist(), k=k)
+            assert _ids(results) == expected
+            assert [r["score"] for r in results] == pytest.approx(similarities[expected].tolist(), abs=1e-5)
+
+def test_k_larger_than_the_store():
+    store, vectors = _store(rows=5)
+    query = np.ones(vectors.shape[1])
+    expected, _ = _brute_force(vectors, query, 5)
+    assert _ids(store.search(query.tolist(), k=50)) == expected
+
+def test_tombstoned_rows_are_never_returned():
+    store, vectors = _store()
+    query = np.random.default_rng(2).standard_normal(vectors.shape[1])
+    best, _ = _brute_force(vectors, query, 2)
+    store.delete(best)
+    expected, _ = _brute_force(vectors, query, 5, excluded=set(best))
+    assert _ids(store.search(query.tolist(), k=5)) == expected
+    assert len(store.search(query.tolist(), k=1000)) == len(vectors) - 2
+
+def test_mask_restricts_the_rows():
+    store, vectors = _store()
+    mask = np.zeros(len(vectors), dtype=bool)
+    mask[::3] = True
+    query = np.random.default_rng(3).standard_normal(vectors.shape[1])
+    expected, _ = _brute_force(vectors, query, 4, excluded=set(np.flatnonzero(~mask).tolist()))
+    assert _ids(store.search(query.tolist(), k=4, mask=mask)) == expected
+
+def test_empty_store_and_zero_query():
+    store = SimpleVectorStore(precision="float32")
+    assert store.search([1.0, 0.0], k=3) == []
+    filled, vectors = _store(rows=10)
+    assert filled.search([0.0] * vectors.shape[1], k=3) == []
+
+@pytest.mark.parametrize("precision", ["float32", "int8"])
+def test_search_batch_matches_search(precision, monkeypatch):
+    # Small score blocks so the queries span several matrix multiplies
+    monkeypatch.setattr(SimpleVectorStore, "BATCH_SCORE_ELEMENTS", 1000)
+    store, vectors = _store(precision=precision)
+    store.delete([0, 7])
+    queries = np.random.default_rng(4).standard_normal((13, vectors.shape[1]))
+    queries[5] = 0
+    mask = np.arange(len(vectors)) % 2 == 0
+    for k, row_mask in ((1, None), (5, None), (5, mask), (1000, None)):
+        batched = store.search_batch(queries, k=k, mask=row_mask)
+        assert len(batched) == len(queries)
+        for query, results in zip(queries, batched):
+            assert _ids(results) == _ids(store.search(query.tolist(), k=k, mask=row_mask))
+
+def test_search_batch_on_an_empty_store():
+    store = SimpleVectorStore(precision="float32")
+    assert store.search_batch(np.ones((3, 4)), k=2) == [[], [], []]
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))